@@ -6,20 +6,111 @@ Analyzes top competitors ranking on the first page of search results for a given
 
 import json
 import csv
-from typing import List, Dict, Any
+from array import array
+from bisect import insort
+from collections import Counter
+from typing import List, Dict, Any, Callable, Mapping, Optional, Sequence, Union
 from datetime import datetime
-import statistics
+
+from serp_domains import split_domain
+from serp_profiling import NULL_PROFILER
+from serp_text import DEFAULT_TOKENIZER, Tokenizer
+from serp_stats import TextStats, int_mean
+from serp_storage import ColumnarCompetitorStore, RecordSequence, json_default
+
+# serp_dedup, serp_sketch and serp_snapshot are imported by the features that use them,
+# so importing the analyzer stays cheap for short-lived processes
+
+
+# competitor field -> near_duplicates section name
+NEAR_DUPLICATE_FIELDS = {'title': 'titles', 'meta_description': 'meta_descriptions', 'snippet': 'snippets'}
 
 
 class SERPAnalyzer:
-    def __init__(self, keyword: str):
+    def __init__(self, keyword: str, columnar: bool = False,
+                 word_sketch: Optional[Union[int, Callable[[], Any]]] = None, profiler=None,
+                 near_duplicates: bool = False):
         self.keyword = keyword
-        self.competitors = []
+        # columnar=True keeps rows in a ColumnarCompetitorStore instead of a list of dicts
+        self.columnar = columnar
+        # word_sketch counts common_words approximately in fixed memory: an int is a
+        # SpaceSaving capacity, a callable returns an empty sketch (see serp_sketch)
+        self.word_sketch = word_sketch
+        # profiler: a serp_profiling.StageProfiler timing each analysis stage (off by default)
+        self.profiler = profiler or NULL_PROFILER
+        # near_duplicates=True adds MinHash clustering to every analysis; it costs far more
+        # than the rest of the analysis, so by default it only runs via near_duplicate_clusters()
+        self.near_duplicates = near_duplicates
+        self.competitors = ColumnarCompetitorStore() if columnar else []
         self.analysis_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._reset_aggregates()
+    
+    def _reset_aggregates(self):
+        """Drop all running aggregates; they are rebuilt from self.competitors on next analysis"""
+        self._indexed = 0
+        self._deduplicated = 0
+        self._analysis = None
+        self._keyword_lower = self.keyword.lower()
+        self._position_sum = 0
+        self._position_buckets = {'top_3': 0, 'positions_4_6': 0, 'positions_7_10': 0}
+        # position -> row indices in insertion order; distinct positions kept sorted
+        self._position_rows: Dict[int, array] = {}
+        self._positions: List[int] = []
+        # row indices (columnar) or rows (list) ordered by position, maintained incrementally
+        self._ranked = array('l') if self.columnar else []
+        self._titles = TextStats()
+        self._metas = TextStats()
+        self._title_words = self._word_counter()
+        self._domains = Counter()
+        self._registrable_domains = Counter()
+        self._subdomains = 0
+        self._with_www = 0
+        self._near_duplicates = None
+    
+    def _word_counter(self):
+        """Exact Counter, or the configured approximate sketch"""
+        if self.word_sketch is None:
+            return Counter()
+        if isinstance(self.word_sketch, int):
+            from serp_sketch import SpaceSaving
+            return SpaceSaving(self.word_sketch)
+        return self.word_sketch()
+    
+    def title_word_counts(self):
+        """Title word counter behind common_words; sketches can be merged across workers"""
+        self._sync()
+        return self._title_words
+    
+    def aggregates(self) -> Dict[str, Any]:
+        """
+        Running totals behind analyze_rankings(), kept up to date with the competitors.
+
+        These are the live objects (treat them as read-only); serp_shard merges
+        them across keywords.
+        """
+        self._sync()
+        return {
+            'rows': self._indexed,
+            'position_sum': self._position_sum,
+            'position_buckets': self._position_buckets,
+            'position_counts': {position: len(rows) for position, rows in self._position_rows.items()},
+            'titles': self._titles,
+            'metas': self._metas,
+            'title_words': self._title_words,
+            'domains': self._domains,
+            'registrable_domains': self._registrable_domains,
+            'subdomains': self._subdomains,
+            'with_www': self._with_www
+        }
     
     def add_competitor(self, domain: str, url: str, position: int, title: str = "", 
                       meta_description: str = "", snippet: str = ""):
         """Add a competitor from SERP results"""
+        self._analysis = None
+        if self.columnar:
+            self.competitors.add(domain, url, position, title, meta_description, snippet)
+            return
+        
         competitor = {
             'domain': domain,
             'url': url,
@@ -33,93 +124,214 @@ class SERPAnalyzer:
         }
         self.competitors.append(competitor)
     
+    def _ingest(self, index: int, competitor: Dict[str, Any], rank: bool):
+        """Fold one competitor into the running aggregates, placing it in _ranked if rank is set"""
+        position = competitor['position']
+        self._position_sum += position
+        if position <= 3:
+            self._position_buckets['top_3'] += 1
+        elif 4 <= position <= 6:
+            self._position_buckets['positions_4_6'] += 1
+        elif 7 <= position <= 10:
+            self._position_buckets['positions_7_10'] += 1
+        
+        rows = self._position_rows.get(position)
+        if rows is None:
+            rows = self._position_rows[position] = array('l')
+            insort(self._positions, position)
+        rows.append(index)
+        if rank:
+            # after the last row with an equal or lower position, matching a stable sort
+            i = -1
+            for other in self._positions:
+                if other > position:
+                    break
+                i += len(self._position_rows[other])
+            self._ranked.insert(i, index if self.columnar else competitor)
+        
+        title = competitor['title']
+        if title:
+            self._titles.add(title, self._keyword_lower)
+            self._title_words.update(DEFAULT_TOKENIZER.tokenize(title))
+        if competitor['meta_description']:
+            self._metas.add(competitor['meta_description'], self._keyword_lower)
+        domain = competitor['domain']
+        self._domains[domain] += 1
+        subdomain, registrable, _ = split_domain(domain)
+        self._registrable_domains[registrable or domain] += 1
+        if subdomain:
+            self._subdomains += 1
+            if subdomain == 'www' or subdomain.startswith('www.'):
+                self._with_www += 1
+    
+    def _sync(self):
+        """Bring the aggregates up to date with self.competitors, touching only new rows"""
+        if len(self.competitors) < self._indexed or self.keyword.lower() != self._keyword_lower:
+            self._reset_aggregates()
+        if len(self.competitors) == self._indexed:
+            return
+        start = self._indexed
+        # placing a row walks the distinct positions and shifts the ranked tail, so bulk
+        # loads are bucketed first and ranked in one pass instead
+        rank = (len(self.competitors) - start) * (len(self._positions) + 1) <= start
+        with self.profiler.stage('ingest'):
+            for index, competitor in enumerate(self.competitors[start:], start):
+                self._ingest(index, competitor, rank)
+            if not rank:
+                self._rebuild_ranked()
+        self._indexed = len(self.competitors)
+        self._analysis = None
+    
+    def _rebuild_ranked(self):
+        ranked = array('l')
+        for position in self._positions:
+            ranked.extend(self._position_rows[position])
+        if not self.columnar:
+            competitors = self.competitors
+            ranked = [competitors[i] for i in ranked]
+        self._ranked = ranked
+    
+    def _sync_near_duplicates(self):
+        """Index near-duplicate signatures of rows added since the last analysis"""
+        if self._near_duplicates is None:
+            from serp_dedup import NearDuplicateIndex
+            self._near_duplicates = {field: NearDuplicateIndex() for field in NEAR_DUPLICATE_FIELDS}
+        start = self._deduplicated
+        if start == len(self.competitors):
+            return
+        new_rows = self.competitors[start:]
+        # signatures are computed per batch of new rows, which lets them vectorize
+        with self.profiler.stage('near_duplicate_signatures'):
+            for field, near_duplicates in self._near_duplicates.items():
+                near_duplicates.add_many((index, competitor[field])
+                                         for index, competitor in enumerate(new_rows, start)
+                                         if competitor[field])
+        self._deduplicated = len(self.competitors)
+    
     def analyze_rankings(self) -> Dict[str, Any]:
-        """Analyze competitor rankings and return insights"""
+        """Analyze competitor rankings and return insights
+        
+        The result is cached until competitors are added; treat it as read-only.
+        """
         if not self.competitors:
             return {"error": "No competitors added"}
         
-        analysis = {
-            'keyword': self.keyword,
-            'analysis_date': self.analysis_date,
-            'total_competitors': len(self.competitors),
-            'top_3_domains': [c['domain'] for c in sorted(self.competitors, key=lambda x: x['position'])[:3]],
-            'average_position': statistics.mean([c['position'] for c in self.competitors]),
-            'position_distribution': self._get_position_distribution(),
-            'title_analysis': self._analyze_titles(),
-            'meta_analysis': self._analyze_meta_descriptions(),
-            'domain_analysis': self._analyze_domains(),
-            'competitors': sorted(self.competitors, key=lambda x: x['position'])
-        }
-        
-        return analysis
+        profiler = self.profiler
+        with profiler.stage('analyze_rankings'):
+            with profiler.stage('sync'):
+                self._sync()
+                if self.near_duplicates:
+                    self._sync_near_duplicates()
+            if self._analysis is not None:
+                return self._analysis
+            
+            with profiler.stage('ranking'):
+                ranked = self._ranked_competitors()
+            with profiler.stage('position_distribution'):
+                position_distribution = self._get_position_distribution()
+            with profiler.stage('title_analysis'):
+                title_analysis = self._analyze_titles()
+            with profiler.stage('meta_analysis'):
+                meta_analysis = self._analyze_meta_descriptions()
+            with profiler.stage('domain_analysis'):
+                domain_analysis = self._analyze_domains()
+            analysis = {
+                'keyword': self.keyword,
+                'analysis_date': self.analysis_date,
+                'total_competitors': len(self.competitors),
+                'top_3_domains': [c['domain'] for c in ranked[:3]],
+                'average_position': int_mean(self._position_sum, len(self.competitors)),
+                'position_distribution': position_distribution,
+                'title_analysis': title_analysis,
+                'meta_analysis': meta_analysis,
+                'domain_analysis': domain_analysis,
+                'competitors': ranked
+            }
+            if self.near_duplicates:
+                with profiler.stage('near_duplicates'):
+                    analysis['near_duplicates'] = self._find_near_duplicates()
+            
+            self._analysis = analysis
+            return analysis
+    
+    def _ranked_competitors(self) -> Sequence[Mapping[str, Any]]:
+        """Competitors ordered by position; CompetitorRecord views for columnar analyzers"""
+        if self.columnar:
+            return RecordSequence(self.competitors, self._ranked[:])
+        return self._ranked.copy()
     
     def _get_position_distribution(self) -> Dict[str, int]:
         """Get distribution of positions (top 3, 4-6, 7-10)"""
-        top_3 = sum(1 for c in self.competitors if c['position'] <= 3)
-        middle = sum(1 for c in self.competitors if 4 <= c['position'] <= 6)
-        bottom = sum(1 for c in self.competitors if 7 <= c['position'] <= 10)
-        
-        return {
-            'top_3': top_3,
-            'positions_4_6': middle,
-            'positions_7_10': bottom
-        }
+        return dict(self._position_buckets)
     
     def _analyze_titles(self) -> Dict[str, Any]:
         """Analyze title patterns and characteristics"""
-        titles = [c['title'] for c in self.competitors if c['title']]
-        if not titles:
+        titles = self._titles
+        if not titles.count:
             return {"error": "No titles to analyze"}
         
-        title_lengths = [len(t) for t in titles]
-        keyword_in_title = sum(1 for t in titles if self.keyword.lower() in t.lower())
-        
-        return {
-            'average_length': statistics.mean(title_lengths),
-            'min_length': min(title_lengths),
-            'max_length': max(title_lengths),
-            'keyword_presence': f"{keyword_in_title}/{len(titles)} ({(keyword_in_title/len(titles)*100):.1f}%)",
-            'common_words': self._get_common_words([t.lower() for t in titles])
-        }
+        analysis = titles.summary()
+        analysis['keyword_presence'] = titles.keyword_presence()
+        with self.profiler.stage('common_words'):
+            common = self._title_words.most_common(5)
+        analysis['common_words'] = [f"{word} ({count})" for word, count in common]
+        return analysis
     
     def _analyze_meta_descriptions(self) -> Dict[str, Any]:
         """Analyze meta description patterns"""
-        metas = [c['meta_description'] for c in self.competitors if c['meta_description']]
-        if not metas:
+        metas = self._metas
+        if not metas.count:
             return {"error": "No meta descriptions to analyze"}
         
-        meta_lengths = [len(m) for m in metas]
-        keyword_in_meta = sum(1 for m in metas if self.keyword.lower() in m.lower())
-        
-        return {
-            'average_length': statistics.mean(meta_lengths),
-            'min_length': min(meta_lengths),
-            'max_length': max(meta_lengths),
-            'keyword_presence': f"{keyword_in_meta}/{len(metas)} ({(keyword_in_meta/len(metas)*100):.1f}%)"
-        }
+        analysis = metas.summary()
+        analysis['keyword_presence'] = metas.keyword_presence()
+        return analysis
     
     def _analyze_domains(self) -> Dict[str, Any]:
         """Analyze domain characteristics"""
-        domains = [c['domain'] for c in self.competitors]
         domain_types = {
-            'subdomains': sum(1 for d in domains if d.count('.') > 1),
-            'with_www': sum(1 for d in domains if d.startswith('www.')),
-            'unique_domains': len(set(domains))
+            'subdomains': self._subdomains,
+            'with_www': self._with_www,
+            'unique_domains': len(self._domains),
+            'unique_registrable_domains': len(self._registrable_domains)
         }
         
         return domain_types
     
+    def near_duplicate_clusters(self) -> Dict[str, List[List[Dict[str, Any]]]]:
+        """
+        Clusters of near-identical titles, meta descriptions and snippets.
+
+        Works without near_duplicates=True; signatures are kept, so later calls
+        only hash rows added in between.
+        """
+        self._sync()
+        self._sync_near_duplicates()
+        return self._find_near_duplicates()
+    
+    def _find_near_duplicates(self) -> Dict[str, List[List[Dict[str, Any]]]]:
+        """Clusters of the signatures indexed so far"""
+        result = {}
+        for field, section in NEAR_DUPLICATE_FIELDS.items():
+            clusters = []
+            for cluster in self._near_duplicates[field].clusters():
+                members = sorted(({'position': self.competitors[i]['position'],
+                                   'domain': self.competitors[i]['domain']} for i in cluster),
+                                 key=lambda x: x['position'])
+                clusters.append(members)
+            clusters.sort(key=lambda c: c[0]['position'])
+            result[section] = clusters
+        return result
+    
     def _get_common_words(self, texts: List[str], min_length: int = 3) -> List[str]:
         """Get most common words from text list"""
-        from collections import Counter
-        import re
-        
-        all_words = []
-        for text in texts:
-            words = re.findall(r'\b[a-zA-Z]{' + str(min_length) + ',}\b', text)
-            all_words.extend([w.lower() for w in words])
-        
-        common = Counter(all_words).most_common(5)
+        tokenize = DEFAULT_TOKENIZER.tokenize if min_length == 3 else Tokenizer(min_length).tokenize
+        with self.profiler.stage('common_words'):
+            counts = self._word_counter()
+            for text in texts:
+                counts.update(tokenize(text))
+            
+            common = counts.most_common(5)
         return [f"{word} ({count})" for word, count in common]
     
     def export_to_json(self, filename: str = None) -> str:
@@ -127,9 +339,10 @@ class SERPAnalyzer:
         if not filename:
             filename = f"serp_analysis_{self.keyword.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        analysis = self.analyze_rankings()
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(analysis, f, indent=2, ensure_ascii=False)
+        with self.profiler.stage('export_to_json'):
+            analysis = self.analyze_rankings()
+            with self.profiler.stage('json_serialization'), open(filename, 'w', encoding='utf-8') as f:
+                json.dump(analysis, f, indent=2, ensure_ascii=False, default=json_default)
         
         return filename
     
@@ -138,16 +351,36 @@ class SERPAnalyzer:
         if not filename:
             filename = f"serp_competitors_{self.keyword.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
+        with self.profiler.stage('export_to_csv'), open(filename, 'w', newline='', encoding='utf-8') as f:
             if not self.competitors:
                 return filename
             
             writer = csv.DictWriter(f, fieldnames=self.competitors[0].keys())
             writer.writeheader()
-            writer.writerows(sorted(self.competitors, key=lambda x: x['position']))
+            competitors = self.analyze_rankings()['competitors']
+            with self.profiler.stage('csv_write'):
+                writer.writerows(competitors)
         
         return filename
     
+    def save_snapshot(self, filename: str = None) -> str:
+        """Save competitors to a binary snapshot that open_snapshot() memory-maps"""
+        if not filename:
+            filename = f"serp_snapshot_{self.keyword.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.snap"
+        
+        from serp_snapshot import write_snapshot
+        return write_snapshot(filename, self.keyword, self.competitors, self.analysis_date)
+    
+    @classmethod
+    def open_snapshot(cls, filename: str, **kwargs) -> 'SERPAnalyzer':
+        """Analyzer over a memory-mapped snapshot; its competitors are read-only"""
+        from serp_snapshot import open_snapshot
+        store = open_snapshot(filename)
+        analyzer = cls(store.keyword, columnar=True, **kwargs)
+        analyzer.competitors = store
+        analyzer.analysis_date = store.analysis_date
+        return analyzer
+    
     def print_summary(self):
         """Print a formatted summary of the analysis"""
         analysis = self.analyze_rankings()
@@ -177,6 +410,12 @@ class SERPAnalyzer:
             print(f"  Keyword in title: {title_analysis['keyword_presence']}")
             print(f"  Common words: {', '.join(title_analysis['common_words'][:3])}")
         
+        near_duplicate_titles = analysis.get('near_duplicates', {}).get('titles')
+        if near_duplicate_titles:
+            print(f"\nNEAR-DUPLICATE TITLES:")
+            for cluster in near_duplicate_titles:
+                print("  " + ", ".join(f"#{c['position']} {c['domain']}" for c in cluster))
+        
         print(f"\nCOMPETITOR DETAILS:")
         for comp in analysis['competitors'][:10]:
             print(f"  {comp['position']}. {comp['domain']}")
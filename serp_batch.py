@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+SERP Batch Analysis
+Runs SERPAnalyzer over many keywords at once, fanning the work out across a process pool.
+"""
+
+import os
+from collections.abc import Mapping
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Tuple, Optional, Union
+
+from serp_analyzer import SERPAnalyzer
+from serp_profiling import StageProfiler, Stats
+
+
+# (domain, url, position, title, meta_description, snippet) - tuples pickle much
+# smaller and faster than competitor dicts when shipped to worker processes
+CompetitorRow = Tuple[str, str, int, str, str, str]
+
+COMPETITOR_FIELDS = ('domain', 'url', 'position', 'title', 'meta_description', 'snippet')
+
+
+def _text_field(competitor: Dict[str, Any], field: str, required: bool = False) -> str:
+    value = competitor[field] if required else competitor.get(field) or ''
+    if not isinstance(value, str):
+        raise TypeError(f"'{field}' must be a string, not {type(value).__name__}")
+    return value
+
+
+def competitor_row(competitor: Dict[str, Any]) -> CompetitorRow:
+    """
+    Convert a competitor dict (as produced by add_competitor) into a compact row tuple.
+
+    Raises KeyError for a missing domain, url or position and TypeError for
+    fields of the wrong type, so bad input fails here rather than mid-analysis.
+    """
+    position = competitor['position']
+    if isinstance(position, bool) or not isinstance(position, (int, str)):
+        raise TypeError(f"'position' must be an integer, not {type(position).__name__}")
+    return (
+        _text_field(competitor, 'domain', True),
+        _text_field(competitor, 'url', True),
+        int(position),
+        _text_field(competitor, 'title'),
+        _text_field(competitor, 'meta_description'),
+        _text_field(competitor, 'snippet')
+    )
+
+
+def build_analyzer(keyword: str, rows: Iterable[CompetitorRow], profiler: Optional[StageProfiler] = None,
+                   word_sketch: Optional[Union[int, Callable[[], Any]]] = None) -> SERPAnalyzer:
+    """Create a SERPAnalyzer for a keyword and load competitor rows into it"""
+    analyzer = SERPAnalyzer(keyword, word_sketch=word_sketch, profiler=profiler)
+    with analyzer.profiler.stage('load'):
+        for row in rows:
+            analyzer.add_competitor(*row)
+    return analyzer
+
+
+def _analyze_chunk(chunk: List[Tuple[str, List[CompetitorRow]]], profiler: Optional[StageProfiler] = None,
+                   word_sketch: Optional[Union[int, Callable[[], Any]]] = None,
+                   sketches: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    """Worker entry point: analyze every keyword in a chunk, collecting word sketches into sketches"""
+    results = []
+    for keyword, rows in chunk:
+        analyzer = build_analyzer(keyword, rows, profiler, word_sketch)
+        analysis = analyzer.analyze_rankings()
+        # Error results carry no keyword; tag them so callers can tell which keyword failed
+        analysis.setdefault('keyword', keyword)
+        results.append(analysis)
+        if sketches is not None:
+            sketches.append(analyzer.title_word_counts())
+    return results
+
+
+def _analyze_chunk_with_extras(chunk: List[Tuple[str, List[CompetitorRow]]], trace_memory: Optional[bool],
+                               word_sketch: Optional[Union[int, Callable[[], Any]]]
+                               ) -> Tuple[List[Dict[str, Any]], Optional[Stats], Any]:
+    """
+    Worker entry point when profiling or sketching: results, the chunk's stage
+    stats (trace_memory None: not profiling) and its merged word sketch.
+    """
+    profiler = StageProfiler(trace_memory) if trace_memory is not None else None
+    sketches = [] if word_sketch is not None else None
+    try:
+        results = _analyze_chunk(chunk, profiler, word_sketch, sketches)
+    finally:
+        if profiler is not None:
+            profiler.close()
+    sketch = None
+    if sketches:
+        from serp_sketch import merge_all
+        sketch = merge_all(sketches)
+    return results, profiler.stats if profiler is not None else None, sketch
+
+
+class SERPBatchAnalyzer:
+    """Analyze many keyword -> competitor sets in parallel"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 64,
+                 profiler: Optional[StageProfiler] = None,
+                 word_sketch: Optional[Union[int, Callable[[], Any]]] = None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        # stage timings from every worker are merged into profiler when one is given
+        self.profiler = profiler
+        # word_sketch is passed to every SERPAnalyzer; it is sent to worker processes, so a
+        # factory must be picklable (e.g. functools.partial(CountMinSketch.from_error, ...))
+        self.word_sketch = word_sketch
+        # title word sketches of every keyword in the last iter_results() run, merged
+        self.word_counts = None
+        self.keywords: Dict[str, List[CompetitorRow]] = {}
+
+    def add_competitor(self, keyword: str, domain: str, url: str, position: int, title: str = "",
+                       meta_description: str = "", snippet: str = ""):
+        """Add a competitor for a keyword"""
+        self.keywords.setdefault(keyword, []).append(
+            (domain, url, position, title, meta_description, snippet))
+
+    def add_keyword(self, keyword: str, competitors: Iterable[Any]):
+        """Add a keyword with its competitors (dicts, CompetitorRecords or row tuples)"""
+        rows = self.keywords.setdefault(keyword, [])
+        for competitor in competitors:
+            rows.append(competitor_row(competitor) if isinstance(competitor, Mapping) else tuple(competitor))
+
+    def add_analyzer(self, analyzer: SERPAnalyzer):
+        """Add all competitors of an existing SERPAnalyzer"""
+        self.add_keyword(analyzer.keyword, analyzer.competitors)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _chunks(self, items: Iterable[Tuple[str, List[CompetitorRow]]]) -> Iterator[List[Tuple[str, List[CompetitorRow]]]]:
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def iter_results(self, keywords: Optional[Iterable[Tuple[str, List[CompetitorRow]]]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze keywords and yield analysis dicts in completion order.
+
+        By default the keywords added to this batch are analyzed; any iterable of
+        (keyword, rows) pairs can be passed instead, e.g. a streaming importer.
+        At most 2 * max_workers chunks are in flight, so large inputs are never
+        fully materialized.
+        """
+        items = iter(self.keywords.items() if keywords is None else keywords)
+        self.word_counts = None
+
+        if self.max_workers == 1:
+            sketches = [] if self.word_sketch is not None else None
+            for chunk in self._chunks(items):
+                yield from _analyze_chunk(chunk, self.profiler, self.word_sketch, sketches)
+                if sketches:
+                    self._merge_word_counts(sketches)
+                    sketches.clear()
+            return
+
+        # imported here: multiprocessing roughly doubles start-up time for single-process runs
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        def submit(executor, chunk):
+            if self.profiler is None and self.word_sketch is None:
+                return executor.submit(_analyze_chunk, chunk)
+            trace_memory = self.profiler.trace_memory if self.profiler is not None else None
+            return executor.submit(_analyze_chunk_with_extras, chunk, trace_memory, self.word_sketch)
+
+        def results(future):
+            if self.profiler is None and self.word_sketch is None:
+                return future.result()
+            chunk_results, stats, sketch = future.result()
+            if stats is not None:
+                self.profiler.merge(stats)
+            if sketch is not None:
+                self._merge_word_counts([sketch])
+            return chunk_results
+
+        max_pending = self.max_workers * 2
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            for chunk in self._chunks(items):
+                pending.add(submit(executor, chunk))
+                if len(pending) >= max_pending:
+                    done = next(as_completed(pending))
+                    pending.remove(done)
+                    yield from results(done)
+            for future in as_completed(pending):
+                yield from results(future)
+
+    def _merge_word_counts(self, sketches: List[Any]):
+        from serp_sketch import merge_all
+        if self.word_counts is not None:
+            sketches = [self.word_counts] + sketches
+        self.word_counts = merge_all(sketches)
+
+    def analyze_all(self) -> Dict[str, Dict[str, Any]]:
+        """Analyze every keyword and return the results keyed by keyword"""
+        return {analysis['keyword']: analysis for analysis in self.iter_results()}
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+SERP Benchmark Suite
+Synthetic SERP corpus generator and a timing harness for the SERPAnalyzer pipeline, with
+machine-readable results and regression checks against a stored baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from serp_analyzer import SERPAnalyzer
+from serp_batch import CompetitorRow
+
+STAGES = ('add_competitor', 'analyze_rankings', '_get_common_words', 'export_to_json', 'export_to_csv')
+
+_COMMON_WORDS = """
+best top guide review reviews new free online how what why 2024 2025 cheap buy price prices
+deals sale compare comparison vs official store shop tips ideas easy fast simple complete
+ultimate expert tested rated ranking list pros cons features benefits service services near
+home professional quality affordable premium budget latest update beginners advanced tutorial
+""".split()
+_SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ra', 'to', 'sul', 'ver', 'dan', 'pro', 'tek', 'lin',
+              'mar', 'sto', 'gen', 'flo', 'bri', 'cor', 'vel', 'zen')
+_SUFFIXES = ('com',) * 12 + ('co.uk', 'org', 'net', 'io', 'de', 'com.au', 'fr')
+
+# (mean, standard deviation, minimum, maximum) characters, and the share of empty values
+TITLE_LENGTH = (55, 12, 10, 90)
+META_LENGTH = (150, 30, 40, 300)
+SNIPPET_LENGTH = (160, 25, 50, 300)
+EMPTY_TITLE, EMPTY_META, EMPTY_SNIPPET = 0.03, 0.12, 0.05
+
+# distinct texts generated per field; larger corpora reuse them
+POOL_SIZE = 65536
+
+
+class CorpusGenerator:
+    """
+    Deterministic synthetic SERP rows.
+
+    Words follow a Zipf-like distribution over a fixed vocabulary, text
+    lengths are drawn from clipped normal distributions typical of Google
+    titles, meta descriptions and snippets, and a few large domains (with
+    www., subdomain and country-suffix variants) take most positions. Texts
+    come from fixed-size pools so generating 10M rows stays fast.
+    """
+
+    def __init__(self, seed: int = 0, vocabulary_size: int = 5000, num_domains: int = 2000):
+        self.rng = random.Random(seed)
+        rng = self.rng
+        vocabulary = list(_COMMON_WORDS)
+        seen = set(vocabulary)
+        while len(vocabulary) < vocabulary_size:
+            word = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+            if word not in seen:
+                seen.add(word)
+                vocabulary.append(word)
+        self.vocabulary = vocabulary
+        self._word_weights = self._zipf_cum_weights(len(vocabulary))
+
+        domains = []
+        for i in range(num_domains):
+            name = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))) + str(i)
+            domain = f"{name}.{rng.choice(_SUFFIXES)}"
+            roll = rng.random()
+            if roll < 0.3:
+                domain = 'www.' + domain
+            elif roll < 0.4:
+                domain = rng.choice(('blog', 'shop', 'help', 'en')) + '.' + domain
+            domains.append(domain)
+        self.domains = domains
+        self._domain_weights = self._zipf_cum_weights(num_domains)
+
+        self._titles: List[str] = []
+        self._metas: List[str] = []
+        self._snippets: List[str] = []
+
+    @staticmethod
+    def _zipf_cum_weights(n: int) -> List[float]:
+        total = 0.0
+        weights = []
+        for rank in range(1, n + 1):
+            total += 1.0 / rank
+            weights.append(total)
+        return weights
+
+    def _text(self, length: Tuple[int, int, int, int]) -> str:
+        mean, deviation, low, high = length
+        target = min(high, max(low, int(self.rng.gauss(mean, deviation))))
+        words = []
+        size = -1
+        while size < target:
+            batch = self.rng.choices(self.vocabulary, cum_weights=self._word_weights, k=8)
+            for word in batch:
+                words.append(word)
+                size += len(word) + 1
+                if size >= target:
+                    break
+        text = ' '.join(words)[:high]
+        return text[0].upper() + text[1:]
+
+    def _pooled(self, pool: List[str], length: Tuple[int, int, int, int]) -> str:
+        """A fresh text until the pool is full, then a random pooled one"""
+        if len(pool) < POOL_SIZE:
+            text = self._text(length)
+            pool.append(text)
+            return text
+        return pool[self.rng.randrange(POOL_SIZE)]
+
+    def row(self, keyword: str, position: int) -> CompetitorRow:
+        """One competitor row for a keyword at a position"""
+        rng = self.rng
+        domain = rng.choices(self.domains, cum_weights=self._domain_weights)[0]
+        roll = rng.random()
+        if roll < EMPTY_TITLE:
+            title = ''
+        else:
+            title = self._pooled(self._titles, TITLE_LENGTH)
+            if roll < 0.4:
+                # keyword-led titles, like most top results
+                title = f"{keyword.title()}: {title}"[:TITLE_LENGTH[3]]
+        meta = '' if rng.random() < EMPTY_META else self._pooled(self._metas, META_LENGTH)
+        snippet = '' if rng.random() < EMPTY_SNIPPET else self._pooled(self._snippets, SNIPPET_LENGTH)
+        url = f"https://{domain}/{keyword.replace(' ', '-')}/{rng.randrange(1 << 20):x}"
+        return (domain, url, position, title, meta, snippet)
+
+    def rows(self, count: int, keyword: str = 'best laptops 2024', positions: int = 10) -> Iterator[CompetitorRow]:
+        """count rows for one keyword, cycling through positions 1..positions"""
+        for i in range(count):
+            yield self.row(keyword, i % positions + 1)
+
+    def serps(self, num_keywords: int, rows_per_keyword: int = 10) -> Iterator[Tuple[str, List[CompetitorRow]]]:
+        """(keyword, rows) pairs, in the shape SERPBatchAnalyzer.iter_results() accepts"""
+        for k in range(num_keywords):
+            keyword = ' '.join(self.rng.choices(self.vocabulary[:400], k=self.rng.randint(2, 4)))
+            keyword = f"{keyword} {k}"
+            yield keyword, [self.row(keyword, p) for p in range(1, rows_per_keyword + 1)]
+
+
+def _run_pipeline(rows: List[CompetitorRow], keyword: str, directory: str, columnar: bool,
+                  trace_memory: bool) -> Dict[str, Dict[str, Any]]:
+    """Run every stage once on a fresh analyzer"""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def stage(name: str, func):
+        if trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        result = {'seconds': elapsed}
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            result['peak_memory_bytes'] = peak - before
+            result['retained_memory_bytes'] = current - before
+        results[name] = result
+        return value
+
+    analyzer = SERPAnalyzer(keyword, columnar=columnar)
+
+    def add_all():
+        add = analyzer.add_competitor
+        for row in rows:
+            add(*row)
+
+    stage('add_competitor', add_all)
+    stage('analyze_rankings', analyzer.analyze_rankings)
+    titles = [row[3] for row in rows]
+    stage('_get_common_words', lambda: analyzer._get_common_words(titles))
+    json_path = os.path.join(directory, 'benchmark.json')
+    csv_path = os.path.join(directory, 'benchmark.csv')
+    stage('export_to_json', lambda: analyzer.export_to_json(json_path))
+    stage('export_to_csv', lambda: analyzer.export_to_csv(csv_path))
+    results['export_to_json']['bytes'] = os.path.getsize(json_path)
+    results['export_to_csv']['bytes'] = os.path.getsize(csv_path)
+    os.remove(json_path)
+    os.remove(csv_path)
+    return results
+
+
+def run_benchmark(rows: int, repeat: Optional[int] = None, columnar: bool = False, memory: bool = True,
+                  seed: int = 0) -> Dict[str, Any]:
+    """
+    Time every stage for one corpus size.
+
+    Timings are the best of `repeat` runs (default 3 up to 100k rows, else 1).
+    Memory is measured in a separate tracemalloc run so tracing does not
+    inflate the timings.
+    """
+    repeat = repeat or (3 if rows <= 100000 else 1)
+    keyword = 'best laptops 2024'
+    corpus = list(CorpusGenerator(seed).rows(rows, keyword))
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(repeat):
+            for name, result in _run_pipeline(corpus, keyword, directory, columnar, False).items():
+                best = stages.get(name)
+                if best is None or result['seconds'] < best['seconds']:
+                    stages[name] = result
+        if memory:
+            tracemalloc.start()
+            try:
+                traced = _run_pipeline(corpus, keyword, directory, columnar, True)
+            finally:
+                tracemalloc.stop()
+            for name, result in traced.items():
+                stages[name]['peak_memory_bytes'] = result['peak_memory_bytes']
+                stages[name]['retained_memory_bytes'] = result['retained_memory_bytes']
+
+    for result in stages.values():
+        seconds = result['seconds']
+        result['seconds'] = round(seconds, 6)
+        result['rows_per_second'] = round(rows / seconds) if seconds else None
+    return {'rows': rows, 'columnar': columnar, 'repeat': repeat, 'stages': stages}
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """Stages whose throughput dropped more than `threshold` below the baseline run of the same size"""
+    previous = {(r['rows'], r.get('columnar', False)): r['stages'] for r in baseline.get('results', ())}
+    regressions = []
+    for result in results:
+        old_stages = previous.get((result['rows'], result['columnar']))
+        if not old_stages:
+            continue
+        for name, stage in result['stages'].items():
+            old = old_stages.get(name, {}).get('rows_per_second')
+            new = stage.get('rows_per_second')
+            if not old or not new:
+                continue
+            change = new / old - 1
+            if change < -threshold:
+                regressions.append({
+                    'rows': result['rows'],
+                    'stage': name,
+                    'baseline_rows_per_second': old,
+                    'rows_per_second': new,
+                    'change': round(change, 4)
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SERPAnalyzer pipeline on synthetic corpora")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 1000, 100000],
+                        help="corpus sizes in competitor rows (10 to 10000000)")
+    parser.add_argument('--repeat', type=int, default=None, help="runs per size; the best time is kept")
+    parser.add_argument('--columnar', action='store_true', help="use the columnar competitor store")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak-memory run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="earlier report to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.1, help="allowed throughput drop (0.1 = 10%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="also write the report to --baseline")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        print(f"benchmarking {rows:,} rows...", file=sys.stderr)
+        results.append(run_benchmark(rows, args.repeat, args.columnar, not args.no_memory, args.seed))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+        'regressions': []
+    }
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(results, json.load(f), args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+    for regression in report['regressions']:
+        print(f"REGRESSION {regression['stage']} @ {regression['rows']:,} rows: "
+              f"{regression['change']:+.1%}", file=sys.stderr)
+    sys.exit(1 if report['regressions'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+SERP Command Line
+Non-interactive entry point for cron jobs and shell pipelines: reads competitor rows from
+stdin or dump files, analyzes every keyword (in parallel for large inputs) and writes the
+reports to stdout, a file or a directory.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from serp_batch import CompetitorRow, SERPBatchAnalyzer
+from serp_importer import SERPImporter
+
+# Everything else (multiprocessing, NumPy, exporters) is imported only when a run needs it,
+# so small jobs start in tens of milliseconds.
+
+_UNSAFE_FILENAME_RE = re.compile(r'[^\w.-]+')
+
+
+def report_filename(keyword: str, used: Dict[str, int]) -> str:
+    """File name for a keyword's report, made unique among the names handed out so far"""
+    name = _UNSAFE_FILENAME_RE.sub('_', keyword).strip('._') or 'keyword'
+    count = used.get(name, 0) + 1
+    used[name] = count
+    return f"{name}.json" if count == 1 else f"{name}-{count}.json"
+
+
+def _plan_workers(groups: Iterable[Tuple[str, List[CompetitorRow]]], workers: int,
+                  chunk_size: int) -> Tuple[Iterator[Tuple[str, List[CompetitorRow]]], int]:
+    """
+    Peek at the input and fall back to one in-process worker when it fits in a single chunk.
+
+    Starting a process pool costs far more than analyzing a few keywords.
+    """
+    groups = iter(groups)
+    if workers <= 1:
+        return groups, 1
+    head = list(islice(groups, chunk_size + 1))
+    return chain(head, groups), (workers if len(head) > chunk_size else 1)
+
+
+def _strip(analysis: Dict[str, Any], competitors: bool) -> Dict[str, Any]:
+    if competitors or 'competitors' not in analysis:
+        return analysis
+    return {key: value for key, value in analysis.items() if key != 'competitors'}
+
+
+def write_reports(results: Iterable[Dict[str, Any]], output: Optional[str] = None,
+                  output_dir: Optional[str] = None, competitors: bool = True) -> int:
+    """
+    Write analyses to stdout (JSON lines), an export file or a directory of per-keyword
+    JSON reports. Returns how many were written.
+    """
+    count = 0
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        used: Dict[str, int] = {}
+        for analysis in results:
+            path = os.path.join(output_dir, report_filename(analysis.get('keyword', ''), used))
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(_strip(analysis, competitors), f, indent=2, ensure_ascii=False)
+            count += 1
+    elif output and output != '-':
+        from serp_export import open_writer
+        with open_writer(output) as writer:
+            for analysis in results:
+                writer.write(_strip(analysis, competitors))
+                count += 1
+    else:
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        write = sys.stdout.write
+        for analysis in results:
+            write(encode(_strip(analysis, competitors)) + '\n')
+            count += 1
+        sys.stdout.flush()
+    return count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Analyze SERP competitor dumps without prompts. Reads CSV (export_to_csv format, "
+                    "optional 'keyword' column) or JSON-lines rows, plain, .gz or .zst.")
+    parser.add_argument('inputs', nargs='*', default=['-'], help="dump files ('-' or none: stdin)")
+    parser.add_argument('-f', '--format', choices=('csv', 'jsonl'),
+                        help="input format (default: from the file name; csv for stdin)")
+    parser.add_argument('-k', '--keyword', help="keyword for rows without a keyword column")
+    parser.add_argument('-o', '--output',
+                        help="write every report to one file (.jsonl/.json/.csv/.parquet/.arrow, optionally .gz/.zst)")
+    parser.add_argument('-d', '--output-dir', help="write one <keyword>.json report per keyword here")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="analysis processes (default: CPU count; small inputs always run in-process)")
+    parser.add_argument('--chunk-size', type=int, default=64, help="keywords per worker task")
+    parser.add_argument('--no-competitors', action='store_true', help="omit the per-row competitor list (JSON outputs only)")
+    parser.add_argument('--strict', action='store_true', help="fail on malformed rows instead of skipping them")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write per-stage timings (JSON, or collapsed stacks for a .folded path)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no summary line on stderr")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.output and args.output_dir:
+        print("error: --output and --output-dir are mutually exclusive", file=sys.stderr)
+        return 2
+    if args.no_competitors and args.output and args.output != '-':
+        from serp_export import writer_format
+        if writer_format(args.output) != 'jsonl':
+            # CSV, Parquet and Arrow outputs hold nothing but competitor rows
+            print("error: --no-competitors needs a JSON output (stdout, -d or a .jsonl/.json file)", file=sys.stderr)
+            return 2
+    if args.chunk_size < 1:
+        print("error: --chunk-size must be at least 1", file=sys.stderr)
+        return 2
+
+    importer = SERPImporter(args.inputs, fmt=args.format, keyword=args.keyword, skip_invalid=not args.strict)
+    profiler = None
+    if args.profile:
+        from serp_profiling import StageProfiler
+        profiler = StageProfiler()
+
+    try:
+        # peeking already reads input, so it can fail like the rest of the run
+        groups, workers = _plan_workers(importer, args.workers, args.chunk_size)
+        batch = SERPBatchAnalyzer(max_workers=workers, chunk_size=args.chunk_size, profiler=profiler)
+        written = write_reports(batch.iter_results(groups), args.output, args.output_dir,
+                                not args.no_competitors)
+    except BrokenPipeError:
+        # piped into e.g. head; silence the flush at interpreter exit as well
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if profiler is not None:
+        if args.profile.endswith('.folded'):
+            profiler.to_collapsed(args.profile)
+        else:
+            profiler.to_json(args.profile)
+    if not args.quiet:
+        stats = importer.stats()
+        print(f"Analyzed {written} keywords from {stats['rows']} rows "
+              f"({stats['invalid_rows']} invalid) with {workers} worker(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+SERP Content Gap Analysis
+Sparse TF-IDF term matrix over competitor titles, metas and snippets for many keywords,
+reporting terms the top positions use that lower positions (or your own domain) miss.
+"""
+
+import math
+from array import array
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from serp_diff import normalize_host
+from serp_stats import numpy_available
+from serp_text import STOPWORDS, Tokenizer
+
+TEXT_FIELDS = ('title', 'meta_description', 'snippet')
+_MAX_COUNT = 65535
+
+
+class ContentGapAnalyzer:
+    """
+    Competitor documents stored as a CSR sparse matrix of term counts.
+
+    Each competitor becomes one document (title + meta description + snippet)
+    tokenized into n-grams. Indices, counts and per-document metadata live in
+    typed arrays, about 6 bytes per non-zero entry, so a 100k-keyword corpus
+    stays in memory. TF-IDF weights are computed in one pass over the
+    non-zeros, vectorized with NumPy when it is installed.
+    """
+
+    def __init__(self, own_domain: Optional[str] = None, ngram_range: Tuple[int, int] = (1, 2),
+                 tokenizer: Optional[Tokenizer] = None, top_positions: int = 3):
+        self.own_domain = normalize_host(own_domain) if own_domain else None
+        self.ngram_range = ngram_range
+        self.tokenizer = tokenizer or Tokenizer(stopwords=STOPWORDS)
+        self.top_positions = top_positions
+
+        self.vocabulary: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.doc_freq = array('I')
+        self.indptr = array('Q', [0])
+        self.indices = array('I')
+        self.counts = array('H')
+        self.doc_positions = array('I')
+        self.doc_own = array('B')
+        self.keyword_docs: Dict[str, List[Tuple[int, int]]] = {}
+        self._weights: Optional[array] = None
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_positions)
+
+    def _ngrams(self, text: str) -> Iterable[str]:
+        tokens = self.tokenizer.tokenize(text)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            if n == 1:
+                yield from tokens
+            else:
+                for i in range(len(tokens) - n + 1):
+                    yield ' '.join(tokens[i:i + n])
+
+    def add_document(self, position: int, domain: str, text: str):
+        """Append one competitor document"""
+        term_counts = Counter(self._ngrams(text))
+        vocabulary = self.vocabulary
+        for term, count in term_counts.items():
+            term_id = vocabulary.get(term)
+            if term_id is None:
+                term_id = vocabulary[term] = len(self.terms)
+                self.terms.append(term)
+                self.doc_freq.append(0)
+            self.doc_freq[term_id] += 1
+            self.indices.append(term_id)
+            self.counts.append(min(count, _MAX_COUNT))
+        self.indptr.append(len(self.indices))
+        self.doc_positions.append(position)
+        self.doc_own.append(1 if self.own_domain and normalize_host(domain) == self.own_domain else 0)
+        self._weights = None
+
+    def add_keyword(self, keyword: str, competitors: Iterable[Dict[str, Any]]):
+        """Add every competitor of a keyword as a document"""
+        start = self.num_docs
+        for competitor in competitors:
+            text = ' '.join(competitor.get(field) or '' for field in TEXT_FIELDS)
+            self.add_document(competitor['position'], competitor['domain'], text)
+        if self.num_docs > start:
+            self.keyword_docs.setdefault(keyword, []).append((start, self.num_docs))
+
+    def add_analyzer(self, analyzer):
+        """Add a SERPAnalyzer's competitors"""
+        self.add_keyword(analyzer.keyword, analyzer.competitors)
+
+    def _compute_weights(self) -> array:
+        """L2-normalized (1 + ln tf) * smoothed idf weight for every non-zero entry"""
+        n = self.num_docs
+        if numpy_available():
+            import numpy as np
+            indices = np.frombuffer(self.indices, dtype=np.uint32)
+            counts = np.frombuffer(self.counts, dtype=np.uint16).astype(np.float32)
+            indptr = np.frombuffer(self.indptr, dtype=np.uint64).astype(np.int64)
+            idf = (np.log((1 + n) / (1 + np.frombuffer(self.doc_freq, dtype=np.uint32))) + 1).astype(np.float32)
+            weights = (1 + np.log(counts)) * idf[indices]
+            lengths = np.diff(indptr)
+            nonempty = lengths > 0
+            norms = np.zeros(n, dtype=np.float32)
+            if len(weights):
+                norms[nonempty] = np.sqrt(np.add.reduceat(weights * weights, indptr[:-1][nonempty]))
+            weights /= np.repeat(np.where(norms > 0, norms, 1), lengths)
+            return array('f', weights.astype(np.float32).tobytes())
+
+        idf = [math.log((1 + n) / (1 + df)) + 1 for df in self.doc_freq]
+        weights = array('f', [(1 + math.log(c)) * idf[t] for t, c in zip(self.indices, self.counts)])
+        indptr = self.indptr
+        for doc in range(n):
+            start, end = indptr[doc], indptr[doc + 1]
+            norm = math.sqrt(sum(w * w for w in weights[start:end]))
+            if norm:
+                for i in range(start, end):
+                    weights[i] /= norm
+        return weights
+
+    @property
+    def weights(self) -> array:
+        if self._weights is None:
+            self._weights = self._compute_weights()
+        return self._weights
+
+    def doc_terms(self, doc: int) -> Dict[str, float]:
+        """TF-IDF weights of one document"""
+        start, end = self.indptr[doc], self.indptr[doc + 1]
+        weights = self.weights
+        return {self.terms[self.indices[i]]: weights[i] for i in range(start, end)}
+
+    def keyword_gaps(self, keyword: str, top_n: int = 10, min_top_coverage: int = 2) -> Dict[str, Any]:
+        """
+        Terms used by the top positions of a keyword but missing lower down.
+
+        A term qualifies when at least min_top_coverage top documents use it
+        (capped at the number of top documents) and, if your own domain ranks
+        for the keyword, your page does not. Terms are scored by their mean
+        top-position weight times the share of lower positions missing them.
+        """
+        weights = self.weights
+        indptr = self.indptr
+        indices = self.indices
+        top_weight = Counter()
+        top_coverage = Counter()
+        lower_coverage = Counter()
+        own_terms = set()
+        top_docs = lower_docs = 0
+        own_ranks = False
+        for start, end in self.keyword_docs.get(keyword, ()):
+            for doc in range(start, end):
+                lo, hi = indptr[doc], indptr[doc + 1]
+                if self.doc_own[doc]:
+                    own_ranks = True
+                    own_terms.update(indices[lo:hi])
+                if self.doc_positions[doc] <= self.top_positions:
+                    top_docs += 1
+                    for i in range(lo, hi):
+                        top_weight[indices[i]] += weights[i]
+                        top_coverage[indices[i]] += 1
+                else:
+                    lower_docs += 1
+                    lower_coverage.update(indices[lo:hi])
+
+        required = min(min_top_coverage, top_docs)
+        gaps = []
+        for term_id, coverage in top_coverage.items():
+            if coverage < required or term_id in own_terms:
+                continue
+            missing_share = 1 - lower_coverage[term_id] / lower_docs if lower_docs else 1.0
+            if missing_share <= 0:
+                continue
+            gaps.append({
+                'term': self.terms[term_id],
+                'score': round(top_weight[term_id] / top_docs * missing_share, 4),
+                'top_coverage': f"{coverage}/{top_docs}",
+                'lower_coverage': f"{lower_coverage[term_id]}/{lower_docs}"
+            })
+        gaps.sort(key=lambda g: g['score'], reverse=True)
+        return {
+            'keyword': keyword,
+            'own_domain_ranks': own_ranks,
+            'gaps': gaps[:top_n]
+        }
+
+    def gaps(self, keywords: Optional[Iterable[str]] = None, top_n: int = 10,
+             min_top_coverage: int = 2) -> Dict[str, Dict[str, Any]]:
+        """keyword_gaps() for every keyword (or the given ones)"""
+        return {keyword: self.keyword_gaps(keyword, top_n, min_top_coverage)
+                for keyword in (keywords if keywords is not None else self.keyword_docs)}
+
+    def stats(self) -> Dict[str, Any]:
+        """Matrix size and approximate memory footprint"""
+        nnz = len(self.indices)
+        return {
+            'keywords': len(self.keyword_docs),
+            'documents': self.num_docs,
+            'terms': len(self.terms),
+            'non_zeros': nnz,
+            'matrix_bytes': nnz * (self.indices.itemsize + self.counts.itemsize)
+                            + len(self.indptr) * self.indptr.itemsize
+        }
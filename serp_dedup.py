@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+SERP Near-Duplicate Detection
+MinHash signatures with locality-sensitive hashing to cluster near-identical titles,
+meta descriptions and snippets in roughly linear time.
+"""
+
+import re
+import sys
+import zlib
+from array import array
+from itertools import islice
+from operator import eq
+from typing import List, Dict, Any, Hashable, Iterable, Optional, Set, Tuple
+
+from serp_stats import numpy_available
+
+_NON_WORD_RE = re.compile(r'[\W_]+')
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_EMPTY = 1 << 64
+# below this many texts NumPy's per-call overhead outweighs the vectorized hashing
+_NUMPY_MIN_TEXTS = 4
+# importing NumPy takes ~0.1 s, so only a batch this large pulls it in; once loaded,
+# batches of _NUMPY_MIN_TEXTS use it too
+_NUMPY_IMPORT_MIN_TEXTS = 512
+
+
+def _normalize(text: str) -> bytes:
+    """Lowercased UTF-8 bytes with punctuation/whitespace runs collapsed to one space"""
+    return _NON_WORD_RE.sub(' ', text.lower()).strip().encode('utf-8')
+
+
+def shingles(text: str, ngram: int = 4) -> Set[bytes]:
+    """Byte n-grams of a text after lowercasing and collapsing punctuation/whitespace"""
+    # slicing the UTF-8 bytes avoids encoding every shingle separately before hashing
+    normalized = _normalize(text)
+    if len(normalized) <= ngram:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + ngram] for i in range(len(normalized) - ngram + 1)}
+
+
+def _gram_values(data: bytes, ngram: int) -> Set[int]:
+    """Distinct integer values of the byte n-grams of normalized text"""
+    if ngram != 4:
+        if len(data) <= ngram:
+            return {zlib.crc32(data)}
+        return {zlib.crc32(data[i:i + ngram]) for i in range(len(data) - ngram + 1)}
+    # 4-grams are read directly as uint32s: four offset array views cover every
+    # sliding window without building a bytes object per shingle
+    data = data.ljust(4)
+    windows = len(data) - 3
+    values = set()
+    for offset in range(4):
+        count = (windows - offset + 3) // 4
+        if count > 0:
+            grams = array('I', data[offset:offset + 4 * count])
+            if sys.byteorder == 'big':
+                grams.byteswap()
+            values.update(grams)
+    return values
+
+
+def _bin_shift(num_perm: int) -> Optional[int]:
+    """Right shift mapping a 64-bit hash to a bin, when num_perm is a power of two"""
+    return 64 - num_perm.bit_length() + 1 if num_perm & (num_perm - 1) == 0 else None
+
+
+def _densify(signature: List[int]) -> List[int]:
+    """Fill empty bins from the next non-empty bin (rotation densification)"""
+    num_perm = len(signature)
+    filled = list(signature)
+    for i in range(num_perm):
+        if signature[i] == _EMPTY:
+            distance = 1
+            while signature[(i + distance) % num_perm] == _EMPTY:
+                distance += 1
+            # mix in the distance so bins borrowed from the same source stay distinguishable
+            filled[i] = (signature[(i + distance) % num_perm] ^ (distance * _GOLDEN)) & _MASK64
+    return filled
+
+
+def minhash(text: str, num_perm: int = 64, ngram: int = 4) -> Optional[array]:
+    """
+    MinHash signature of a text, or None for empty text.
+
+    Uses one-permutation hashing: each shingle is hashed once and the hash
+    space split into num_perm bins, each keeping its minimum. Empty bins are
+    filled from the next non-empty bin (rotation densification), which keeps
+    signatures comparable for LSH at a fraction of the cost of num_perm
+    independent hash functions. Values are truncated to 32 bits and stored
+    in an array to keep per-text memory small.
+    """
+    data = _normalize(text)
+    if not data:
+        return None
+    signature = [_EMPTY] * num_perm
+    shift = _bin_shift(num_perm)
+    for value in _gram_values(data, ngram):
+        # multiplicative hashing; the bin comes from the well-mixed high bits
+        h = (value * _GOLDEN) & _MASK64
+        b = h >> shift if shift is not None else (h * num_perm) >> 64
+        if h < signature[b]:
+            signature[b] = h
+
+    if _EMPTY in signature:
+        signature = _densify(signature)
+    return array('I', [v >> 32 for v in signature])
+
+
+def _minhash_many_numpy(datas: List[bytes], num_perm: int, shift: int) -> List[array]:
+    """minhash() of many normalized 4-gram texts in one vectorized pass"""
+    import numpy as np
+
+    datas = [data.ljust(4) for data in datas]
+    lengths = np.fromiter((len(data) for data in datas), dtype=np.int64, count=len(datas))
+    ends = np.cumsum(lengths)
+    raw = np.frombuffer(b''.join(datas), dtype=np.uint8).astype(np.uint32)
+    grams = raw[:-3] | (raw[1:-2] << 8) | (raw[2:-1] << 16) | (raw[3:] << 24)
+    # drop windows that straddle two texts
+    valid = np.ones(len(grams), dtype=bool)
+    for back in (1, 2, 3):
+        straddling = ends[:-1] - back
+        valid[straddling] = False
+    text_ids = np.repeat(np.arange(len(datas)), lengths)[:-3][valid]
+    hashes = grams[valid].astype(np.uint64) * np.uint64(_GOLDEN)
+    bins = (hashes >> np.uint64(shift)).astype(np.intp)
+
+    empty = np.uint64(_MASK64)
+    signatures = np.full((len(datas), num_perm), empty, dtype=np.uint64)
+    np.minimum.at(signatures, (text_ids, bins), hashes)
+
+    missing = signatures == empty
+    if missing.any():
+        # index of the next non-empty bin (wrapping around) for every bin, in one pass
+        rows = np.flatnonzero(missing.any(axis=1))
+        subset = signatures[rows]
+        doubled = np.concatenate([subset, subset], axis=1)
+        columns = np.arange(2 * num_perm)
+        candidates = np.where(doubled != empty, columns, 2 * num_perm)
+        following = np.minimum.accumulate(candidates[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+        distance = (following - columns[:num_perm]).astype(np.uint64)
+        source = np.take_along_axis(doubled, following, axis=1)
+        subset = np.where(subset == empty, source ^ (distance * np.uint64(_GOLDEN)), subset)
+        signatures[rows] = subset
+
+    truncated = (signatures >> np.uint64(32)).astype(np.uint32)
+    return [array('I', row.tobytes()) for row in truncated]
+
+
+def minhash_many(texts: List[str], num_perm: int = 64, ngram: int = 4) -> List[Optional[array]]:
+    """
+    minhash() of many texts; same signatures, but vectorized with NumPy when
+    it is installed (4-grams, power-of-two num_perm).
+    """
+    shift = _bin_shift(num_perm)
+    min_texts = _NUMPY_MIN_TEXTS if 'numpy' in sys.modules else _NUMPY_IMPORT_MIN_TEXTS
+    if ngram != 4 or shift is None or len(texts) < min_texts or not numpy_available():
+        return [minhash(text, num_perm, ngram) for text in texts]
+    datas = [_normalize(text) for text in texts]
+    present = [i for i, data in enumerate(datas) if data]
+    result: List[Optional[array]] = [None] * len(texts)
+    if present:
+        for i, signature in zip(present, _minhash_many_numpy([datas[i] for i in present], num_perm, shift)):
+            result[i] = signature
+    return result
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(map(eq, a, b)) / len(a)
+
+
+def _lane_masks(lanes: int):
+    low = int.from_bytes(b'\xff\xff\xff\x7f' * lanes, 'little')
+    return low, low ^ int.from_bytes(b'\xff' * 4 * lanes, 'little')
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+
+
+class NearDuplicateIndex:
+    """
+    Incremental LSH index that groups texts whose estimated Jaccard similarity
+    reaches the threshold.
+
+    Signatures are split into `bands` bands; texts sharing any band bucket are
+    candidates and are checked against a few existing bucket members, so each
+    insert costs O(bands) rather than O(n).
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16, ngram: int = 4,
+                 max_bucket_checks: int = 8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.max_bucket_checks = max_bucket_checks
+        self.keys: List[Hashable] = []
+        # each signature packed into one int (32 bits per value), so comparing two
+        # is a handful of big-int operations instead of a Python loop
+        self._signatures: List[int] = []
+        self._parent: List[int] = []
+        # root -> members of every cluster with two or more items, so clusters()
+        # does not have to walk the whole index
+        self._members: Dict[int, List[int]] = {}
+        self._buckets: List[Dict[int, Any]] = [{} for _ in range(bands)]
+        self._low_bits, self._high_bits = _lane_masks(num_perm)
+        self._band_mask = (1 << (32 * self.rows)) - 1
+        self._max_mismatches = int(num_perm * (1 - threshold) + 1e-9)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, i: int, j: int):
+        ri, rj = self._find(i), self._find(j)
+        if ri != rj:
+            # keep the earlier item as root so clusters stay in insertion order
+            root, child = min(ri, rj), max(ri, rj)
+            self._parent[child] = root
+            members = self._members
+            merged = members.pop(root, None) or [root]
+            moved = members.pop(child, None) or [child]
+            if len(moved) > len(merged):
+                merged, moved = moved, merged
+            merged.extend(moved)
+            members[root] = merged
+
+    def add(self, key: Hashable, text: str) -> bool:
+        """Index a text under a key; returns False for empty text"""
+        return self._insert(key, minhash(text, self.num_perm, self.ngram))
+
+    def add_many(self, items: Iterable[Tuple[Hashable, str]], batch_size: int = 2048) -> int:
+        """Index (key, text) pairs, hashing texts in batches; returns how many were indexed"""
+        indexed = 0
+        iterator = iter(items)
+        while True:
+            # bounded batches keep the vectorized path's temporary arrays small
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return indexed
+            signatures = minhash_many([text for _, text in batch], self.num_perm, self.ngram)
+            indexed += sum(self._insert(key, signature) for (key, _), signature in zip(batch, signatures))
+
+    def _insert(self, key: Hashable, signature: Optional[array]) -> bool:
+        if signature is None:
+            return False
+        packed = int.from_bytes(signature.tobytes(), 'little')
+        item = len(self.keys)
+        self.keys.append(key)
+        self._signatures.append(packed)
+        self._parent.append(item)
+
+        band_bits = 32 * self.rows
+        band_mask = self._band_mask
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            bucket_key = (packed >> (band * band_bits)) & band_mask
+            bucket = buckets.get(bucket_key)
+            if bucket is None:
+                # most buckets never get a second member; a bare int is cheaper than a list
+                buckets[bucket_key] = item
+            elif isinstance(bucket, int):
+                candidates.add(bucket)
+                buckets[bucket_key] = [bucket, item] if self.max_bucket_checks > 1 else [bucket]
+            else:
+                candidates.update(bucket)
+                if len(bucket) < self.max_bucket_checks:
+                    bucket.append(item)
+
+        # SWAR compare: bit 31 of a lane of t is set iff that 32-bit value differs
+        low, high = self._low_bits, self._high_bits
+        limit = self._max_mismatches
+        signatures = self._signatures
+        for other in candidates:
+            x = packed ^ signatures[other]
+            if _popcount((((x & low) + low) | x) & high) <= limit:
+                self._union(item, other)
+        return True
+
+    def clusters(self, min_size: int = 2) -> List[List[Hashable]]:
+        """Groups of keys whose texts are near-duplicates, in insertion order"""
+        keys = self.keys
+        if min_size <= 1:
+            groups: Dict[int, List[Hashable]] = {}
+            for i, key in enumerate(keys):
+                groups.setdefault(self._find(i), []).append(key)
+            return list(groups.values())
+        return [[keys[i] for i in sorted(members)]
+                for _, members in sorted(self._members.items())
+                if len(members) >= min_size]
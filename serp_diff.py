@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+SERP Snapshot Diff
+Compares two SERP snapshots of the same keyword (entries, exits, position moves,
+title/meta changes), and streams diffs over whole batches of keywords.
+"""
+
+from typing import Dict, Any, Iterable, Iterator, Mapping, Optional
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+TRACKING_PARAMS = ('utm_', 'gclid', 'fbclid', 'msclkid')
+
+
+def normalize_host(host: str) -> str:
+    """Lowercase a host and strip the www. prefix and any port"""
+    host = host.strip().lower().rstrip('.')
+    if ':' in host:
+        host = host.split(':', 1)[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for matching the same page across snapshots.
+
+    Drops the scheme, www., port, fragment, trailing slash and tracking
+    parameters, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip() if '//' in url else '//' + url.strip())
+    path = parts.path.rstrip('/') or ''
+    query = ''
+    if parts.query:
+        params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                  if not k.lower().startswith(TRACKING_PARAMS)]
+        query = urlencode(sorted(params))
+    return normalize_host(parts.netloc) + path + ('?' + query if query else '')
+
+
+def _as_competitor(row: Any) -> Mapping[str, Any]:
+    if isinstance(row, Mapping):
+        return row
+    # SERPBatchAnalyzer row tuple
+    domain, url, position, title, meta_description, snippet = row
+    return {'domain': domain, 'url': url, 'position': position, 'title': title,
+            'meta_description': meta_description, 'snippet': snippet}
+
+
+def _competitors(snapshot: Any) -> Iterable[Mapping[str, Any]]:
+    """Competitors of a SERPAnalyzer, analyze_rankings() result, (keyword, rows) pair or plain list"""
+    if hasattr(snapshot, 'analyze_rankings'):
+        snapshot = snapshot.analyze_rankings()
+    if isinstance(snapshot, Mapping):
+        return snapshot.get('competitors', ())
+    if isinstance(snapshot, tuple) and len(snapshot) == 2 and isinstance(snapshot[0], str):
+        snapshot = snapshot[1]
+    return (_as_competitor(row) for row in snapshot)
+
+
+def _keyword(snapshot: Any) -> Optional[str]:
+    if hasattr(snapshot, 'keyword'):
+        return snapshot.keyword
+    if isinstance(snapshot, Mapping):
+        return snapshot.get('keyword')
+    if isinstance(snapshot, tuple) and len(snapshot) == 2 and isinstance(snapshot[0], str):
+        return snapshot[0]
+    return None
+
+
+def competitor_key(competitor: Mapping[str, Any]) -> str:
+    """Identity of a result across snapshots: its normalized URL, or its domain when no URL is known"""
+    url = competitor.get('url')
+    return normalize_url(url) if url else normalize_host(competitor['domain'])
+
+
+def _index(snapshot: Any) -> Dict[str, Mapping[str, Any]]:
+    """Key -> competitor, keeping the best-ranked entry when a page appears twice"""
+    index = {}
+    for competitor in _competitors(snapshot):
+        key = competitor_key(competitor)
+        current = index.get(key)
+        if current is None or competitor['position'] < current['position']:
+            index[key] = competitor
+    return index
+
+
+def _summary(key: str, competitor: Mapping[str, Any]) -> Dict[str, Any]:
+    return {'key': key, 'domain': competitor['domain'], 'url': competitor.get('url', ''),
+            'position': competitor['position']}
+
+
+def diff_snapshots(old: Any, new: Any, keyword: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Diff two snapshots of one keyword in linear time.
+
+    Snapshots may be SERPAnalyzers, analyze_rankings() results, (keyword, rows)
+    pairs or competitor lists. Position changes are old - new, so a positive
+    change means the page moved up.
+    """
+    before = _index(old)
+    after = _index(new)
+
+    entered = []
+    moved = []
+    title_changed = []
+    meta_changed = []
+    unchanged = 0
+    for key, competitor in after.items():
+        previous = before.get(key)
+        if previous is None:
+            entered.append(_summary(key, competitor))
+            continue
+        change = previous['position'] - competitor['position']
+        if change:
+            moved.append({'key': key, 'domain': competitor['domain'], 'from': previous['position'],
+                          'to': competitor['position'], 'change': change})
+        old_title = previous.get('title') or ''
+        new_title = competitor.get('title') or ''
+        if old_title != new_title:
+            title_changed.append({'key': key, 'old': old_title, 'new': new_title})
+        old_meta = previous.get('meta_description') or ''
+        new_meta = competitor.get('meta_description') or ''
+        if old_meta != new_meta:
+            meta_changed.append({'key': key, 'old': old_meta, 'new': new_meta})
+        if not change and old_title == new_title and old_meta == new_meta:
+            unchanged += 1
+    exited = [_summary(key, competitor) for key, competitor in before.items() if key not in after]
+
+    moved.sort(key=lambda m: m['change'], reverse=True)
+    entered.sort(key=lambda e: e['position'])
+    exited.sort(key=lambda e: e['position'])
+    return {
+        'keyword': keyword or _keyword(new) or _keyword(old),
+        'entered': entered,
+        'exited': exited,
+        'moved': moved,
+        'title_changed': title_changed,
+        'meta_changed': meta_changed,
+        'unchanged': unchanged
+    }
+
+
+def iter_batch_diffs(old: Any, new: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream diffs for a whole batch of keywords.
+
+    If old is a mapping of keyword -> snapshot, each new snapshot is looked up
+    in it. Otherwise both sides must be iterables ordered by keyword (e.g.
+    streamed from keyword-sorted dumps) and are merge-joined, holding one
+    snapshot per side in memory. Keywords missing on one side diff against an
+    empty snapshot. Either way the cost is linear in the number of rows.
+    """
+    if isinstance(old, Mapping):
+        for snapshot in new:
+            keyword = _keyword(snapshot)
+            yield diff_snapshots(old.get(keyword, ()), snapshot, keyword)
+        return
+
+    old_iter = iter(old)
+    new_iter = iter(new)
+    old_item = next(old_iter, None)
+    new_item = next(new_iter, None)
+    while old_item is not None or new_item is not None:
+        old_keyword = _keyword(old_item) if old_item is not None else None
+        new_keyword = _keyword(new_item) if new_item is not None else None
+        if new_item is None or (old_item is not None and old_keyword < new_keyword):
+            yield diff_snapshots(old_item, (), old_keyword)
+            old_item = next(old_iter, None)
+        elif old_item is None or new_keyword < old_keyword:
+            yield diff_snapshots((), new_item, new_keyword)
+            new_item = next(new_iter, None)
+        else:
+            yield diff_snapshots(old_item, new_item, new_keyword)
+            old_item = next(old_iter, None)
+            new_item = next(new_iter, None)
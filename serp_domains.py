@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+SERP Domain Normalization
+Public-suffix-aware host splitting (subdomain / registrable domain / suffix) backed by
+a bundled offline suffix list, and a registrable-domain index for share of voice.
+"""
+
+import os
+import weakref
+from collections import defaultdict
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Set, Tuple
+
+SUFFIX_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public_suffix_list.dat')
+
+# Approximate organic click-through rate of positions 1-10
+CTR_BY_POSITION = (0.28, 0.15, 0.11, 0.08, 0.07, 0.05, 0.04, 0.03, 0.03, 0.02)
+
+_RULE = ''  # trie key marking the end of a rule; never a valid label
+_NORMAL = 1
+_EXCEPTION = 2
+
+
+def clean_host(host: str) -> str:
+    """Lowercase a host and strip whitespace, any scheme/path, port and trailing dot"""
+    host = host.strip().lower()
+    if '/' in host:
+        host = host.split('//', 1)[-1].split('/', 1)[0]
+    if host.startswith('['):
+        return host[1:].split(']', 1)[0]
+    if host.count(':') == 1:
+        host = host.split(':', 1)[0]
+    host = host.rstrip('.')
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+    return host
+
+
+def _is_ip(host: str) -> bool:
+    if not host or not (host[0].isdigit() or ':' in host):
+        return False
+    import ipaddress
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class PublicSuffixList:
+    """
+    Public suffix rules compiled into a trie of reversed labels.
+
+    Lookups walk at most one trie level per host label, following both the
+    exact label and any "*" wildcard, so splitting a host costs O(labels)
+    regardless of how many rules are loaded. Rule semantics follow
+    publicsuffix.org: the longest matching rule wins, exception rules ("!")
+    override wildcards, and unknown TLDs fall back to the implicit "*" rule.
+    """
+
+    def __init__(self, rules: Iterable[str]):
+        self._root: Dict[str, Any] = {}
+        self.size = 0
+        for line in rules:
+            rule = line.strip().split(None, 1)[0] if line.strip() else ''
+            if not rule or rule.startswith('//'):
+                continue
+            kind = _NORMAL
+            if rule.startswith('!'):
+                kind = _EXCEPTION
+                rule = rule[1:]
+            node = self._root
+            for label in reversed(clean_host(rule).split('.')):
+                node = node.setdefault(label, {})
+            node[_RULE] = kind
+            self.size += 1
+
+    @classmethod
+    def from_file(cls, path: str) -> 'PublicSuffixList':
+        """Load a list in the upstream public_suffix_list.dat format"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f)
+
+    def suffix_length(self, labels: Sequence[str]) -> int:
+        """Number of trailing labels forming the public suffix"""
+        longest = 1
+        nodes = [self._root]
+        depth = 0
+        for label in reversed(labels):
+            if not label:
+                break
+            depth += 1
+            next_nodes = []
+            for node in nodes:
+                for key in (label, '*'):
+                    child = node.get(key)
+                    if child is None:
+                        continue
+                    kind = child.get(_RULE)
+                    if kind == _EXCEPTION:
+                        # an exception's suffix is the rule minus its leftmost label
+                        return depth - 1
+                    if kind == _NORMAL and depth > longest:
+                        longest = depth
+                    next_nodes.append(child)
+            if not next_nodes:
+                break
+            nodes = next_nodes
+        return longest
+
+    def split(self, host: str) -> Tuple[str, Optional[str], str]:
+        """
+        (subdomain, registrable domain, public suffix) of a host.
+
+        The registrable domain is None when the host is itself a public
+        suffix. IP addresses are returned whole as their own registrable domain.
+        """
+        host = clean_host(host)
+        if not host or _is_ip(host):
+            return '', host or None, ''
+        labels = host.split('.')
+        n = self.suffix_length(labels)
+        suffix = '.'.join(labels[-n:])
+        if len(labels) <= n:
+            return '', None, suffix
+        return '.'.join(labels[:-(n + 1)]), '.'.join(labels[-(n + 1):]), suffix
+
+
+@lru_cache(maxsize=1)
+def default_suffix_list() -> PublicSuffixList:
+    """The bundled suffix list, loaded once"""
+    return PublicSuffixList.from_file(SUFFIX_LIST_PATH)
+
+
+@lru_cache(maxsize=65536)
+def split_domain(host: str) -> Tuple[str, Optional[str], str]:
+    """(subdomain, registrable domain, public suffix) using the bundled list"""
+    return default_suffix_list().split(host)
+
+
+def registrable_domain(host: str) -> Optional[str]:
+    """Registrable domain ("eTLD+1") of a host, e.g. shop.example.co.uk -> example.co.uk"""
+    return split_domain(host)[1]
+
+
+def public_suffix(host: str) -> str:
+    """Public suffix of a host, e.g. shop.example.co.uk -> co.uk"""
+    return split_domain(host)[2]
+
+
+def site_key(host: str) -> str:
+    """Registrable domain of a host, or the cleaned host when it has none"""
+    return registrable_domain(host) or clean_host(host)
+
+
+def position_ctr(position: int, curve: Sequence[float] = CTR_BY_POSITION) -> float:
+    """Expected click-through rate of a position (0 beyond the curve)"""
+    return curve[position - 1] if 1 <= position <= len(curve) else 0.0
+
+
+class DomainIndex:
+    """
+    Registrable domain -> {keyword: best position} across a whole keyword set.
+
+    Per-domain totals (keywords, position sum, top-3 count, CTR-weighted
+    visibility) are updated as rows arrive, so share of voice for a domain
+    is a dictionary lookup instead of a rescan of every SERP.
+    """
+
+    def __init__(self, ctr_curve: Sequence[float] = CTR_BY_POSITION):
+        self.ctr_curve = ctr_curve
+        self.rankings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        # domain -> [keywords, position_sum, top_3, visibility]
+        self._totals: Dict[str, List[float]] = {}
+        self._keywords: Set[str] = set()
+        # analyzer -> rows indexed; several analyzers may share a keyword (e.g. daily runs)
+        self._indexed: 'weakref.WeakKeyDictionary[Any, int]' = weakref.WeakKeyDictionary()
+        self.total_visibility = 0.0
+
+    def add(self, keyword: str, domain: str, position: int):
+        """Record one ranking; only a domain's best position per keyword counts"""
+        site = site_key(domain)
+        self._keywords.add(keyword)
+        ranked = self.rankings[site]
+        previous = ranked.get(keyword)
+        if previous is not None and previous <= position:
+            return
+        totals = self._totals.setdefault(site, [0, 0, 0, 0.0])
+        visibility = position_ctr(position, self.ctr_curve)
+        if previous is None:
+            totals[0] += 1
+        else:
+            totals[1] -= previous
+            totals[2] -= previous <= 3
+            visibility -= position_ctr(previous, self.ctr_curve)
+        totals[1] += position
+        totals[2] += position <= 3
+        totals[3] += visibility
+        self.total_visibility += visibility
+        ranked[keyword] = position
+
+    def add_analyzer(self, analyzer):
+        """Index a SERPAnalyzer's competitors; calling again only indexes rows added since"""
+        start = self._indexed.get(analyzer, 0)
+        for competitor in analyzer.competitors[start:]:
+            self.add(analyzer.keyword, competitor['domain'], competitor['position'])
+        self._indexed[analyzer] = len(analyzer.competitors)
+
+    @property
+    def keywords(self) -> Set[str]:
+        return set(self._keywords)
+
+    def keywords_for(self, domain: str) -> Dict[str, int]:
+        """Keyword -> best position of a domain (any of its hosts)"""
+        return dict(self.rankings.get(site_key(domain), {}))
+
+    def _summary(self, site: str, totals: List[float]) -> Dict[str, Any]:
+        keywords, position_sum, top_3, visibility = totals
+        return {
+            'domain': site,
+            'keywords': keywords,
+            'keyword_coverage': round(keywords / len(self._keywords), 4) if self._keywords else 0.0,
+            'top_3': top_3,
+            'average_position': round(position_sum / keywords, 2),
+            'visibility': round(visibility, 4),
+            'share_of_voice': round(visibility / self.total_visibility, 4) if self.total_visibility else 0.0
+        }
+
+    def share_of_voice(self, domain: str) -> Dict[str, Any]:
+        """
+        Ranking footprint of a domain across every indexed keyword.
+
+        share_of_voice is the domain's CTR-weighted visibility divided by the
+        visibility of all domains combined.
+        """
+        site = site_key(domain)
+        totals = self._totals.get(site)
+        if totals is None:
+            return {'domain': site, 'keywords': 0, 'keyword_coverage': 0.0, 'top_3': 0,
+                    'average_position': None, 'visibility': 0.0, 'share_of_voice': 0.0}
+        return self._summary(site, totals)
+
+    def top_domains(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Domains with the highest share of voice"""
+        ranked = sorted(self._totals.items(), key=lambda kv: kv[1][3], reverse=True)
+        return [self._summary(site, totals) for site, totals in ranked[:n]]
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+SERP Batch Exporters
+Streaming writers that append many keywords' results to one JSON-lines, compressed CSV
+or columnar (Parquet / Arrow IPC) file without holding the whole batch in memory.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from typing import List, Dict, Any, Iterable, Optional, TextIO
+
+from serp_storage import json_default
+
+ROW_FIELDS = ('keyword', 'domain', 'url', 'position', 'title', 'meta_description', 'snippet')
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """Compression implied by a file name ('gzip', 'zstd' or None)"""
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith(('.zst', '.zstd')):
+        return 'zstd'
+    return None
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the 'zstandard' package (pip install zstandard)") from None
+    return zstandard
+
+
+def open_text(path: str, mode: str = 'r', compression: Optional[str] = None) -> TextIO:
+    """Open a possibly compressed file in text mode ('r', 'w' or 'a')"""
+    compression = compression or detect_compression(path)
+    if compression == 'gzip':
+        if mode == 'r':
+            return gzip.open(path, 'rt', encoding='utf-8', newline='')
+        # level 6 is zlib's default trade-off; gzip.open's level 9 roughly halves write throughput
+        return gzip.open(path, mode + 't', compresslevel=6, encoding='utf-8', newline='')
+    if compression == 'zstd':
+        zstandard = _zstandard()
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        else:
+            # appending starts a new zstd frame; concatenated frames decode as one stream
+            stream = zstandard.ZstdCompressor().stream_writer(open(path, mode + 'b'), closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if compression:
+        raise ValueError(f"Unknown compression: {compression}")
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def _analysis(result: Any) -> Dict[str, Any]:
+    """Accept a SERPAnalyzer or an analyze_rankings() result"""
+    if hasattr(result, 'analyze_rankings'):
+        return result.analyze_rankings()
+    return result
+
+
+class _StreamingWriter:
+    """Shared bookkeeping for the batch writers"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keywords_written = 0
+        self.rows_written = 0
+
+    def write(self, result: Any):
+        raise NotImplementedError
+
+    def write_many(self, results: Iterable[Any]) -> int:
+        """Write every result from an iterable (e.g. SERPBatchAnalyzer.iter_results())"""
+        for result in results:
+            self.write(result)
+        return self.keywords_written
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JSONLinesWriter(_StreamingWriter):
+    """One compact JSON object per keyword analysis"""
+
+    def __init__(self, path: str, compression: Optional[str] = None, append: bool = False):
+        super().__init__(path)
+        self._file = open_text(path, 'a' if append else 'w', compression)
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=json_default).encode
+
+    def write(self, result: Any):
+        analysis = _analysis(result)
+        self._file.write(self._encode(analysis))
+        self._file.write('\n')
+        self.keywords_written += 1
+        self.rows_written += len(analysis.get('competitors', ()))
+
+    def close(self):
+        self._file.close()
+
+
+class CSVWriter(_StreamingWriter):
+    """
+    Competitor rows of many keywords in one CSV file with a leading keyword column.
+
+    Compression follows the file name (.gz / .zst) unless given explicitly. The
+    output can be read back with serp_importer.SERPImporter.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, append: bool = False):
+        super().__init__(path)
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self._file = open_text(path, 'a' if append else 'w', compression)
+        self._writer = csv.writer(self._file)
+        if write_header:
+            self._writer.writerow(ROW_FIELDS)
+
+    def write(self, result: Any):
+        analysis = _analysis(result)
+        competitors = analysis.get('competitors')
+        if not competitors:
+            return
+        keyword = analysis['keyword']
+        self._writer.writerows(
+            (keyword, c['domain'], c['url'], c['position'], c['title'], c['meta_description'], c['snippet'])
+            for c in competitors)
+        self.keywords_written += 1
+        self.rows_written += len(competitors)
+
+    def close(self):
+        self._file.close()
+
+
+class ColumnarWriter(_StreamingWriter):
+    """
+    Competitor rows written as Parquet row groups or Arrow IPC record batches.
+
+    Requires pyarrow. Rows are buffered per column and flushed every
+    batch_size rows, so memory is bounded by the batch size.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, batch_size: int = 65536):
+        super().__init__(path)
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Columnar export requires the 'pyarrow' package (pip install pyarrow)") from None
+        self._pa = pyarrow
+        self.fmt = fmt or ('arrow' if path.endswith(('.arrow', '.feather', '.ipc')) else 'parquet')
+        self.batch_size = batch_size
+        self.schema = pyarrow.schema([
+            ('keyword', pyarrow.string()),
+            ('domain', pyarrow.string()),
+            ('url', pyarrow.string()),
+            ('position', pyarrow.int32()),
+            ('title', pyarrow.string()),
+            ('meta_description', pyarrow.string()),
+            ('snippet', pyarrow.string())
+        ])
+        if self.fmt == 'parquet':
+            import pyarrow.parquet
+            self._sink = pyarrow.parquet.ParquetWriter(path, self.schema, compression='zstd')
+        elif self.fmt == 'arrow':
+            import pyarrow.ipc
+            self._sink = pyarrow.ipc.new_file(path, self.schema)
+        else:
+            raise ValueError(f"Unknown columnar format: {self.fmt}")
+        self._columns: Dict[str, List[Any]] = {name: [] for name in ROW_FIELDS}
+
+    def write(self, result: Any):
+        analysis = _analysis(result)
+        competitors = analysis.get('competitors')
+        if not competitors:
+            return
+        columns = self._columns
+        columns['keyword'].extend([analysis['keyword']] * len(competitors))
+        for name in ROW_FIELDS[1:]:
+            columns[name].extend(c[name] for c in competitors)
+        self.keywords_written += 1
+        self.rows_written += len(competitors)
+        if len(columns['keyword']) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._columns['keyword']:
+            return
+        batch = self._pa.RecordBatch.from_pydict(self._columns, schema=self.schema)
+        if self.fmt == 'parquet':
+            self._sink.write_batch(batch)
+        else:
+            self._sink.write(batch)
+        self._columns = {name: [] for name in ROW_FIELDS}
+
+    def close(self):
+        self._flush()
+        self._sink.close()
+
+
+def writer_format(path: str) -> str:
+    """Output format implied by a file name: 'jsonl', 'columnar' or 'csv'"""
+    name = path
+    for suffix in ('.gz', '.zst', '.zstd'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    # .json is read back as JSON lines by serp_importer too
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if name.endswith(('.parquet', '.arrow', '.feather', '.ipc')):
+        return 'columnar'
+    return 'csv'
+
+
+def open_writer(path: str, **kwargs) -> _StreamingWriter:
+    """Pick a writer from the file extension (.jsonl/.json, .csv, .parquet, .arrow, optionally .gz/.zst)"""
+    fmt = writer_format(path)
+    if fmt == 'jsonl':
+        return JSONLinesWriter(path, **kwargs)
+    if fmt == 'columnar':
+        return ColumnarWriter(path, **kwargs)
+    return CSVWriter(path, **kwargs)
+
+
+def benchmark(keywords: int = 2000, rows_per_keyword: int = 10, directory: str = '.') -> List[Dict[str, Any]]:
+    """Measure write throughput of every writer whose dependencies are installed"""
+    from serp_analyzer import SERPAnalyzer
+
+    analyses = []
+    for k in range(keywords):
+        analyzer = SERPAnalyzer(f"benchmark keyword {k}")
+        for p in range(1, rows_per_keyword + 1):
+            analyzer.add_competitor(f"site{p}.example.com", f"https://site{p}.example.com/{k}", p,
+                                    f"Benchmark title {k} for position {p} with typical length",
+                                    f"Meta description for keyword {k} at position {p}, long enough to be realistic.",
+                                    f"Snippet text {k}/{p}")
+        analyses.append(analyzer.analyze_rankings())
+
+    results = []
+    for suffix in ('.jsonl', '.jsonl.gz', '.csv', '.csv.gz', '.csv.zst', '.parquet', '.arrow'):
+        path = os.path.join(directory, f"serp_export_benchmark{suffix}")
+        try:
+            start = time.perf_counter()
+            with open_writer(path) as writer:
+                writer.write_many(analyses)
+            elapsed = time.perf_counter() - start
+        except ImportError as e:
+            results.append({'format': suffix, 'skipped': str(e)})
+            continue
+        size = os.path.getsize(path)
+        os.remove(path)
+        results.append({
+            'format': suffix,
+            'rows': writer.rows_written,
+            'seconds': round(elapsed, 4),
+            'rows_per_second': round(writer.rows_written / elapsed),
+            'bytes': size,
+            'mb_per_second': round(size / elapsed / 1e6, 1)
+        })
+    return results
+
+
+if __name__ == "__main__":
+    keywords = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for result in benchmark(keywords):
+        if 'skipped' in result:
+            print(f"{result['format']:<10} skipped: {result['skipped']}")
+        else:
+            print(f"{result['format']:<10} {result['rows_per_second']:>10,} rows/s  "
+                  f"{result['mb_per_second']:>6} MB/s  {result['bytes']:>12,} bytes")
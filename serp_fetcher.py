@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+SERP Page Fetcher
+Asyncio collector that fetches competitor pages concurrently over pooled keep-alive
+connections, extracts the live <title> and meta description, and feeds SERPAnalyzer.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import ssl
+import time
+import zlib
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from urllib.parse import urlsplit, urljoin
+
+from serp_analyzer import SERPAnalyzer
+from serp_diff import normalize_host
+
+USER_AGENT = "SERPAnalyzer/1.0 (+competitor metadata fetcher)"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+_META_RE = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'''([a-zA-Z:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''')
+_SPACE_RE = re.compile(r'\s+')
+_CHARSET_RE = re.compile(r'charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def _clean(text: str) -> str:
+    return _SPACE_RE.sub(' ', html.unescape(text)).strip()
+
+
+def extract_metadata(page: str) -> Tuple[str, str]:
+    """(title, meta description) of an HTML page; og:description is used when there is no description"""
+    match = _TITLE_RE.search(page)
+    title = _clean(match.group(1)) if match else ""
+
+    description = ""
+    og_description = ""
+    for tag in _META_RE.findall(page):
+        attrs = {m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None
+                 else m.group(4) for m in _ATTR_RE.finditer(tag)}
+        name = (attrs.get('name') or attrs.get('property') or '').lower()
+        if name == 'description' and not description:
+            description = _clean(attrs.get('content', ''))
+        elif name == 'og:description' and not og_description:
+            og_description = _clean(attrs.get('content', ''))
+    return title, description or og_description
+
+
+class FetchResult:
+    """Outcome of fetching one competitor URL"""
+    __slots__ = ('url', 'final_url', 'status', 'title', 'meta_description', 'error', 'from_cache', 'elapsed')
+
+    def __init__(self, url: str, final_url: str = "", status: int = 0, title: str = "",
+                 meta_description: str = "", error: str = "", from_cache: bool = False, elapsed: float = 0.0):
+        self.url = url
+        self.final_url = final_url or url
+        self.status = status
+        self.title = title
+        self.meta_description = meta_description
+        self.error = error
+        self.from_cache = from_cache
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and 200 <= self.status < 300
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ResponseCache:
+    """On-disk cache of fetched pages, one gzip'd JSON file per URL"""
+
+    def __init__(self, directory: str, max_age: Optional[float] = None):
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.json.gz')
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        path = self._path(url)
+        try:
+            if self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, entry: Dict[str, Any]):
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=5) as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+
+class _HTTPError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)"""
+
+    def __init__(self, max_idle_per_host: int = 8, ssl_context: Optional[ssl.SSLContext] = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+
+    async def acquire(self, scheme: str, host: str, port: int):
+        idle = self._idle.get((scheme, host, port))
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return await asyncio.open_connection(
+            host, port, ssl=self.ssl_context if scheme == 'https' else None,
+            server_hostname=host if scheme == 'https' else None)
+
+    def release(self, key: Tuple[str, str, int], connection, reusable: bool):
+        idle = self._idle.setdefault(key, [])
+        if reusable and len(idle) < self.max_idle_per_host:
+            idle.append(connection)
+        else:
+            connection[1].close()
+
+    def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class SERPFetcher:
+    """
+    Concurrent competitor page fetcher.
+
+    At most `concurrency` requests run at once and at most `per_host` per
+    host. Each attempt is bounded by `timeout` seconds; connection errors,
+    timeouts and 429/5xx responses are retried with exponential backoff.
+    Successful responses are stored in an optional on-disk ResponseCache.
+    """
+
+    def __init__(self, concurrency: int = 100, per_host: int = 4, timeout: float = 10.0, retries: int = 2,
+                 backoff: float = 0.5, cache_dir: Optional[str] = None, cache_max_age: Optional[float] = None,
+                 max_bytes: int = 2 * 1024 * 1024, max_redirects: int = 5, user_agent: str = USER_AGENT,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_bytes = max_bytes
+        self.max_redirects = max_redirects
+        self.user_agent = user_agent
+        self.cache = ResponseCache(cache_dir, cache_max_age) if cache_dir else None
+        self.pool = ConnectionPool(max_idle_per_host=per_host, ssl_context=ssl_context)
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def close(self):
+        self.pool.close()
+
+    async def __aenter__(self) -> 'SERPFetcher':
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> Tuple[bytes, bool]:
+        """Read a response body; returns (body, connection reusable)"""
+        reusable = headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            size = 0
+            while True:
+                line = await reader.readline()
+                chunk_size = int(line.split(b';', 1)[0].strip() or b'0', 16)
+                if chunk_size == 0:
+                    # trailers end with a blank line
+                    while (await reader.readline()).strip():
+                        pass
+                    break
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readexactly(2)
+                size += chunk_size
+                if size > self.max_bytes:
+                    return b''.join(chunks), False
+            return b''.join(chunks), reusable
+        if 'content-length' in headers:
+            length = int(headers['content-length'])
+            if length > self.max_bytes:
+                return await reader.readexactly(self.max_bytes), False
+            return await reader.readexactly(length), reusable
+        return await reader.read(self.max_bytes), False
+
+    async def _request(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower() or 'http'
+        if scheme not in ('http', 'https'):
+            raise _HTTPError(f"Unsupported scheme: {scheme}")
+        host = parts.hostname or ''
+        port = parts.port or (443 if scheme == 'https' else 80)
+        target = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        host_header = host if parts.port is None else f"{host}:{port}"
+
+        key = (scheme, host, port)
+        connection = await self.pool.acquire(scheme, host, port)
+        reader, writer = connection
+        reusable = False
+        try:
+            writer.write(
+                f"GET {target} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {self.user_agent}\r\n"
+                f"Accept: text/html,application/xhtml+xml;q=0.9,*/*;q=0.5\r\nAccept-Encoding: gzip, deflate\r\n"
+                f"Connection: keep-alive\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("Connection closed before response")
+            status = int(status_line.split(None, 2)[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body, reusable = await self._read_body(reader, headers)
+        finally:
+            self.pool.release(key, connection, reusable)
+
+        encoding = headers.get('content-encoding', '').lower()
+        if encoding == 'gzip':
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+        return status, headers, body
+
+    async def _fetch_once(self, url: str) -> Tuple[int, str, str]:
+        """Follow redirects; returns (status, final url, decoded page)"""
+        current = url
+        for _ in range(self.max_redirects + 1):
+            status, headers, body = await asyncio.wait_for(self._request(current), self.timeout)
+            if status in REDIRECT_STATUSES and 'location' in headers:
+                current = urljoin(current, headers['location'])
+                continue
+            match = _CHARSET_RE.search(headers.get('content-type', ''))
+            charset = match.group(1) if match else 'utf-8'
+            try:
+                page = body.decode(charset, errors='replace')
+            except LookupError:
+                page = body.decode('utf-8', errors='replace')
+            return status, current, page
+        raise _HTTPError("Too many redirects")
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = (urlsplit(url).hostname or '').lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return limit
+
+    async def fetch(self, url: str) -> FetchResult:
+        """Fetch a URL (or read it from the cache) and extract its title and meta description"""
+        start = time.perf_counter()
+        if self.cache:
+            entry = self.cache.get(url)
+            if entry is not None:
+                return FetchResult(url, entry['final_url'], entry['status'], entry['title'],
+                                   entry['meta_description'], from_cache=True)
+
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.concurrency)
+        error = ""
+        status = 0
+        host_limit = self._host_limit(url)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # back off without holding slots that requests to other hosts could use
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            # host slot first: waiting on a busy host must not tie up a global slot
+            async with host_limit, self._global_limit:
+                try:
+                    status, final_url, page = await self._fetch_once(url)
+                except asyncio.TimeoutError:
+                    error = f"Timed out after {self.timeout}s"
+                    continue
+                except (OSError, ssl.SSLError, asyncio.IncompleteReadError, ValueError, IndexError,
+                        zlib.error, _HTTPError) as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if isinstance(e, _HTTPError):
+                        break
+                    continue
+            error = ""
+            if status in RETRY_STATUSES and attempt < self.retries:
+                continue
+            title, meta_description = extract_metadata(page)
+            result = FetchResult(url, final_url, status, title, meta_description,
+                                 elapsed=time.perf_counter() - start)
+            if self.cache and result.ok:
+                self.cache.put(url, {'final_url': final_url, 'status': status, 'title': title,
+                                     'meta_description': meta_description})
+            return result
+        return FetchResult(url, status=status, error=error or f"HTTP {status}", elapsed=time.perf_counter() - start)
+
+    async def fetch_all(self, urls: Iterable[str]) -> List[FetchResult]:
+        """Fetch many URLs concurrently; results keep the input order"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    async def populate(self, analyzer: SERPAnalyzer, serp: Iterable[Any]) -> List[FetchResult]:
+        """
+        Fetch each SERP result and add it to the analyzer.
+
+        serp holds URLs in ranking order, (url, position) pairs, or dicts with
+        'url' and optional 'position', 'domain' and 'snippet'. Failed fetches
+        are still added, with an empty title and meta description.
+        """
+        entries = []
+        for i, item in enumerate(serp, 1):
+            if isinstance(item, str):
+                item = {'url': item, 'position': i}
+            elif not isinstance(item, dict):
+                item = {'url': item[0], 'position': item[1]}
+            entries.append(item)
+
+        results = await self.fetch_all(entry['url'] for entry in entries)
+        for i, (entry, result) in enumerate(zip(entries, results), 1):
+            domain = entry.get('domain') or normalize_host(urlsplit(entry['url']).netloc)
+            analyzer.add_competitor(domain, entry['url'], entry.get('position', i), result.title,
+                                    result.meta_description, entry.get('snippet', ''))
+        return results
+
+
+def collect(keyword: str, serp: Iterable[Any], **fetcher_options) -> SERPAnalyzer:
+    """Blocking helper: build a SERPAnalyzer for a keyword from live competitor pages"""
+    async def run():
+        async with SERPFetcher(**fetcher_options) as fetcher:
+            analyzer = SERPAnalyzer(keyword)
+            await fetcher.populate(analyzer, serp)
+            return analyzer
+    return asyncio.run(run())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+SERP Rank History
+SQLite-backed store of analysis snapshots with indexed position, volatility and
+mover queries over time.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+
+DateLike = Union[str, datetime, None]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    captured_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rankings (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    keyword TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    url TEXT,
+    position INTEGER NOT NULL,
+    title TEXT,
+    meta_description TEXT,
+    snippet TEXT,
+    captured_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_keyword_date ON runs(keyword, captured_at);
+CREATE INDEX IF NOT EXISTS idx_rankings_keyword_domain_date ON rankings(keyword, domain, captured_at);
+CREATE INDEX IF NOT EXISTS idx_rankings_run ON rankings(run_id);
+"""
+
+
+_EARLIEST = "0000-00-00 00:00:00"
+_LATEST = "9999-12-31 23:59:59"
+
+
+def _date(value: DateLike) -> Optional[str]:
+    """Normalize a date bound to the analysis_date text format"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def _end_date(value: DateLike) -> str:
+    """Upper bound for a range; a bare 'YYYY-MM-DD' includes that whole day"""
+    value = _date(value)
+    if not value:
+        return _LATEST
+    return value + " 23:59:59" if len(value) == 10 else value
+
+
+class RankHistoryStore:
+    """Persistent history of SERP analyses in a local SQLite database"""
+
+    def __init__(self, path: str = "serp_history.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'RankHistoryStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _insert(self, analysis: Dict[str, Any], captured_at: Optional[str]) -> int:
+        keyword = analysis['keyword']
+        captured_at = captured_at or analysis.get('analysis_date') or _date(datetime.now())
+        run_id = self.conn.execute(
+            "INSERT INTO runs (keyword, captured_at) VALUES (?, ?)", (keyword, captured_at)).lastrowid
+        self.conn.executemany(
+            "INSERT INTO rankings (run_id, keyword, domain, url, position, title, meta_description, snippet, captured_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((run_id, keyword, c['domain'], c['url'], c['position'], c['title'],
+              c['meta_description'], c['snippet'], captured_at) for c in analysis['competitors']))
+        return run_id
+
+    def record(self, analysis: Any, captured_at: DateLike = None) -> Optional[int]:
+        """
+        Store a snapshot of one analysis run and return its run id.
+
+        Accepts a SERPAnalyzer or an analyze_rankings() result (e.g. from
+        SERPBatchAnalyzer); the run is dated with its analysis_date unless
+        captured_at is given. Error results are skipped.
+        """
+        if hasattr(analysis, 'analyze_rankings'):
+            analysis = analysis.analyze_rankings()
+        if 'competitors' not in analysis:
+            return None
+        with self.conn:
+            return self._insert(analysis, _date(captured_at))
+
+    def record_many(self, analyses: Iterable[Any], captured_at: DateLike = None) -> int:
+        """Store many analysis runs in a single transaction; returns how many were stored"""
+        stored = 0
+        with self.conn:
+            for analysis in analyses:
+                if hasattr(analysis, 'analyze_rankings'):
+                    analysis = analysis.analyze_rankings()
+                if 'competitors' in analysis:
+                    self._insert(analysis, _date(captured_at))
+                    stored += 1
+        return stored
+
+    def keywords(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT keyword FROM runs ORDER BY keyword")]
+
+    def runs(self, keyword: str) -> List[Tuple[int, str]]:
+        """(run id, captured_at) of every run for a keyword, oldest first"""
+        return self.conn.execute(
+            "SELECT id, captured_at FROM runs WHERE keyword = ? ORDER BY captured_at, id", (keyword,)).fetchall()
+
+    def trajectory(self, keyword: str, domain: str, start: DateLike = None, end: DateLike = None) -> List[Tuple[str, int]]:
+        """(captured_at, best position) of a domain for a keyword over time"""
+        return self.conn.execute(
+            "SELECT captured_at, MIN(position) FROM rankings "
+            "WHERE keyword = ? AND domain = ? AND captured_at >= ? AND captured_at <= ? "
+            "GROUP BY run_id ORDER BY captured_at",
+            (keyword, domain, _date(start) or _EARLIEST, _end_date(end))).fetchall()
+
+    def volatility(self, keyword: str, start: DateLike = None, end: DateLike = None,
+                   min_observations: int = 2) -> List[Dict[str, Any]]:
+        """Per-domain position spread for a keyword, most volatile first"""
+        rows = self.conn.execute(
+            "SELECT domain, COUNT(*), AVG(position), AVG(position * position), MIN(position), MAX(position) "
+            "FROM (SELECT domain, run_id, MIN(position) AS position FROM rankings "
+            "      WHERE keyword = ? AND captured_at >= ? AND captured_at <= ? GROUP BY domain, run_id) "
+            "GROUP BY domain HAVING COUNT(*) >= ?",
+            (keyword, _date(start) or _EARLIEST, _end_date(end), min_observations)).fetchall()
+        result = [{
+            'domain': domain,
+            'observations': n,
+            'average_position': mean,
+            'std_dev': max(mean_sq - mean * mean, 0.0) ** 0.5,
+            'best_position': best,
+            'worst_position': worst
+        } for domain, n, mean, mean_sq, best, worst in rows]
+        result.sort(key=lambda x: x['std_dev'], reverse=True)
+        return result
+
+    def _positions(self, run_id: int) -> Dict[str, int]:
+        return dict(self.conn.execute(
+            "SELECT domain, MIN(position) FROM rankings WHERE run_id = ? GROUP BY domain", (run_id,)))
+
+    def movers(self, keyword: str, start: DateLike = None, end: DateLike = None, limit: int = 10) -> Dict[str, Any]:
+        """
+        Compare the first and last run of a keyword within a date range.
+
+        Returns the biggest gainers and losers (change > 0 means the domain
+        moved up) and the domains that entered or dropped out.
+        """
+        bounds = self.conn.execute(
+            "SELECT MIN(captured_at), MAX(captured_at) FROM runs "
+            "WHERE keyword = ? AND captured_at >= ? AND captured_at <= ?",
+            (keyword, _date(start) or _EARLIEST, _end_date(end))).fetchone()
+        if bounds[0] is None:
+            return {'error': f"No runs for '{keyword}' in range"}
+        first_run = self.conn.execute(
+            "SELECT id FROM runs WHERE keyword = ? AND captured_at = ? ORDER BY id LIMIT 1",
+            (keyword, bounds[0])).fetchone()[0]
+        last_run = self.conn.execute(
+            "SELECT id FROM runs WHERE keyword = ? AND captured_at = ? ORDER BY id DESC LIMIT 1",
+            (keyword, bounds[1])).fetchone()[0]
+
+        before = self._positions(first_run)
+        after = self._positions(last_run)
+        changes = [{'domain': d, 'from': before[d], 'to': after[d], 'change': before[d] - after[d]}
+                   for d in before.keys() & after.keys() if before[d] != after[d]]
+        changes.sort(key=lambda x: x['change'], reverse=True)
+        return {
+            'keyword': keyword,
+            'from_date': bounds[0],
+            'to_date': bounds[1],
+            'improved': [c for c in changes if c['change'] > 0][:limit],
+            'declined': [c for c in reversed(changes) if c['change'] < 0][:limit],
+            'entered': sorted(after.keys() - before.keys()),
+            'dropped': sorted(before.keys() - after.keys())
+        }
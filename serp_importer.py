@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+SERP Bulk Importer
+Streams competitor rows out of CSV and JSON-lines SERP dumps and groups them by keyword.
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Tuple, Optional, TextIO
+
+from serp_analyzer import SERPAnalyzer
+from serp_batch import CompetitorRow, build_analyzer, competitor_row
+from serp_export import detect_compression, open_text
+
+
+def open_dump(path: str) -> TextIO:
+    """Open a dump for reading as text; '-' means stdin and .gz/.zst files are decompressed on the fly"""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    return open_text(path, 'r')
+
+
+def detect_format(path: str) -> str:
+    """Guess the dump format ('csv' or 'jsonl') from the file name"""
+    name = path.rsplit('.', 1)[0] if detect_compression(path) else path
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+# json.JSONDecodeError is a ValueError subclass
+_ROW_ERRORS = (KeyError, ValueError, TypeError, AttributeError)
+
+
+def _invalid_row(error: Exception, line: int) -> ValueError:
+    """ValueError naming the line of a malformed row, for strict imports"""
+    reason = f"missing {error}" if isinstance(error, KeyError) else str(error)
+    return ValueError(f"line {line}: invalid row: {reason}")
+
+
+def _row(record: Dict[str, Any], keyword: Optional[str]) -> Tuple[str, CompetitorRow]:
+    """Turn a raw record into (keyword, competitor row); derived *_length columns are ignored"""
+    record_keyword = record.get('keyword') or keyword or ''
+    if not isinstance(record_keyword, str):
+        raise TypeError(f"'keyword' must be a string, not {type(record_keyword).__name__}")
+    if record.get('url') is None:
+        # dumps may leave out the url; competitor_row() requires one
+        record = dict(record, url='')
+    return record_keyword, competitor_row(record)
+
+
+def iter_csv_rows(f: TextIO, keyword: Optional[str] = None,
+                  on_invalid: Optional[Callable[[Exception], None]] = None) -> Iterator[Tuple[str, CompetitorRow]]:
+    """
+    Read (keyword, row) pairs from a CSV dump.
+
+    Accepts the format written by SERPAnalyzer.export_to_csv(); a 'keyword' column
+    is used when present, otherwise every row belongs to the given keyword.
+    Malformed rows raise ValueError unless an on_invalid callback is given.
+    """
+    reader = csv.DictReader(f)
+    for record in reader:
+        try:
+            yield _row(record, keyword)
+        except _ROW_ERRORS as e:
+            if on_invalid is None:
+                raise _invalid_row(e, reader.line_num) from e
+            on_invalid(e)
+
+
+def iter_jsonl_rows(f: TextIO, keyword: Optional[str] = None,
+                    on_invalid: Optional[Callable[[Exception], None]] = None) -> Iterator[Tuple[str, CompetitorRow]]:
+    """
+    Read (keyword, row) pairs from a JSON-lines dump.
+
+    Each line is either a single competitor object or a whole keyword record
+    with a 'competitors' list (as in an analyze_rankings() result).
+    Malformed lines raise ValueError unless an on_invalid callback is given.
+    """
+    for number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            if 'competitors' in record:
+                record_keyword = record.get('keyword') or keyword
+                rows = [_row(competitor, record_keyword) for competitor in record['competitors']]
+            else:
+                rows = [_row(record, keyword)]
+        except _ROW_ERRORS as e:
+            if on_invalid is None:
+                raise _invalid_row(e, number) from e
+            on_invalid(e)
+            continue
+        yield from rows
+
+
+def group_by_keyword(rows: Iterable[Tuple[str, CompetitorRow]]) -> Iterator[Tuple[str, List[CompetitorRow]]]:
+    """
+    Group consecutive rows sharing a keyword.
+
+    Only one keyword's rows are held in memory at a time, so dumps should be
+    ordered (or at least clustered) by keyword; a keyword that reappears later
+    in the stream is yielded again as a separate group.
+    """
+    current = None
+    group: List[CompetitorRow] = []
+    for keyword, row in rows:
+        if keyword != current and group:
+            yield current, group
+            group = []
+        current = keyword
+        group.append(row)
+    if group:
+        yield current, group
+
+
+class SERPImporter:
+    """Stream keyword groups out of one or more SERP dump files"""
+
+    def __init__(self, paths: Iterable[str], fmt: Optional[str] = None, keyword: Optional[str] = None,
+                 skip_invalid: bool = True):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.fmt = fmt
+        self.keyword = keyword
+        self.skip_invalid = skip_invalid
+        self.rows = 0
+        self.keywords = 0
+        self.invalid_rows = 0
+        self.elapsed = 0.0
+
+    def _iter_file(self, path: str) -> Iterator[Tuple[str, CompetitorRow]]:
+        fmt = self.fmt or detect_format(path)
+        reader = iter_jsonl_rows if fmt == 'jsonl' else iter_csv_rows
+        on_invalid = self._count_invalid if self.skip_invalid else None
+        with open_dump(path) as f:
+            try:
+                for item in reader(f, self.keyword, on_invalid):
+                    self.rows += 1
+                    yield item
+            except ValueError as e:
+                # strict mode (or undecodable input): say which file it came from
+                raise ValueError(f"{'<stdin>' if path == '-' else path}: {e}") from e
+
+    def _count_invalid(self, error: Exception):
+        self.invalid_rows += 1
+
+    def iter_rows(self) -> Iterator[Tuple[str, CompetitorRow]]:
+        """Yield (keyword, row) pairs from every input file in turn"""
+        for path in self.paths:
+            yield from self._iter_file(path)
+
+    def __iter__(self) -> Iterator[Tuple[str, List[CompetitorRow]]]:
+        """Yield (keyword, rows) groups, ready for SERPBatchAnalyzer.iter_results()"""
+        start = time.perf_counter()
+        try:
+            for group in group_by_keyword(self.iter_rows()):
+                self.keywords += 1
+                yield group
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def iter_analyzers(self) -> Iterator[SERPAnalyzer]:
+        """Yield a populated SERPAnalyzer per keyword group"""
+        for keyword, rows in self:
+            yield build_analyzer(keyword, rows)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Import throughput counters"""
+        return {
+            'rows': self.rows,
+            'keywords': self.keywords,
+            'invalid_rows': self.invalid_rows,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1)
+        }
+
+
+def main():
+    """Import dumps given on the command line and report throughput"""
+    paths = sys.argv[1:] or ['-']
+    importer = SERPImporter(paths)
+    for _ in importer:
+        pass
+    stats = importer.stats()
+    print(f"Imported {stats['rows']} rows for {stats['keywords']} keywords "
+          f"in {stats['elapsed_seconds']}s ({stats['rows_per_second']} rows/s, "
+          f"{stats['invalid_rows']} invalid)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+SERP Keyword Matcher
+Aho-Corasick automaton that finds every tracked keyword (and its variants) in a text
+in a single pass, for cross-keyword presence analysis of titles and meta descriptions.
+"""
+
+import sys
+import time
+from collections import Counter, deque
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive multi-pattern substring matcher.
+
+    Each variant maps back to its canonical keyword, so find() reports tracked
+    keywords rather than the literal strings that matched. Matching follows the
+    same substring semantics as SERPAnalyzer's keyword_presence.
+    """
+
+    def __init__(self, keywords: Iterable[str], variants: Optional[Mapping[str, Iterable[str]]] = None):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+
+        keyword_ids: Dict[str, int] = {}
+        for keyword in keywords:
+            if keyword not in keyword_ids:
+                keyword_ids[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+            self._add_pattern(keyword, keyword_ids[keyword])
+        for keyword, alternatives in (variants or {}).items():
+            if keyword not in keyword_ids:
+                keyword_ids[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+            for alternative in alternatives:
+                self._add_pattern(alternative, keyword_ids[keyword])
+        self._build()
+
+    def _add_pattern(self, pattern: str, keyword_id: int):
+        pattern = pattern.lower()
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._outputs.append(())
+            state = next_state
+        if keyword_id not in self._outputs[state]:
+            self._outputs[state] += (keyword_id,)
+
+    def _build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        goto = self._goto
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in goto[state].items():
+                queue.append(child)
+                if not state:
+                    continue
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                inherited = self._outputs[fail[child]]
+                if inherited:
+                    self._outputs[child] += tuple(k for k in inherited if k not in self._outputs[child])
+        self._fail = fail
+
+    def find_ids(self, text: str) -> Set[int]:
+        """Ids (indices into self.keywords) of keywords occurring in text"""
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for ch in text.lower():
+            next_state = goto[state].get(ch)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(ch)
+            state = next_state or 0
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def find(self, text: str) -> Set[str]:
+        """Tracked keywords occurring in text"""
+        keywords = self.keywords
+        return {keywords[i] for i in self.find_ids(text)}
+
+    def count(self, texts: Iterable[str]) -> Counter:
+        """Number of texts each keyword occurs in"""
+        counts = Counter()
+        keywords = self.keywords
+        for text in texts:
+            if text:
+                counts.update(keywords[i] for i in self.find_ids(text))
+        return counts
+
+
+def presence_report(analyses: Iterable[Dict[str, Any]], keywords: Optional[Iterable[str]] = None,
+                    variants: Optional[Mapping[str, Iterable[str]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Cross-keyword presence for many analyze_rankings() results.
+
+    For each analyzed keyword reports how many titles and meta descriptions
+    mention each tracked keyword, plus the pages that also match other tracked
+    keywords (cross-ranking candidates). The tracked set defaults to the
+    analyzed keywords.
+    """
+    if keywords is None:
+        analyses = [a for a in analyses if 'competitors' in a]
+        keywords = [a['keyword'] for a in analyses]
+    matcher = KeywordMatcher(keywords, variants)
+
+    report = {}
+    for analysis in analyses:
+        if 'competitors' not in analysis:
+            continue
+        own = analysis['keyword']
+        title_counts = Counter()
+        meta_counts = Counter()
+        cross_ranking = []
+        for competitor in analysis['competitors']:
+            in_title = matcher.find(competitor['title']) if competitor['title'] else set()
+            in_meta = matcher.find(competitor['meta_description']) if competitor['meta_description'] else set()
+            title_counts.update(in_title)
+            meta_counts.update(in_meta)
+            others = (in_title | in_meta) - {own}
+            if others:
+                cross_ranking.append({
+                    'position': competitor['position'],
+                    'domain': competitor['domain'],
+                    'url': competitor['url'],
+                    'matched_keywords': sorted(others)
+                })
+        report[own] = {
+            'title_presence': dict(title_counts.most_common()),
+            'meta_presence': dict(meta_counts.most_common()),
+            'cross_ranking_pages': cross_ranking
+        }
+    return report
+
+
+def benchmark(num_keywords: int = 2000, num_texts: int = 5000) -> Dict[str, Any]:
+    """Time the automaton against testing every keyword with a substring check"""
+    import random
+
+    rng = random.Random(42)
+    vocabulary = [f"term{i}" for i in range(num_keywords * 2)]
+    keywords = list(dict.fromkeys(f"{rng.choice(vocabulary)} {rng.choice(vocabulary)}"
+                                  for _ in range(num_keywords)))
+    texts = [" ".join(rng.choice(vocabulary) for _ in range(10)) for _ in range(num_texts)]
+
+    start = time.perf_counter()
+    naive = Counter()
+    for text in texts:
+        lowered = text.lower()
+        naive.update(k for k in keywords if k.lower() in lowered)
+    naive_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    build_seconds = time.perf_counter() - start
+    automaton = matcher.count(texts)
+    automaton_seconds = time.perf_counter() - start
+
+    assert naive == automaton
+    return {
+        'keywords': len(keywords),
+        'texts': num_texts,
+        'naive_seconds': round(naive_seconds, 4),
+        'automaton_seconds': round(automaton_seconds, 4),
+        'build_seconds': round(build_seconds, 4),
+        'speedup': round(naive_seconds / automaton_seconds, 1)
+    }
+
+
+if __name__ == "__main__":
+    num_keywords = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    num_texts = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    result = benchmark(num_keywords, num_texts)
+    print(f"{result['keywords']} keywords x {result['texts']} texts")
+    print(f"Naive substring loop: {result['naive_seconds']}s")
+    print(f"Aho-Corasick:         {result['automaton_seconds']}s (build {result['build_seconds']}s)")
+    print(f"Speedup:              {result['speedup']}x")
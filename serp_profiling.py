@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+SERP Stage Profiling
+Opt-in per-stage instrumentation for SERPAnalyzer: wall time, call counts and (optionally)
+tracemalloc allocations per analysis stage, exported as JSON or collapsed stacks for flame graphs.
+"""
+
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+# stage path -> [calls, total_ns, max_ns, allocated_bytes, peak_bytes]
+Stats = Dict[Tuple[str, ...], List[int]]
+
+# threading, tracemalloc and json are imported by the code that needs them: SERPAnalyzer
+# imports this module for NULL_PROFILER, and that must not slow down every import
+
+_CALLS, _TOTAL, _MAX, _ALLOCATED, _PEAK = range(5)
+
+
+class _NullStage:
+    """Shared do-nothing context manager returned while profiling is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """Profiler stand-in whose stages cost one method call; the analyzer default"""
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'stack', 'start', 'memory', 'child_peak')
+
+    def __init__(self, profiler: 'StageProfiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        stack = self.stack = profiler._stack()
+        stack.append(self.name)
+        if profiler.trace_memory:
+            self._enter_memory()
+        else:
+            self.memory = None
+        self.start = time.perf_counter_ns()
+        return self
+
+    def _enter_memory(self):
+        import tracemalloc
+        self.memory = None
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self.memory = current
+        self.child_peak = 0
+        frames = self.profiler._frames()
+        if frames:
+            # resetting the peak below would lose the enclosing stage's high-water mark
+            frames[-1].child_peak = max(frames[-1].child_peak, peak)
+        tracemalloc.reset_peak()
+        frames.append(self)
+
+    def _exit_memory(self) -> Tuple[int, int]:
+        import tracemalloc
+        current, traced_peak = tracemalloc.get_traced_memory()
+        frames = self.profiler._frames()
+        frames.pop()
+        traced_peak = max(traced_peak, self.child_peak)
+        if frames:
+            frames[-1].child_peak = max(frames[-1].child_peak, traced_peak)
+        return current - self.memory, traced_peak - self.memory
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.start
+        stack = self.stack
+        path = tuple(stack)
+        stack.pop()
+        allocated = peak = 0
+        if self.memory is not None:
+            allocated, peak = self._exit_memory()
+        profiler = self.profiler
+        with profiler._lock:
+            entry = profiler.stats.get(path)
+            if entry is None:
+                profiler.stats[path] = [1, elapsed, elapsed, allocated, peak]
+            else:
+                entry[_CALLS] += 1
+                entry[_TOTAL] += elapsed
+                if elapsed > entry[_MAX]:
+                    entry[_MAX] = elapsed
+                if self.memory is not None:
+                    entry[_ALLOCATED] += allocated
+                    if peak > entry[_PEAK]:
+                        entry[_PEAK] = peak
+        return False
+
+
+class StageProfiler:
+    """
+    Accumulates wall time and call counts per named stage.
+
+    Stages nest: a stage entered inside another is recorded under the path
+    of both ("analyze_rankings;title_analysis"), which is what flame graphs
+    expect. Timing costs two perf_counter_ns() calls and a dict update per
+    stage, so it can stay on in production. With trace_memory=True,
+    tracemalloc is started (if it is not already) and each stage also
+    records its net allocated bytes and peak usage above its starting point;
+    that is much slower and meant for investigations.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        import threading
+        self.trace_memory = trace_memory
+        self.stats: Stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracing = False
+        if trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+
+    def __getstate__(self):
+        # worker processes ship profilers back to the parent; locks don't pickle
+        return {'trace_memory': self.trace_memory, 'stats': self.stats}
+
+    def __setstate__(self, state):
+        import threading
+        self.trace_memory = state['trace_memory']
+        self.stats = state['stats']
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracing = False
+
+    def _stack(self) -> List[str]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def _frames(self) -> List[_Stage]:
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def stage(self, name: str) -> _Stage:
+        """Context manager timing one run of a stage"""
+        return _Stage(self, name)
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+
+    def close(self):
+        """Stop tracemalloc if this profiler started it"""
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def merge(self, other: Union['StageProfiler', Stats]) -> 'StageProfiler':
+        """Add another profiler's counts (e.g. from a worker process) into this one and return self"""
+        stats = other.stats if isinstance(other, StageProfiler) else other
+        with self._lock:
+            for path, values in stats.items():
+                entry = self.stats.get(path)
+                if entry is None:
+                    self.stats[path] = list(values)
+                    continue
+                entry[_CALLS] += values[_CALLS]
+                entry[_TOTAL] += values[_TOTAL]
+                entry[_MAX] = max(entry[_MAX], values[_MAX])
+                entry[_ALLOCATED] += values[_ALLOCATED]
+                entry[_PEAK] = max(entry[_PEAK], values[_PEAK])
+        return self
+
+    def _self_values(self, stats: Stats, index: int) -> Dict[Tuple[str, ...], int]:
+        """Totals minus the totals of direct child stages"""
+        own = {path: values[index] for path, values in stats.items()}
+        for path, values in stats.items():
+            parent = path[:-1]
+            if parent in own:
+                own[parent] -= values[index]
+        return own
+
+    def report(self) -> Dict[str, Any]:
+        """Per-stage summary, slowest first"""
+        with self._lock:
+            stats = {path: list(values) for path, values in self.stats.items()}
+        self_time = self._self_values(stats, _TOTAL)
+        stages = []
+        for path, (calls, total, maximum, allocated, peak) in stats.items():
+            stage = {
+                'stage': ';'.join(path),
+                'calls': calls,
+                'total_seconds': round(total / 1e9, 6),
+                'self_seconds': round(max(self_time[path], 0) / 1e9, 6),
+                'mean_seconds': round(total / calls / 1e9, 9),
+                'max_seconds': round(maximum / 1e9, 6)
+            }
+            if self.trace_memory:
+                stage['allocated_bytes'] = allocated
+                stage['peak_bytes'] = peak
+            stages.append(stage)
+        stages.sort(key=lambda s: s['total_seconds'], reverse=True)
+        return {'trace_memory': self.trace_memory, 'stages': stages}
+
+    def to_json(self, filename: Optional[str] = None) -> str:
+        """JSON report; also written to filename when given"""
+        import json
+        text = json.dumps(self.report(), indent=2)
+        if filename:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        return text
+
+    def to_collapsed(self, filename: Optional[str] = None, metric: str = 'time') -> str:
+        """
+        Collapsed stacks ("a;b;c value" per line) for flamegraph.pl or speedscope.
+
+        metric is 'time' (self microseconds), 'calls', or 'memory' (self
+        allocated bytes; needs trace_memory=True).
+        """
+        index = {'time': _TOTAL, 'calls': _CALLS, 'memory': _ALLOCATED}.get(metric)
+        if index is None:
+            raise ValueError(f"Unknown metric: {metric}")
+        with self._lock:
+            stats = {path: list(values) for path, values in self.stats.items()}
+        values = {path: v[_CALLS] for path, v in stats.items()} if index == _CALLS else self._self_values(stats, index)
+        lines = []
+        for path in sorted(values):
+            value = values[path] // 1000 if index == _TOTAL else values[path]
+            if value > 0:
+                lines.append(f"{';'.join(path)} {value}")
+        text = '\n'.join(lines) + ('\n' if lines else '')
+        if filename:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+SERP Analysis Service
+Small HTTP/JSON server exposing SERPAnalyzer.analyze_rankings() to the dashboards, with a
+bounded worker pool and an LRU result cache keyed by a hash of the competitor set.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Deque, Dict, Any, Iterable, Optional, Tuple, Union
+
+from serp_batch import CompetitorRow, build_analyzer, competitor_row
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+class ServiceError(Exception):
+    """Request failure carrying the HTTP status to answer with"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_request(payload: Any) -> Tuple[str, List[CompetitorRow]]:
+    """Validate a {"keyword": ..., "competitors": [...]} object into (keyword, rows)"""
+    if not isinstance(payload, dict):
+        raise ServiceError(400, "Expected a JSON object with 'keyword' and 'competitors'")
+    keyword = payload.get('keyword')
+    competitors = payload.get('competitors')
+    if not isinstance(keyword, str) or not keyword.strip():
+        raise ServiceError(400, "'keyword' must be a non-empty string")
+    if not isinstance(competitors, list):
+        raise ServiceError(400, "'competitors' must be a list")
+    rows = []
+    for i, competitor in enumerate(competitors):
+        if not isinstance(competitor, dict):
+            raise ServiceError(400, f"competitors[{i}]: expected an object")
+        try:
+            rows.append(competitor_row(competitor))
+        except KeyError as e:
+            raise ServiceError(400, f"competitors[{i}]: missing {e}") from None
+        except (ValueError, TypeError) as e:
+            raise ServiceError(400, f"competitors[{i}]: {e}") from None
+    return keyword, rows
+
+
+def _analyze(keyword: str, rows: List[CompetitorRow]) -> Dict[str, Any]:
+    """Worker entry point"""
+    analysis = build_analyzer(keyword, rows).analyze_rankings()
+    analysis.setdefault('keyword', keyword)
+    return analysis
+
+
+def content_hash(keyword: str, rows: List[CompetitorRow]) -> str:
+    """sha256 of the canonical JSON form of a competitor set"""
+    canonical = json.dumps([keyword, rows], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache of encoded results"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._items: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: str) -> Optional[bytes]:
+        """Cached value without counting a hit or miss or refreshing its recency"""
+        with self._lock:
+            return self._items.get(key)
+
+    def put(self, key: str, value: bytes):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._items), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+class AnalysisService:
+    """
+    Runs analyses on a bounded process pool behind an LRU cache.
+
+    At most max_pending distinct analyses are queued or running; further
+    requests are rejected (HTTP 503) instead of piling up. Identical requests
+    arriving while an analysis is in flight share its result. Cached results
+    keep the analysis_date of the run that produced them.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 cache_size: int = 1024, timeout: float = 30.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.timeout = timeout
+        self.cache = LRUCache(cache_size)
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def _submit(self, key: str, keyword: str, rows: List[CompetitorRow]) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if not self._slots.acquire(blocking=False):
+                self.rejected += 1
+                raise ServiceError(503, "Server busy, retry later")
+            try:
+                future = self._executor.submit(_analyze, keyword, rows)
+            except BaseException:
+                self._slots.release()
+                raise
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: Future):
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, _encode(future.result()).encode('utf-8'))
+            self.completed += 1
+        with self._lock:
+            self._inflight.pop(key, None)
+        self._slots.release()
+
+    def _start(self, keyword: str, rows: List[CompetitorRow]) -> Tuple[str, Union[bytes, Future]]:
+        """(cache key, cached result or the future computing it)"""
+        key = content_hash(keyword, rows)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return key, cached
+        return key, self._submit(key, keyword, rows)
+
+    def _collect(self, key: str, pending: Union[bytes, Future]) -> bytes:
+        if isinstance(pending, bytes):
+            return pending
+        try:
+            result = pending.result(self.timeout)
+        except FutureTimeout:
+            raise ServiceError(504, "Analysis timed out") from None
+        except Exception as e:
+            raise ServiceError(500, f"Analysis failed: {e}") from None
+        # the done-callback may not have cached it yet; encode directly rather than wait
+        return self.cache.peek(key) or _encode(result).encode('utf-8')
+
+    def analyze(self, keyword: str, rows: List[CompetitorRow]) -> bytes:
+        """JSON-encoded analyze_rankings() result for a competitor set"""
+        return self._collect(*self._start(keyword, rows))
+
+    def analyze_many(self, requests: Iterable[Tuple[str, List[CompetitorRow]]]) -> List[bytes]:
+        """
+        analyze() for many competitor sets, run in parallel.
+
+        Up to twice max_workers analyses of the batch are queued at once, so
+        every worker stays busy while at most half of the pending slots go to
+        a single batch.
+        """
+        window = max(1, min(self.max_workers * 2, self.max_pending // 2))
+        started: Deque[Tuple[str, Union[bytes, Future]]] = deque()
+        results = []
+        for keyword, rows in requests:
+            if len(started) >= window:
+                results.append(self._collect(*started.popleft()))
+            started.append(self._start(keyword, rows))
+        while started:
+            results.append(self._collect(*started.popleft()))
+        return results
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._inflight)
+        return {
+            'status': 'ok',
+            'workers': self.max_workers,
+            'pending': pending,
+            'max_pending': self.max_pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'cache': self.cache.stats()
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class SERPRequestHandler(BaseHTTPRequestHandler):
+    """POST /analyze with one competitor set (or a list of them), GET /health"""
+
+    server_version = 'SERPAnalyzer/1.0'
+    protocol_version = 'HTTP/1.1'
+    max_body_bytes = 10 * 1024 * 1024
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, extra_headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        # the dashboards are static pages served from elsewhere (or file://)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        headers = {'Retry-After': '1'} if status == 503 else None
+        self._send(status, _encode({'error': message}).encode('utf-8'), headers)
+
+    def _reject_unread(self, status: int, message: str):
+        # the request body is still unread and would be parsed as the next request on a keep-alive
+        # connection; sending Connection: close also sets close_connection
+        self._send(status, _encode({'error': message}).encode('utf-8'), {'Connection': 'close'})
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] == '/health':
+            self._send(200, _encode(self.service.health()).encode('utf-8'))
+        else:
+            self._reject_unread(404, f"Unknown path: {self.path}")
+
+    def do_POST(self):
+        if self.path.split('?', 1)[0] != '/analyze':
+            self._reject_unread(404, f"Unknown path: {self.path}")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > self.max_body_bytes:
+            self._reject_unread(413 if length > 0 else 400, "Missing or oversized request body")
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b'null')
+        except ValueError as e:
+            self._send_error(400, f"Invalid JSON: {e}")
+            return
+
+        try:
+            if isinstance(payload, list):
+                # a batch: parse everything first so a bad entry fails the request before any work
+                parsed = [parse_request(item) for item in payload]
+                body = b'[' + b','.join(self.service.analyze_many(parsed)) + b']'
+            else:
+                body = self.service.analyze(*parse_request(payload))
+        except ServiceError as e:
+            self._send_error(e.status, str(e))
+            return
+        self._send(200, body)
+
+
+def create_server(host: str = '127.0.0.1', port: int = 8765, service: Optional[AnalysisService] = None,
+                  quiet: bool = False) -> ThreadingHTTPServer:
+    """HTTP server bound to host:port; call serve_forever() to run it"""
+    server = ThreadingHTTPServer((host, port), SERPRequestHandler)
+    server.daemon_threads = True
+    server.service = service or AnalysisService()
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve SERP analyses over HTTP/JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="analysis processes (default: CPU count)")
+    parser.add_argument('--max-pending', type=int, default=None, help="queued analyses before answering 503")
+    parser.add_argument('--cache-size', type=int, default=1024, help="cached results (0 disables the cache)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for one analysis")
+    parser.add_argument('--quiet', action='store_true', help="don't log requests")
+    args = parser.parse_args()
+
+    service = AnalysisService(args.workers, args.max_pending, args.cache_size, args.timeout)
+    server = create_server(args.host, args.port, service, args.quiet)
+    print(f"Serving SERP analyses on http://{args.host}:{args.port} ({service.max_workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+SERP Sharded Runs
+Splits a keyword universe into shards by a stable keyword hash, aggregates each shard into a
+mergeable partial state (position, domain, word and length totals) written to a shared
+directory, and reduces the partials into one combined report identical to a single-node run.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import zlib
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from serp_analyzer import SERPAnalyzer
+from serp_batch import CompetitorRow, build_analyzer
+from serp_importer import SERPImporter
+from serp_stats import TextStats, int_mean
+
+PARTIAL_VERSION = 1
+_PARTIAL_RE = re.compile(r'partial-(\d+)-of-(\d+)\.json$')
+_BUCKETS = ('top_3', 'positions_4_6', 'positions_7_10')
+
+
+def shard_of(keyword: str, num_shards: int) -> int:
+    """Shard index of a keyword; crc32 is stable across processes and machines, unlike hash()"""
+    return zlib.crc32(keyword.encode('utf-8')) % num_shards
+
+
+def partial_filename(shard: int, num_shards: int) -> str:
+    return f"partial-{shard:05d}-of-{num_shards:05d}.json"
+
+
+def _top(counter: Counter, n: int) -> List[Tuple[str, int]]:
+    # ties broken by key, so the order does not depend on which shard saw an item first
+    return sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+
+class PartialReport:
+    """
+    Cross-keyword totals of a set of SERPs as an exactly mergeable state.
+
+    Every field is an integer count, sum, set or histogram, so merging
+    partials in any order and grouping gives the same state as aggregating
+    every keyword in one place; floats only appear in report().
+    """
+
+    def __init__(self):
+        self.keywords = set()
+        self.rows = 0
+        self.position_sum = 0
+        self.position_buckets = dict.fromkeys(_BUCKETS, 0)
+        self.positions = Counter()
+        self.titles = TextStats()
+        self.metas = TextStats()
+        self.title_words = Counter()
+        self.domains = Counter()
+        self.registrable_domains = Counter()
+        self.subdomains = 0
+        self.with_www = 0
+
+    def add_analyzer(self, analyzer: SERPAnalyzer):
+        """Fold in one keyword's analyzer (its running aggregates; no near-duplicate work)"""
+        totals = analyzer.aggregates()
+        if not isinstance(totals['title_words'], Counter):
+            raise ValueError("Sharded runs need exact word counts; use an analyzer without word_sketch")
+        self.keywords.add(analyzer.keyword)
+        self.rows += totals['rows']
+        self.position_sum += totals['position_sum']
+        for bucket, count in totals['position_buckets'].items():
+            self.position_buckets[bucket] += count
+        self.positions.update(totals['position_counts'])
+        self.titles.merge(totals['titles'])
+        self.metas.merge(totals['metas'])
+        self.title_words.update(totals['title_words'])
+        self.domains.update(totals['domains'])
+        self.registrable_domains.update(totals['registrable_domains'])
+        self.subdomains += totals['subdomains']
+        self.with_www += totals['with_www']
+
+    def add_keyword(self, keyword: str, rows: Iterable[CompetitorRow]):
+        self.add_analyzer(build_analyzer(keyword, rows))
+
+    def merge(self, other: 'PartialReport') -> 'PartialReport':
+        """Add another partial into this one and return self"""
+        self.keywords |= other.keywords
+        self.rows += other.rows
+        self.position_sum += other.position_sum
+        for bucket, count in other.position_buckets.items():
+            self.position_buckets[bucket] += count
+        self.positions.update(other.positions)
+        self.titles.merge(other.titles)
+        self.metas.merge(other.metas)
+        self.title_words.update(other.title_words)
+        self.domains.update(other.domains)
+        self.registrable_domains.update(other.registrable_domains)
+        self.subdomains += other.subdomains
+        self.with_www += other.with_www
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': PARTIAL_VERSION,
+            'keywords': sorted(self.keywords),
+            'rows': self.rows,
+            'position_sum': self.position_sum,
+            'position_buckets': self.position_buckets,
+            'positions': sorted(self.positions.items()),
+            'titles': self.titles.to_dict(),
+            'metas': self.metas.to_dict(),
+            'title_words': dict(self.title_words),
+            'domains': dict(self.domains),
+            'registrable_domains': dict(self.registrable_domains),
+            'subdomains': self.subdomains,
+            'with_www': self.with_www
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'PartialReport':
+        if state.get('version') != PARTIAL_VERSION:
+            raise ValueError(f"Unsupported partial version: {state.get('version')}")
+        partial = cls()
+        partial.keywords = set(state['keywords'])
+        partial.rows = state['rows']
+        partial.position_sum = state['position_sum']
+        partial.position_buckets.update(state['position_buckets'])
+        partial.positions = Counter({int(position): n for position, n in state['positions']})
+        partial.titles = TextStats.from_dict(state['titles'])
+        partial.metas = TextStats.from_dict(state['metas'])
+        partial.title_words = Counter(state['title_words'])
+        partial.domains = Counter(state['domains'])
+        partial.registrable_domains = Counter(state['registrable_domains'])
+        partial.subdomains = state['subdomains']
+        partial.with_www = state['with_www']
+        return partial
+
+    def save(self, path: str) -> str:
+        """Write the partial atomically, so a reducer never reads a half-written file"""
+        temporary = f"{path}.tmp{os.getpid()}"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporary, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'PartialReport':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def _text_report(self, stats: TextStats, name: str) -> Dict[str, Any]:
+        if not stats.count:
+            return {"error": f"No {name} to analyze"}
+        report = stats.summary()
+        report['keyword_presence'] = stats.keyword_presence()
+        return report
+
+    def report(self, top_n: int = 20) -> Dict[str, Any]:
+        """Combined cross-keyword report"""
+        if not self.rows:
+            return {"error": "No competitors added"}
+        title_analysis = self._text_report(self.titles, 'titles')
+        if 'error' not in title_analysis:
+            title_analysis['common_words'] = [f"{word} ({count})" for word, count in _top(self.title_words, top_n)]
+        return {
+            'keywords': len(self.keywords),
+            'total_competitors': self.rows,
+            'average_position': int_mean(self.position_sum, self.rows),
+            'position_distribution': dict(self.position_buckets),
+            'position_histogram': {str(position): n for position, n in sorted(self.positions.items())},
+            'title_analysis': title_analysis,
+            'meta_analysis': self._text_report(self.metas, 'meta descriptions'),
+            'domain_analysis': {
+                'subdomains': self.subdomains,
+                'with_www': self.with_www,
+                'unique_domains': len(self.domains),
+                'unique_registrable_domains': len(self.registrable_domains),
+                'top_domains': [{'domain': d, 'rows': n} for d, n in _top(self.registrable_domains, top_n)]
+            }
+        }
+
+
+def run_shard(groups: Iterable[Tuple[str, List[CompetitorRow]]], shard: int = 0, num_shards: int = 1,
+              reports=None) -> PartialReport:
+    """
+    Aggregate the keyword groups belonging to one shard.
+
+    Every shard reads the full input and keeps its own keywords, so nodes
+    need no coordination beyond agreeing on num_shards. With a reports
+    callable, each keyword's analyze_rankings() result is passed to it.
+    """
+    if not 0 <= shard < num_shards:
+        raise ValueError(f"shard must be in 0..{num_shards - 1}")
+    partial = PartialReport()
+    for keyword, rows in groups:
+        if shard_of(keyword, num_shards) != shard:
+            continue
+        analyzer = build_analyzer(keyword, rows)
+        partial.add_analyzer(analyzer)
+        if reports is not None:
+            reports(analyzer.analyze_rankings())
+    return partial
+
+
+def reduce_directory(directory: str) -> PartialReport:
+    """
+    Merge every partial in a directory.
+
+    Raises ValueError unless exactly one complete set of shards is present,
+    so a missing or stale node never silently changes the totals.
+    """
+    found: Dict[int, Dict[int, str]] = {}
+    for path in glob.glob(os.path.join(directory, 'partial-*-of-*.json')):
+        match = _PARTIAL_RE.search(os.path.basename(path))
+        if match:
+            found.setdefault(int(match.group(2)), {})[int(match.group(1))] = path
+    if not found:
+        raise ValueError(f"No partials in {directory}")
+    if len(found) > 1:
+        raise ValueError(f"Partials from runs with different shard counts: {sorted(found)}")
+    (num_shards, shards), = found.items()
+    missing = sorted(set(range(num_shards)) - set(shards))
+    if missing:
+        raise ValueError(f"Missing shards {missing} of {num_shards}")
+    merged = PartialReport()
+    for shard in range(num_shards):
+        merged.merge(PartialReport.load(shards[shard]))
+    return merged
+
+
+def _map(inputs: List[str], shard: int, num_shards: int, output_dir: str, fmt: Optional[str] = None,
+         keyword: Optional[str] = None, reports: bool = False) -> Dict[str, Any]:
+    """Run one shard over the inputs and write its partial (and optional reports) to output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    importer = SERPImporter(inputs, fmt=fmt, keyword=keyword)
+    if not reports:
+        partial = run_shard(importer, shard, num_shards)
+    else:
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        path = os.path.join(output_dir, f"reports-{shard:05d}-of-{num_shards:05d}.jsonl")
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            partial = run_shard(importer, shard, num_shards, lambda analysis: f.write(encode(analysis) + '\n'))
+        os.replace(path + '.tmp', path)
+    partial.save(os.path.join(output_dir, partial_filename(shard, num_shards)))
+    return {'shard': shard, 'keywords': len(partial.keywords), 'rows': partial.rows,
+            'invalid_rows': importer.invalid_rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded SERP batch runs with mergeable partial results")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_input_args(command):
+        command.add_argument('inputs', nargs='+', help="dump files (every shard reads all of them)")
+        command.add_argument('--num-shards', type=int, required=True)
+        command.add_argument('--output-dir', required=True, help="shared directory for partials")
+        command.add_argument('-f', '--format', choices=('csv', 'jsonl'))
+        command.add_argument('-k', '--keyword', help="keyword for rows without a keyword column")
+        command.add_argument('--reports', action='store_true', help="also write per-keyword reports (JSON lines)")
+
+    map_command = commands.add_parser('map', help="aggregate one shard (run one per node or process)")
+    add_input_args(map_command)
+    map_command.add_argument('--shard', type=int, required=True)
+    run_command = commands.add_parser('run', help="run every shard locally in parallel, then reduce")
+    add_input_args(run_command)
+    run_command.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1)
+    run_command.add_argument('-o', '--output', help="combined report file (default: stdout)")
+    reduce_command = commands.add_parser('reduce', help="merge the partials of a directory into one report")
+    reduce_command.add_argument('directory')
+    reduce_command.add_argument('-o', '--output', help="combined report file (default: stdout)")
+    for command in (run_command, reduce_command):
+        command.add_argument('--top', type=int, default=20, help="common words and top domains to list")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'map':
+            print(json.dumps(_map(args.inputs, args.shard, args.num_shards, args.output_dir,
+                                  args.format, args.keyword, args.reports)), file=sys.stderr)
+            return
+        if args.command == 'run':
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                futures = [executor.submit(_map, args.inputs, shard, args.num_shards, args.output_dir,
+                                           args.format, args.keyword, args.reports)
+                           for shard in range(args.num_shards)]
+                for future in futures:
+                    print(json.dumps(future.result()), file=sys.stderr)
+            directory = args.output_dir
+        else:
+            directory = args.directory
+        text = json.dumps(reduce_directory(directory).report(args.top), indent=2, ensure_ascii=False)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+SERP Word Sketches
+Fixed-memory approximate heavy-hitter counters (Space-Saving and Count-Min) for word
+counts over unbounded streams of SERP rows. Sketches built by parallel workers merge.
+"""
+
+import hashlib
+import heapq
+import math
+from array import array
+from typing import List, Dict, Iterable, Optional, Tuple
+
+_MASK32 = 0xFFFFFFFF
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary holding at most `capacity` counters.
+
+    When a new item arrives and the summary is full, the item with the
+    smallest count is replaced and the newcomer inherits that count as its
+    error. Every estimate overcounts by at most total / capacity, and any
+    item occurring more often than that is guaranteed to be present.
+    Has the same update()/most_common() interface as collections.Counter.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        # (count, item) lower bounds; each tracked item has exactly one entry
+        self._heap: List[Tuple[int, str]] = []
+
+    @classmethod
+    def from_error(cls, epsilon: float) -> 'SpaceSaving':
+        """Summary whose counts overestimate by at most epsilon * total"""
+        return cls(math.ceil(1 / epsilon))
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def error_bound(self) -> float:
+        """Maximum overestimate of any count"""
+        return self.total / self.capacity
+
+    def _pop_min(self) -> Tuple[int, str]:
+        """Remove and return the item with the smallest current count"""
+        heap = self._heap
+        counts = self.counts
+        while True:
+            count, item = heapq.heappop(heap)
+            current = counts[item]
+            if current == count:
+                return count, item
+            # stale entry from before the item was incremented
+            heapq.heappush(heap, (current, item))
+
+    def add(self, item: str, count: int = 1):
+        """Count one occurrence (or `count` occurrences) of an item"""
+        self.total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (count, item))
+            return
+        minimum, evicted = self._pop_min()
+        del counts[evicted]
+        del self.errors[evicted]
+        counts[item] = minimum + count
+        self.errors[item] = minimum
+        heapq.heappush(self._heap, (minimum + count, item))
+
+    def update(self, items: Iterable[str]):
+        """Count every item of an iterable once"""
+        add = self.add
+        for item in items:
+            add(item)
+
+    def estimate(self, item: str) -> int:
+        """Upper bound on an item's count (0 if it is not tracked)"""
+        return self.counts.get(item, 0)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Items with the highest estimated counts, like Counter.most_common()"""
+        items = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return items if n is None else items[:n]
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """
+        Fold another summary into this one and return self.
+
+        Items missing from a full summary may have occurred up to its minimum
+        count, so that minimum is added to their estimate and error; the
+        result keeps the same total / capacity error bound.
+        """
+        def floor(sketch):
+            return min(sketch.counts.values()) if len(sketch.counts) >= sketch.capacity else 0
+
+        own_floor, other_floor = floor(self), floor(other)
+        counts = {}
+        errors = {}
+        for item in self.counts.keys() | other.counts.keys():
+            counts[item] = self.counts.get(item, own_floor) + other.counts.get(item, other_floor)
+            errors[item] = self.errors.get(item, own_floor) + other.errors.get(item, other_floor)
+        if len(counts) > self.capacity:
+            counts = dict(heapq.nlargest(self.capacity, counts.items(), key=lambda kv: kv[1]))
+        self.counts = counts
+        self.errors = {item: errors[item] for item in counts}
+        self.total += other.total
+        self._heap = [(count, item) for item, count in counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch with a bounded candidate list for heavy hitters.
+
+    A depth x width table of counters; an item's estimate is the minimum of
+    its counters, which overestimates by at most epsilon * total with
+    probability 1 - delta (width = ceil(e / epsilon), depth = ceil(ln 1/delta)).
+    The `track` items with the highest estimates are kept to answer
+    most_common(). Hashes are stable across processes so sketches with the
+    same dimensions merge by adding their tables.
+    """
+
+    def __init__(self, width: int = 2719, depth: int = 5, track: int = 100):
+        self.width = width
+        self.depth = depth
+        self.track = track
+        self.total = 0
+        self.table = array('Q', bytes(8 * width * depth))
+        self.candidates: Dict[str, int] = {}
+        self._floor = 0
+
+    @classmethod
+    def from_error(cls, epsilon: float = 0.001, delta: float = 0.01, track: int = 100) -> 'CountMinSketch':
+        """Sketch overestimating by at most epsilon * total with probability 1 - delta"""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), track)
+
+    @property
+    def error_bound(self) -> float:
+        """Overestimate that holds with probability 1 - delta"""
+        return math.e / self.width * self.total
+
+    def _cells(self, item: str) -> List[int]:
+        # double hashing (h1 + i*h2) over one stable 64-bit digest
+        h = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+        h1, h2 = h & _MASK32, (h >> 32) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1):
+        """Count one occurrence (or `count` occurrences) of an item"""
+        self.total += count
+        table = self.table
+        estimate = None
+        for cell in self._cells(item):
+            value = table[cell] + count
+            table[cell] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        self._offer(item, estimate)
+
+    def _offer(self, item: str, estimate: int):
+        candidates = self.candidates
+        if item in candidates or len(candidates) < self.track:
+            candidates[item] = estimate
+            return
+        # candidate estimates only grow, so _floor is a lower bound on their minimum
+        if estimate <= self._floor:
+            return
+        weakest = min(candidates, key=candidates.get)
+        self._floor = candidates[weakest]
+        if estimate > self._floor:
+            del candidates[weakest]
+            candidates[item] = estimate
+
+    def update(self, items: Iterable[str]):
+        """Count every item of an iterable once"""
+        add = self.add
+        for item in items:
+            add(item)
+
+    def estimate(self, item: str) -> int:
+        """Upper bound on an item's count"""
+        table = self.table
+        return min(table[cell] for cell in self._cells(item))
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Tracked items with the highest estimated counts, like Counter.most_common()"""
+        items = sorted(self.candidates.items(), key=lambda kv: kv[1], reverse=True)
+        return items if n is None else items[:n]
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        """Add another sketch of the same dimensions into this one and return self"""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches must have the same width and depth to merge")
+        table = self.table
+        for i, value in enumerate(other.table):
+            if value:
+                table[i] += value
+        self.total += other.total
+        merged = {item: self.estimate(item) for item in self.candidates.keys() | other.candidates.keys()}
+        self.candidates = dict(heapq.nlargest(self.track, merged.items(), key=lambda kv: kv[1]))
+        self._floor = 0
+        return self
+
+
+def merge_all(sketches: Iterable):
+    """Merge sketches (e.g. one per worker) into the first one"""
+    merged = None
+    for sketch in sketches:
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged
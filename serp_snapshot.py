@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+SERP Binary Snapshots
+Compact binary snapshot of an analyzer's competitors - fixed-width numeric columns plus a
+deduplicated UTF-8 string table - opened through mmap so many processes share one file
+and only the pages of rows actually read are loaded.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import List, Dict, Any, Iterable, Mapping, Union
+
+from serp_storage import FIELDS, ColumnarCompetitorStore
+
+MAGIC = b'SERPSNAP'
+VERSION = 1
+
+# magic, version, reserved, rows, strings, keyword id, analysis_date id,
+# columns offset, string offsets offset, string data offset, string data size
+_HEADER = struct.Struct('<8sIIQQQQQQQQ')
+
+# fixed-width columns, in file order; text columns hold string table ids
+COLUMNS = (
+    ('position', 'i'),
+    ('domain', 'I'),
+    ('url', 'I'),
+    ('title', 'I'),
+    ('meta_description', 'I'),
+    ('snippet', 'I'),
+    ('title_length', 'I'),
+    ('meta_length', 'I'),
+    ('snippet_length', 'I'),
+)
+_TEXT_FIELDS = ('domain', 'url', 'title', 'meta_description', 'snippet')
+_LENGTH_FIELDS = {'title_length': 'title', 'meta_length': 'meta_description', 'snippet_length': 'snippet'}
+
+
+def _align(offset: int, size: int = 8) -> int:
+    return (offset + size - 1) // size * size
+
+
+def write_snapshot(filename: str, keyword: str, competitors: Iterable[Mapping[str, Any]],
+                   analysis_date: str = '') -> str:
+    """
+    Write competitor rows (dicts or CompetitorRecords) to a snapshot file.
+
+    Identical strings (domains, repeated titles and descriptions) are stored
+    once. The file is written to a temporary name and renamed into place, so
+    readers never map a half-written snapshot.
+    """
+    strings: Dict[str, int] = {}
+    blobs: List[bytes] = []
+
+    def string_id(text: str) -> int:
+        sid = strings.get(text)
+        if sid is None:
+            sid = strings[text] = len(blobs)
+            blobs.append(text.encode('utf-8'))
+        return sid
+
+    keyword_id = string_id(keyword)
+    date_id = string_id(analysis_date)
+    columns = {name: array(code) for name, code in COLUMNS}
+    for competitor in competitors:
+        columns['position'].append(competitor['position'])
+        for field in _TEXT_FIELDS:
+            columns[field].append(string_id(competitor.get(field) or ''))
+        for length_field, field in _LENGTH_FIELDS.items():
+            columns[length_field].append(len(competitor.get(field) or ''))
+
+    rows = len(columns['position'])
+    string_offsets = array('Q', [0])
+    total = 0
+    for blob in blobs:
+        total += len(blob)
+        string_offsets.append(total)
+    if sys.byteorder != 'little':
+        for column in columns.values():
+            column.byteswap()
+        string_offsets.byteswap()
+
+    columns_offset = _align(_HEADER.size)
+    offsets_offset = _align(columns_offset + 4 * rows * len(COLUMNS))
+    data_offset = offsets_offset + 8 * len(string_offsets)
+    header = _HEADER.pack(MAGIC, VERSION, 0, rows, len(blobs), keyword_id, date_id,
+                          columns_offset, offsets_offset, data_offset, total)
+
+    temporary = f"{filename}.tmp{os.getpid()}"
+    try:
+        with open(temporary, 'wb') as f:
+            f.write(header)
+            f.write(bytes(columns_offset - _HEADER.size))
+            for name, _ in COLUMNS:
+                columns[name].tofile(f)
+            f.write(bytes(offsets_offset - f.tell()))
+            string_offsets.tofile(f)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return filename
+
+
+class StringTable(Sequence):
+    """Strings of a snapshot, decoded from the mapped UTF-8 data on access"""
+
+    def __init__(self, offsets, data):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return str(self._data[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+
+class StringColumn(Sequence):
+    """One text column: string table ids resolved on access"""
+
+    def __init__(self, ids, strings: StringTable):
+        self._ids = ids
+        self._strings = strings
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._strings[i] for i in self._ids[index]]
+        return self._strings[self._ids[index]]
+
+    def __iter__(self):
+        strings = self._strings
+        return (strings[i] for i in self._ids)
+
+
+class SnapshotStore(ColumnarCompetitorStore):
+    """
+    Read-only ColumnarCompetitorStore backed by a memory-mapped snapshot.
+
+    Opening a snapshot only reads its header: numeric columns are zero-copy
+    memoryviews over the mapping and strings are decoded when a row is read,
+    so load time does not depend on file size and the OS page cache is shared
+    between every process mapping the same file. Use to_columnar() for a
+    writable in-memory copy.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self):
+        buffer = memoryview(self._mmap)
+        self._views = [buffer]
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"{self.filename}: not a SERP snapshot")
+        (magic, version, _, rows, num_strings, keyword_id, date_id, columns_offset,
+         offsets_offset, data_offset, data_size) = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{self.filename}: not a SERP snapshot")
+        if version != VERSION:
+            raise ValueError(f"{self.filename}: unsupported snapshot version {version}")
+        if (columns_offset + 4 * rows * len(COLUMNS) > offsets_offset
+                or offsets_offset + 8 * (num_strings + 1) > data_offset
+                or data_offset + data_size > len(buffer)):
+            raise ValueError(f"{self.filename}: truncated snapshot")
+
+        def column(offset: int, count: int, code: str):
+            view = buffer[offset:offset + count * array(code).itemsize]
+            if sys.byteorder != 'little':
+                # big-endian hosts pay for one copy per column
+                values = array(code, view.tobytes())
+                values.byteswap()
+                return values
+            view = view.cast(code)
+            self._views.append(view)
+            return view
+
+        offset = columns_offset
+        columns = {}
+        for name, code in COLUMNS:
+            columns[name] = column(offset, rows, code)
+            offset += 4 * rows
+        data = buffer[data_offset:data_offset + data_size]
+        self._views.append(data)
+        self.strings = StringTable(column(offsets_offset, num_strings + 1, 'Q'), data)
+
+        self.keyword = self.strings[keyword_id]
+        self.analysis_date = self.strings[date_id]
+        self.positions = columns['position']
+        self.domain_ids = columns['domain']
+        # domain ids index the shared string table rather than a per-store domain list
+        self.domains = self.strings
+        self.urls = StringColumn(columns['url'], self.strings)
+        self.titles = StringColumn(columns['title'], self.strings)
+        self.meta_descriptions = StringColumn(columns['meta_description'], self.strings)
+        self.snippets = StringColumn(columns['snippet'], self.strings)
+        self.title_lengths = columns['title_length']
+        self.meta_lengths = columns['meta_length']
+        self.snippet_lengths = columns['snippet_length']
+        self._getters = {
+            'domain': self.domain,
+            'url': self.urls.__getitem__,
+            'position': self.positions.__getitem__,
+            'title': self.titles.__getitem__,
+            'meta_description': self.meta_descriptions.__getitem__,
+            'snippet': self.snippets.__getitem__,
+            'title_length': self.title_lengths.__getitem__,
+            'meta_length': self.meta_lengths.__getitem__,
+            'snippet_length': self.snippet_lengths.__getitem__
+        }
+
+    def add(self, *args, **kwargs):
+        raise TypeError("Snapshot stores are read-only; use to_columnar() for a writable copy")
+
+    def append(self, competitor: Mapping):
+        self.add()
+
+    def row_dict(self, index: int) -> Dict[str, Any]:
+        return {
+            'domain': self.strings[self.domain_ids[index]],
+            'url': self.urls[index],
+            'position': self.positions[index],
+            'title': self.titles[index],
+            'meta_description': self.meta_descriptions[index],
+            'snippet': self.snippets[index],
+            'title_length': self.title_lengths[index],
+            'meta_length': self.meta_lengths[index],
+            'snippet_length': self.snippet_lengths[index]
+        }
+
+    def to_columnar(self) -> ColumnarCompetitorStore:
+        """Writable in-memory copy of every row"""
+        store = ColumnarCompetitorStore()
+        for i in range(len(self)):
+            row = self.row_dict(i)
+            store.add(*(row[field] for field in FIELDS[:6]))
+        return store
+
+    def close(self):
+        """Unmap the file; rows must not be read afterwards"""
+        for view in reversed(getattr(self, '_views', ())):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self) -> 'SnapshotStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_snapshot(filename: str) -> SnapshotStore:
+    """Memory-map a snapshot written by write_snapshot() / SERPAnalyzer.save_snapshot()"""
+    return SnapshotStore(filename)
+
+
+def benchmark(rows: int = 200000, filename: str = 'serp_snapshot_benchmark.snap') -> Dict[str, Any]:
+    """Compare reloading rows from a JSON export against opening a snapshot"""
+    import json
+    import time
+
+    competitors = []
+    for i in range(rows):
+        domain = f"site{i % 500}.example.com"
+        competitors.append({'domain': domain, 'url': f"https://{domain}/page/{i}", 'position': i % 10 + 1,
+                            'title': f"Title number {i % 5000} about the best laptops of the year",
+                            'meta_description': f"Meta description {i % 7000} describing the page in detail.",
+                            'snippet': f"Snippet {i} shown in the search results"})
+    json_name = filename + '.json'
+    try:
+        with open(json_name, 'w', encoding='utf-8') as f:
+            json.dump({'keyword': 'benchmark', 'competitors': competitors}, f)
+        write_snapshot(filename, 'benchmark', competitors)
+
+        start = time.perf_counter()
+        with open(json_name, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)['competitors']
+        json_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store = open_snapshot(filename)
+        open_seconds = time.perf_counter() - start
+        assert store.row_dict(rows - 1)['url'] == loaded[-1]['url']
+        store.close()
+        return {
+            'rows': rows,
+            'json_bytes': os.path.getsize(json_name),
+            'snapshot_bytes': os.path.getsize(filename),
+            'json_load_seconds': round(json_seconds, 4),
+            'snapshot_open_seconds': round(open_seconds, 6)
+        }
+    finally:
+        for name in (filename, json_name):
+            if os.path.exists(name):
+                os.remove(name)
+
+
+if __name__ == "__main__":
+    print(benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+SERP Statistics
+Length and position statistics (mean, spread, percentiles) for one or many keywords,
+with an optional NumPy path that processes whole batches as flat arrays.
+"""
+
+import math
+from collections import Counter
+from itertools import chain
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Sequence
+
+PERCENTILES = (25, 50, 75, 90)
+
+_numpy = None
+
+
+def numpy_available() -> bool:
+    """Import NumPy on first use; the module is optional"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy is not False
+
+
+def std_dev(count: int, total: int, total_sq: int) -> float:
+    """Population standard deviation from a count, sum and sum of squares of integers"""
+    # integer arithmetic keeps this exact until the final division
+    return math.sqrt(max(count * total_sq - total * total, 0)) / count
+
+
+def int_mean(total: int, count: int):
+    """Mean of integer values; same result as statistics.mean() without the Fraction arithmetic"""
+    return total // count if total % count == 0 else total / count
+
+
+def _interpolate(lower: float, upper: float, fraction: float) -> float:
+    return lower + (upper - lower) * fraction
+
+
+def percentiles(sorted_values: Sequence[float]) -> Dict[str, float]:
+    """Linear-interpolated percentiles (NumPy's default method) of sorted values"""
+    n = len(sorted_values)
+    result = {}
+    for p in PERCENTILES:
+        rank = (n - 1) * p / 100
+        lo = int(rank)
+        hi = min(lo + 1, n - 1)
+        result[f"p{p}"] = _interpolate(sorted_values[lo], sorted_values[hi], rank - lo)
+    return result
+
+
+def histogram_percentiles(histogram: Mapping[int, int], count: int) -> Dict[str, float]:
+    """Percentiles from a value -> occurrences histogram, without expanding it"""
+    items = sorted(histogram.items())
+
+    def value_at(k: int) -> int:
+        seen = 0
+        for value, n in items:
+            seen += n
+            if k < seen:
+                return value
+        return items[-1][0]
+
+    result = {}
+    for p in PERCENTILES:
+        rank = (count - 1) * p / 100
+        lo = int(rank)
+        hi = min(lo + 1, count - 1)
+        result[f"p{p}"] = _interpolate(value_at(lo), value_at(hi), rank - lo)
+    return result
+
+
+class TextStats:
+    """
+    Running length/keyword statistics for one text field.
+
+    Only integer counts, sums and a length histogram are kept, so states from
+    different keywords or machines merge exactly and the summary of a merged
+    state equals the summary of one state fed every text.
+    """
+    __slots__ = ('count', 'total', 'total_sq', 'minimum', 'maximum', 'keyword_hits', 'lengths')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.total_sq = 0
+        self.minimum = None
+        self.maximum = None
+        self.keyword_hits = 0
+        self.lengths = Counter()
+
+    def add(self, text: str, keyword: str):
+        length = len(text)
+        self.count += 1
+        self.total += length
+        self.total_sq += length * length
+        self.lengths[length] += 1
+        if self.minimum is None or length < self.minimum:
+            self.minimum = length
+        if self.maximum is None or length > self.maximum:
+            self.maximum = length
+        if keyword in text.lower():
+            self.keyword_hits += 1
+
+    def merge(self, other: 'TextStats') -> 'TextStats':
+        """Add another state into this one and return self"""
+        if not other.count:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.lengths.update(other.lengths)
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        self.keyword_hits += other.keyword_hits
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'average_length': int_mean(self.total, self.count),
+            'min_length': self.minimum,
+            'max_length': self.maximum,
+            'std_dev': std_dev(self.count, self.total, self.total_sq),
+            'length_percentiles': histogram_percentiles(self.lengths, self.count)
+        }
+
+    def keyword_presence(self) -> str:
+        return f"{self.keyword_hits}/{self.count} ({(self.keyword_hits/self.count*100):.1f}%)"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe state; the histogram is a list of [length, occurrences] pairs"""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'total_sq': self.total_sq,
+            'minimum': self.minimum,
+            'maximum': self.maximum,
+            'keyword_hits': self.keyword_hits,
+            'lengths': sorted(self.lengths.items())
+        }
+
+    @classmethod
+    def from_dict(cls, state: Mapping[str, Any]) -> 'TextStats':
+        stats = cls()
+        for name in ('count', 'total', 'total_sq', 'minimum', 'maximum', 'keyword_hits'):
+            setattr(stats, name, state[name])
+        stats.lengths = Counter({int(length): n for length, n in state['lengths']})
+        return stats
+
+
+def describe(values: Iterable[float]) -> Optional[Dict[str, Any]]:
+    """Count, mean, min, max, standard deviation and percentiles of a list of numbers"""
+    values = sorted(values)
+    if not values:
+        return None
+    n = len(values)
+    mean = sum(values) / n
+    return {
+        'count': n,
+        'mean': mean,
+        'min': values[0],
+        'max': values[-1],
+        'std_dev': math.sqrt(sum((v - mean) ** 2 for v in values) / n),
+        'percentiles': percentiles(values)
+    }
+
+
+def describe_columns(groups: Sequence[Sequence[float]]) -> Dict[str, Any]:
+    """
+    Statistics for many groups as NumPy columns (requires NumPy).
+
+    Returns 'group' (indices of the non-empty groups) plus one array per
+    statistic aligned with it. This skips building a dict per group, which
+    dominates the cost once the number crunching is vectorized.
+    """
+    if not numpy_available():
+        raise ImportError("NumPy is required for describe_columns()")
+    np = _numpy
+    counts = np.fromiter((len(g) for g in groups), dtype=np.int64, count=len(groups))
+    values = np.fromiter(chain.from_iterable(groups), dtype=np.float64, count=int(counts.sum()))
+
+    nonempty = np.flatnonzero(counts)
+    sizes = counts[nonempty]
+    columns = {'group': nonempty, 'count': sizes}
+    if not len(sizes):
+        return columns
+    # with empty groups dropped, segment starts are strictly increasing as reduceat requires
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    group_ids = np.repeat(np.arange(len(sizes)), sizes)
+
+    means = np.add.reduceat(values, starts) / sizes
+    deviations = (values - means[group_ids]) ** 2
+    columns['mean'] = means
+    columns['min'] = np.minimum.reduceat(values, starts)
+    columns['max'] = np.maximum.reduceat(values, starts)
+    columns['std_dev'] = np.sqrt(np.add.reduceat(deviations, starts) / sizes)
+
+    # one flat sort of (group, value) packed into a single key beats lexsort;
+    # exact for integer data such as lengths and positions
+    low = values.min()
+    span = values.max() - low + 1
+    ordered = np.sort(group_ids * span + (values - low)) - group_ids * span + low
+    for p in PERCENTILES:
+        rank = (sizes - 1) * (p / 100)
+        lo = np.floor(rank).astype(np.int64)
+        hi = np.minimum(lo + 1, sizes - 1)
+        lower = ordered[starts + lo]
+        upper = ordered[starts + hi]
+        columns[f"p{p}"] = lower + (upper - lower) * (rank - lo)
+    return columns
+
+
+def _describe_groups_numpy(groups: Sequence[Sequence[float]]) -> List[Optional[Dict[str, Any]]]:
+    columns = describe_columns(groups)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(groups)
+    if not len(columns['count']):
+        return results
+    # convert whole columns at once; per-element NumPy scalar access is slow
+    keys = [f"p{p}" for p in PERCENTILES]
+    pct_rows = zip(*[columns[key].tolist() for key in keys])
+    for i, size, mean, low, high, std, pct in zip(columns['group'].tolist(), columns['count'].tolist(),
+                                                  columns['mean'].tolist(), columns['min'].tolist(),
+                                                  columns['max'].tolist(), columns['std_dev'].tolist(), pct_rows):
+        results[i] = {
+            'count': size,
+            'mean': mean,
+            'min': low,
+            'max': high,
+            'std_dev': std,
+            'percentiles': dict(zip(keys, pct))
+        }
+    return results
+
+
+def describe_groups(groups: Sequence[Sequence[float]], use_numpy: Optional[bool] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    describe() for many groups at once.
+
+    With NumPy available (or use_numpy=True) all groups are flattened into one
+    array and reduced segment-wise; otherwise each group goes through describe().
+    Empty groups give None. Both paths agree within float tolerance.
+    """
+    if use_numpy is None:
+        use_numpy = numpy_available()
+    elif use_numpy and not numpy_available():
+        raise ImportError("NumPy is required for use_numpy=True")
+    if use_numpy:
+        return _describe_groups_numpy(groups)
+    return [describe(g) for g in groups]
+
+
+def _columns(analyzer) -> Dict[str, List[int]]:
+    """Position and non-empty title/meta length columns of an analyzer"""
+    competitors = analyzer.competitors
+    if hasattr(competitors, 'title_lengths'):
+        # snapshot stores keep lengths as columns, so no strings need decoding
+        return {
+            'position': competitors.positions,
+            'title_length': [n for n in competitors.title_lengths if n],
+            'meta_length': [n for n in competitors.meta_lengths if n]
+        }
+    if getattr(analyzer, 'columnar', False):
+        return {
+            'position': competitors.positions,
+            'title_length': [len(t) for t in competitors.titles if t],
+            'meta_length': [len(m) for m in competitors.meta_descriptions if m]
+        }
+    return {
+        'position': [c['position'] for c in competitors],
+        'title_length': [len(c['title']) for c in competitors if c['title']],
+        'meta_length': [len(c['meta_description']) for c in competitors if c['meta_description']]
+    }
+
+
+def keyword_statistics(analyzers: Iterable[Any], use_numpy: Optional[bool] = None) -> Dict[str, Dict[str, Any]]:
+    """Position, title length and meta length statistics for many SERPAnalyzers in one pass"""
+    analyzers = list(analyzers)
+    columns = [_columns(a) for a in analyzers]
+    result = {a.keyword: {} for a in analyzers}
+    for field in ('position', 'title_length', 'meta_length'):
+        stats = describe_groups([c[field] for c in columns], use_numpy)
+        for analyzer, field_stats in zip(analyzers, stats):
+            result[analyzer.keyword][field] = field_stats
+    return result
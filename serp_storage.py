@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Columnar Competitor Storage
+Compact storage for large numbers of SERP rows: numeric columns in arrays, interned
+domains, and lightweight record views that still behave like the competitor dicts.
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import List, Dict, Any, Iterator, Union
+
+
+FIELDS = ('domain', 'url', 'position', 'title', 'meta_description', 'snippet',
+          'title_length', 'meta_length', 'snippet_length')
+
+
+class CompetitorRecord(Mapping):
+    """Read-only view of one row in a ColumnarCompetitorStore, usable wherever a competitor dict is"""
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: 'ColumnarCompetitorStore', index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            column = self._store._getters[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return column(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return f"CompetitorRecord({self.to_dict()!r})"
+
+    @property
+    def domain(self) -> str:
+        return self._store.domain(self._index)
+
+    @property
+    def url(self) -> str:
+        return self._store.urls[self._index]
+
+    @property
+    def position(self) -> int:
+        return self._store.positions[self._index]
+
+    @property
+    def title(self) -> str:
+        return self._store.titles[self._index]
+
+    @property
+    def meta_description(self) -> str:
+        return self._store.meta_descriptions[self._index]
+
+    @property
+    def snippet(self) -> str:
+        return self._store.snippets[self._index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the row as a plain competitor dict"""
+        return self._store.row_dict(self._index)
+
+
+class RecordSequence(Sequence):
+    """
+    Rows of a store in a given order, as CompetitorRecord views created on access.
+
+    Columnar analyses return their ranked competitors this way, so an analysis
+    holds one index per row instead of a dict per row.
+    """
+
+    def __init__(self, store: 'ColumnarCompetitorStore', indices: array):
+        self._store = store
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return RecordSequence(self._store, self._indices[index])
+        return CompetitorRecord(self._store, self._indices[index])
+
+    def __iter__(self) -> Iterator[CompetitorRecord]:
+        store = self._store
+        return (CompetitorRecord(store, i) for i in self._indices)
+
+    def __repr__(self) -> str:
+        return f"RecordSequence({len(self)} rows)"
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize every row as a plain competitor dict"""
+        row_dict = self._store.row_dict
+        return [row_dict(i) for i in self._indices]
+
+
+def json_default(value: Any) -> Any:
+    """json.dump(default=...) hook serializing CompetitorRecords and RecordSequences"""
+    if isinstance(value, RecordSequence):
+        return value.to_dicts()
+    if isinstance(value, CompetitorRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ColumnarCompetitorStore(Sequence):
+    """
+    Column-oriented container of competitor rows.
+
+    Positions and domain ids live in typed arrays, each distinct domain string is
+    stored once, and the derived *_length fields are computed on access instead
+    of being stored. Indexing returns CompetitorRecord views.
+    """
+
+    def __init__(self):
+        self.positions = array('i')
+        self.domain_ids = array('I')
+        self.domains: List[str] = []
+        self._domain_index: Dict[str, int] = {}
+        self.urls: List[str] = []
+        self.titles: List[str] = []
+        self.meta_descriptions: List[str] = []
+        self.snippets: List[str] = []
+        self._getters = {
+            'domain': self.domain,
+            'url': self.urls.__getitem__,
+            'position': self.positions.__getitem__,
+            'title': self.titles.__getitem__,
+            'meta_description': self.meta_descriptions.__getitem__,
+            'snippet': self.snippets.__getitem__,
+            'title_length': lambda i: len(self.titles[i]),
+            'meta_length': lambda i: len(self.meta_descriptions[i]),
+            'snippet_length': lambda i: len(self.snippets[i])
+        }
+
+    def add(self, domain: str, url: str, position: int, title: str = "",
+            meta_description: str = "", snippet: str = ""):
+        """Append one competitor row"""
+        domain_id = self._domain_index.get(domain)
+        if domain_id is None:
+            domain_id = self._domain_index[domain] = len(self.domains)
+            self.domains.append(sys.intern(domain))
+        self.domain_ids.append(domain_id)
+        self.positions.append(position)
+        self.urls.append(url)
+        self.titles.append(title)
+        self.meta_descriptions.append(meta_description)
+        self.snippets.append(snippet)
+
+    def append(self, competitor: Mapping):
+        """Append a competitor dict, for code written against the list-of-dicts layout"""
+        self.add(competitor['domain'], competitor['url'], competitor['position'],
+                 competitor.get('title', ''), competitor.get('meta_description', ''),
+                 competitor.get('snippet', ''))
+
+    def domain(self, index: int) -> str:
+        return self.domains[self.domain_ids[index]]
+
+    def row_dict(self, index: int) -> Dict[str, Any]:
+        """Build the competitor dict for a row, identical to what add_competitor() stores"""
+        title = self.titles[index]
+        meta_description = self.meta_descriptions[index]
+        snippet = self.snippets[index]
+        return {
+            'domain': self.domains[self.domain_ids[index]],
+            'url': self.urls[index],
+            'position': self.positions[index],
+            'title': title,
+            'meta_description': meta_description,
+            'snippet': snippet,
+            'title_length': len(title),
+            'meta_length': len(meta_description),
+            'snippet_length': len(snippet)
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [self.row_dict(i) for i in range(len(self))]
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [CompetitorRecord(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("competitor index out of range")
+        return CompetitorRecord(self, index)
+
+
+def benchmark_memory(rows: int = 100000) -> Dict[str, Any]:
+    """Compare traced memory of the list-of-dicts layout against the columnar store"""
+    import tracemalloc
+
+    domains = [f"site{i}.example.com" for i in range(500)]
+
+    def make_row(i: int):
+        return (domains[i % len(domains)], f"https://{domains[i % len(domains)]}/page/{i}", i % 10 + 1,
+                f"Title number {i} about the best laptops of the year",
+                f"Meta description {i} with a longer sentence describing the page content in detail.",
+                f"Snippet {i} shown in the search results")
+
+    def measure(columnar: bool):
+        from serp_analyzer import SERPAnalyzer
+        tracemalloc.start()
+        analyzer = SERPAnalyzer("benchmark", columnar=columnar)
+        for i in range(rows):
+            analyzer.add_competitor(*make_row(i))
+        loaded, _ = tracemalloc.get_traced_memory()
+        analyzer.analyze_rankings()
+        analyzed, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del analyzer
+        return loaded, analyzed
+
+    dict_bytes, dict_analyzed_bytes = measure(False)
+    columnar_bytes, columnar_analyzed_bytes = measure(True)
+    return {
+        'rows': rows,
+        'dict_bytes': dict_bytes,
+        'columnar_bytes': columnar_bytes,
+        'dict_bytes_per_row': round(dict_bytes / rows, 1),
+        'columnar_bytes_per_row': round(columnar_bytes / rows, 1),
+        'reduction': f"{(1 - columnar_bytes / dict_bytes) * 100:.1f}%",
+        'dict_analyzed_bytes': dict_analyzed_bytes,
+        'columnar_analyzed_bytes': columnar_analyzed_bytes,
+        'dict_analyzed_bytes_per_row': round(dict_analyzed_bytes / rows, 1),
+        'columnar_analyzed_bytes_per_row': round(columnar_analyzed_bytes / rows, 1),
+        'analyzed_reduction': f"{(1 - columnar_analyzed_bytes / dict_analyzed_bytes) * 100:.1f}%"
+    }
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    result = benchmark_memory(rows)
+    print(f"Rows: {result['rows']}")
+    print(f"List of dicts: {result['dict_bytes']:,} bytes ({result['dict_bytes_per_row']} per row)")
+    print(f"Columnar:      {result['columnar_bytes']:,} bytes ({result['columnar_bytes_per_row']} per row)")
+    print(f"Reduction:     {result['reduction']}")
+    print("After analyze_rankings():")
+    print(f"List of dicts: {result['dict_analyzed_bytes']:,} bytes ({result['dict_analyzed_bytes_per_row']} per row)")
+    print(f"Columnar:      {result['columnar_analyzed_bytes']:,} bytes "
+          f"({result['columnar_analyzed_bytes_per_row']} per row)")
+    print(f"Reduction:     {result['analyzed_reduction']}")
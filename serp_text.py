@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+SERP Text Processing
+Shared word tokenizer and an inverted word index across every analyzed keyword.
+"""
+
+import re
+import weakref
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Optional, Pattern, Set, Tuple
+
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+get had has have having her here hers him his how into its just more most my no nor not now
+of off on once only other our ours out over own same she should so some such than that the
+their them then there these they this those through too under until up very was we were
+what when where which while who whom why will with you your yours
+""".split())
+
+
+@lru_cache(maxsize=None)
+def word_pattern(min_length: int = 3) -> Pattern:
+    """Compiled pattern for words of at least min_length ASCII letters"""
+    return re.compile(r'\b[a-zA-Z]{%d,}\b' % min_length)
+
+
+class Tokenizer:
+    """Lowercasing word tokenizer with an optional stopword filter"""
+
+    def __init__(self, min_length: int = 3, stopwords: Optional[Iterable[str]] = None):
+        self.min_length = min_length
+        self.stopwords = frozenset(stopwords) if stopwords else frozenset()
+        self._findall = word_pattern(min_length).findall
+
+    def tokenize(self, text: str) -> List[str]:
+        """Words in text, lowercased, stopwords removed"""
+        words = self._findall(text.lower())
+        if self.stopwords:
+            stopwords = self.stopwords
+            return [w for w in words if w not in stopwords]
+        return words
+
+    __call__ = tokenize
+
+
+# Used by SERPAnalyzer's common_words; no stopword filtering to keep the report unchanged
+DEFAULT_TOKENIZER = Tokenizer()
+
+# (keyword, position, domain, field)
+Posting = Tuple[str, int, str, str]
+
+
+class WordIndex:
+    """
+    Inverted index of word -> competitors across all analyzed keywords.
+
+    Per (field, position) word counters are kept alongside the postings, so
+    questions like "which words dominate top-3 titles" are answered from at
+    most a handful of counters rather than by rescanning the corpus. Each word
+    is counted once per competitor text.
+    """
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None,
+                 fields: Tuple[str, ...] = ('title', 'meta_description', 'snippet')):
+        self.tokenizer = tokenizer or Tokenizer(stopwords=STOPWORDS)
+        self.fields = fields
+        self.postings: Dict[str, List[Posting]] = defaultdict(list)
+        self._position_counts: Dict[Tuple[str, int], Counter] = defaultdict(Counter)
+        self._keywords: Set[str] = set()
+        # analyzer -> rows indexed; several analyzers may share a keyword (e.g. daily runs)
+        self._indexed: 'weakref.WeakKeyDictionary[Any, int]' = weakref.WeakKeyDictionary()
+
+    def add(self, keyword: str, competitor: Dict[str, Any]):
+        """Index one competitor of a keyword"""
+        self._keywords.add(keyword)
+        position = competitor['position']
+        domain = competitor['domain']
+        for field in self.fields:
+            text = competitor.get(field)
+            if not text:
+                continue
+            words = set(self.tokenizer.tokenize(text))
+            self._position_counts[(field, position)].update(words)
+            posting = (keyword, position, domain, field)
+            for word in words:
+                self.postings[word].append(posting)
+
+    def add_analyzer(self, analyzer):
+        """Index a SERPAnalyzer's competitors; calling again only indexes rows added since"""
+        start = self._indexed.get(analyzer, 0)
+        for competitor in analyzer.competitors[start:]:
+            self.add(analyzer.keyword, competitor)
+        self._indexed[analyzer] = len(analyzer.competitors)
+
+    @property
+    def keywords(self) -> Set[str]:
+        return set(self._keywords)
+
+    def lookup(self, word: str) -> List[Posting]:
+        """All (keyword, position, domain, field) occurrences of a word"""
+        return self.postings.get(word.lower(), [])
+
+    def keywords_for(self, word: str) -> Set[str]:
+        """Keywords whose competitors use a word"""
+        return {posting[0] for posting in self.lookup(word)}
+
+    def top_words(self, n: int = 10, max_position: int = 3, field: str = 'title') -> List[Tuple[str, int]]:
+        """Most frequent words in a field among competitors ranked at or above max_position"""
+        counts = Counter()
+        for (counted_field, position), words in self._position_counts.items():
+            if counted_field == field and position <= max_position:
+                counts.update(words)
+        return counts.most_common(n)
@@ -0,0 +1,116 @@
+"""SERPAnalyzer's incremental aggregates against a from-scratch recomputation"""
+
+import random
+import re
+import unittest
+from collections import Counter
+
+from serp_analyzer import SERPAnalyzer
+
+WORDS = ['best', 'laptops', 'cheap', 'gaming', 'review', 'deals', 'top', 'of', '2024']
+
+
+def random_row(rng: random.Random):
+    title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 5)))
+    domain = rng.choice(['a.com', 'www.b.com', 'shop.c.co.uk', 'd.org'])
+    return (domain, f"https://{domain}/{rng.randrange(10 ** 6)}", rng.randint(1, 12), title.title(),
+            rng.choice(['', 'Best laptops reviewed', 'Deals']), '')
+
+
+def expected(keyword: str, rows):
+    """The parts of an analysis that depend on every row, computed the way the baseline did"""
+    ranked = sorted(rows, key=lambda row: row['position'])
+    titles = [row['title'].lower() for row in rows if row['title']]
+    words = Counter(word for title in titles for word in re.findall(r'\b[a-zA-Z]{3,}\b', title))
+    return {
+        'competitors': ranked,
+        'top_3_domains': [row['domain'] for row in ranked[:3]],
+        'keyword_presence': sum(keyword.lower() in title for title in titles),
+        'common_words': [f"{word} ({count})" for word, count in words.most_common(5)],
+    }
+
+
+def actual(analyzer: SERPAnalyzer):
+    analysis = analyzer.analyze_rankings()
+    titles = analysis['title_analysis']
+    return {
+        'competitors': [dict(competitor) for competitor in analysis['competitors']],
+        'top_3_domains': analysis['top_3_domains'],
+        'keyword_presence': int(titles['keyword_presence'].split('/')[0]) if 'keyword_presence' in titles else 0,
+        'common_words': titles.get('common_words', []),
+    }
+
+
+class IncrementalRankingTest(unittest.TestCase):
+
+    def check(self, analyzer: SERPAnalyzer):
+        rows = [dict(competitor) for competitor in analyzer.competitors]
+        self.assertEqual(actual(analyzer), expected(analyzer.keyword, rows))
+
+    def test_mixed_appends_match_a_stable_sort(self):
+        for columnar in (False, True):
+            for seed in range(5):
+                with self.subTest(columnar=columnar, seed=seed):
+                    rng = random.Random(seed)
+                    analyzer = SERPAnalyzer('best laptops', columnar=columnar)
+                    for step in range(40):
+                        # mostly a few rows at a time (placed directly), sometimes a bulk load (rebuilt)
+                        count = rng.choice([1, 1, 2, 3, rng.randint(20, 300)])
+                        for _ in range(count):
+                            row = random_row(rng)
+                            if rng.random() < 0.2:
+                                # rows appended behind the analyzer's back are picked up too
+                                if columnar:
+                                    analyzer.competitors.add(*row)
+                                else:
+                                    analyzer.competitors.append(dict(zip(
+                                        ('domain', 'url', 'position', 'title', 'meta_description', 'snippet'),
+                                        row)))
+                            else:
+                                analyzer.add_competitor(*row)
+                        if rng.random() < 0.1:
+                            analyzer.keyword = rng.choice(['best laptops', 'Cheap Deals', 'gaming'])
+                        if step % 3 == 0 or step == 39:
+                            self.check(analyzer)
+
+    def test_keyword_change_recomputes_presence(self):
+        analyzer = SERPAnalyzer('laptops')
+        analyzer.add_competitor('a.com', 'https://a.com/', 1, 'Best laptops')
+        analyzer.add_competitor('b.com', 'https://b.com/', 2, 'Cheap tablets')
+        self.assertEqual(analyzer.analyze_rankings()['title_analysis']['keyword_presence'], '1/2 (50.0%)')
+        analyzer.keyword = 'Tablets'
+        analysis = analyzer.analyze_rankings()
+        self.assertEqual(analysis['keyword'], 'Tablets')
+        self.assertEqual(analysis['title_analysis']['keyword_presence'], '1/2 (50.0%)')
+        analyzer.keyword = 'phones'
+        self.assertEqual(analyzer.analyze_rankings()['title_analysis']['keyword_presence'], '0/2 (0.0%)')
+
+    def test_cached_analysis_is_invalidated(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                analyzer = SERPAnalyzer('laptops', columnar=columnar)
+                self.assertEqual(analyzer.analyze_rankings(), {"error": "No competitors added"})
+                analyzer.add_competitor('b.com', 'https://b.com/', 2, 'Laptops')
+                first = analyzer.analyze_rankings()
+                self.assertIs(analyzer.analyze_rankings(), first)
+                analyzer.add_competitor('a.com', 'https://a.com/', 1, 'Best laptops')
+                second = analyzer.analyze_rankings()
+                self.assertIsNot(second, first)
+                self.assertEqual((first['total_competitors'], second['total_competitors']), (1, 2))
+                self.assertEqual(second['top_3_domains'], ['a.com', 'b.com'])
+                self.assertEqual(first['top_3_domains'], ['b.com'])
+                self.assertEqual(second['title_analysis']['common_words'], ['laptops (2)', 'best (1)'])
+
+    def test_replaced_competitor_list_is_reindexed(self):
+        analyzer = SERPAnalyzer('laptops')
+        for position in (3, 1, 2):
+            analyzer.add_competitor(f"site{position}.com", 'https://x/', position)
+        analyzer.analyze_rankings()
+        analyzer.competitors = analyzer.competitors[:1]
+        analysis = analyzer.analyze_rankings()
+        self.assertEqual((analysis['total_competitors'], analysis['top_3_domains']), (1, ['site3.com']))
+        self.assertEqual(analysis['position_distribution']['top_3'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Batch analysis across worker processes"""
+
+import unittest
+from collections import Counter
+from functools import partial
+
+from serp_batch import SERPBatchAnalyzer, build_analyzer
+from serp_benchmark import CorpusGenerator
+from serp_sketch import CountMinSketch, SpaceSaving, merge_all
+
+SKETCH = partial(CountMinSketch.from_error, 0.01, 0.05)
+
+
+def corpus():
+    return list(CorpusGenerator(seed=5, vocabulary_size=200, num_domains=40).serps(12, 10))
+
+
+class BatchTest(unittest.TestCase):
+
+    def test_parallel_results_match_in_process(self):
+        groups = corpus()
+        serial = SERPBatchAnalyzer(max_workers=1, chunk_size=4).iter_results(groups)
+        parallel = SERPBatchAnalyzer(max_workers=2, chunk_size=4).iter_results(groups)
+        strip = lambda analysis: {k: v for k, v in analysis.items() if k != 'analysis_date'}
+        by_keyword = lambda results: {a['keyword']: strip(a) for a in results}
+        self.assertEqual(by_keyword(parallel), by_keyword(serial))
+
+    def test_word_sketches_are_merged(self):
+        groups = corpus()
+        expected = merge_all(build_analyzer(keyword, rows, word_sketch=SKETCH).title_word_counts()
+                             for keyword, rows in groups)
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                batch = SERPBatchAnalyzer(max_workers=workers, chunk_size=5, word_sketch=SKETCH)
+                results = list(batch.iter_results(groups))
+                self.assertEqual(len(results), len(groups))
+                self.assertEqual(batch.word_counts.total, expected.total)
+                self.assertEqual(batch.word_counts.table, expected.table)
+
+    def test_space_saving_capacity(self):
+        groups = corpus()
+        exact = Counter()
+        for keyword, rows in groups:
+            exact.update(build_analyzer(keyword, rows).title_word_counts())
+        batch = SERPBatchAnalyzer(max_workers=2, chunk_size=3, word_sketch=1000)
+        for keyword, rows in groups:
+            batch.add_keyword(keyword, rows)
+        self.assertEqual(len(batch.analyze_all()), len(groups))
+        self.assertIsInstance(batch.word_counts, SpaceSaving)
+        # the capacity exceeds the vocabulary, so the counts are exact
+        self.assertEqual(dict(batch.word_counts.most_common()), dict(exact))
+
+    def test_word_counts_reset_per_run(self):
+        batch = SERPBatchAnalyzer(max_workers=1, word_sketch=SKETCH)
+        batch.add_competitor('laptops', 'a.com', 'https://a.com/', 1, 'Best laptops')
+        batch.analyze_all()
+        first = batch.word_counts.total
+        batch.analyze_all()
+        self.assertEqual(batch.word_counts.total, first)
+
+    def test_no_sketch_by_default(self):
+        batch = SERPBatchAnalyzer(max_workers=1)
+        batch.add_competitor('laptops', 'a.com', 'https://a.com/', 1, 'Best laptops')
+        batch.analyze_all()
+        self.assertIsNone(batch.word_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Command line runs over dump files"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from serp_cli import main
+
+CSV = ("keyword,domain,url,position,title\n"
+       "laptops,a.com,https://a.com/,1,Best laptops\n"
+       "laptops,b.com,https://b.com/,2,Cheap laptops\n"
+       "phones,c.com,https://c.com/,1,Phones\n"
+       "tablets,d.com,https://d.com/,1,Tablets\n")
+
+
+class CLITest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def run_cli(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            code = main(list(argv))
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_analyzes_every_keyword(self):
+        code, out, err = self.run_cli('-q', self.write('serps.csv', CSV))
+        self.assertEqual(code, 0)
+        reports = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([r['keyword'] for r in reports], ['laptops', 'phones', 'tablets'])
+        self.assertEqual(reports[0]['top_3_domains'], ['a.com', 'b.com'])
+
+    def test_strict_reports_malformed_rows(self):
+        missing = self.write('missing.csv', "keyword,url,position\nk,u,1\n")
+        wrong = self.write('wrong.jsonl', '{"keyword": "k", "domain": "a.com", "url": "u", "position": [1]}\n')
+        late = self.write('late.csv', CSV + "tablets,e.com,https://e.com/,second\n")
+        cases = [
+            (missing, (), "missing.csv: line 2: invalid row: missing 'domain'"),
+            (wrong, (), "wrong.jsonl: line 1: invalid row: 'position' must be an integer"),
+            # by then a worker pool is running
+            (late, ('--chunk-size', '1'), "late.csv: line 6: invalid row: invalid literal"),
+        ]
+        for path, extra, message in cases:
+            for workers in ('1', '4'):
+                with self.subTest(path=os.path.basename(path), workers=workers):
+                    code, _, err = self.run_cli('--strict', '-j', workers, *extra, path)
+                    self.assertEqual(code, 1)
+                    self.assertTrue(err.startswith('error: '), err)
+                    self.assertIn(message, err)
+
+    def test_skips_malformed_rows_by_default(self):
+        path = self.write('serps.csv', CSV + "tablets,e.com,https://e.com/,second\n")
+        code, out, err = self.run_cli(path)
+        self.assertEqual(code, 0)
+        self.assertEqual(len(out.splitlines()), 3)
+        self.assertIn('from 4 rows (1 invalid)', err)
+
+    def test_no_competitors_needs_json_output(self):
+        path = self.write('serps.csv', CSV)
+        code, _, err = self.run_cli('--no-competitors', '-o', os.path.join(self.directory, 'out.csv'), path)
+        self.assertEqual(code, 2)
+        self.assertIn('--no-competitors', err)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Public suffix trie and domain helpers"""
+
+import unittest
+
+from serp_analyzer import SERPAnalyzer
+from serp_domains import (DomainIndex, PublicSuffixList, clean_host, public_suffix, registrable_domain,
+                          split_domain)
+
+RULES = """
+// comment lines and blank lines are ignored
+
+com
+uk
+co.uk
+jp
+*.kawasaki.jp
+!city.kawasaki.jp
+*.ck
+!www.ck
+github.io
+"""
+
+
+class PublicSuffixListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.psl = PublicSuffixList(RULES.splitlines())
+
+    def test_counts_rules(self):
+        self.assertEqual(self.psl.size, 9)
+
+    def test_normal_rules(self):
+        self.assertEqual(self.psl.split('www.example.com'), ('www', 'example.com', 'com'))
+        self.assertEqual(self.psl.split('shop.example.co.uk'), ('shop', 'example.co.uk', 'co.uk'))
+        self.assertEqual(self.psl.split('example.uk'), ('', 'example.uk', 'uk'))
+
+    def test_longest_rule_wins(self):
+        self.assertEqual(self.psl.split('a.b.user.github.io'), ('a.b', 'user.github.io', 'github.io'))
+
+    def test_wildcard_and_exception_rules(self):
+        self.assertEqual(self.psl.split('shop.example.kawasaki.jp'),
+                         ('', 'shop.example.kawasaki.jp', 'example.kawasaki.jp'))
+        self.assertEqual(self.psl.split('www.city.kawasaki.jp'), ('www', 'city.kawasaki.jp', 'kawasaki.jp'))
+        self.assertEqual(self.psl.split('www.ck'), ('', 'www.ck', 'ck'))
+        self.assertEqual(self.psl.split('site.other.ck'), ('', 'site.other.ck', 'other.ck'))
+
+    def test_public_suffix_has_no_registrable_domain(self):
+        self.assertEqual(self.psl.split('co.uk'), ('', None, 'co.uk'))
+        self.assertEqual(self.psl.split('foo.kawasaki.jp'), ('', None, 'foo.kawasaki.jp'))
+
+    def test_unknown_tld_uses_implicit_rule(self):
+        self.assertEqual(self.psl.split('blog.example.unknowntld'),
+                         ('blog', 'example.unknowntld', 'unknowntld'))
+
+    def test_ip_addresses_are_kept_whole(self):
+        self.assertEqual(self.psl.split('192.168.0.1'), ('', '192.168.0.1', ''))
+        self.assertEqual(self.psl.split('[::1]:8080'), ('', '::1', ''))
+
+
+class DomainHelpersTest(unittest.TestCase):
+
+    def test_clean_host(self):
+        self.assertEqual(clean_host(' HTTPS://WWW.Example.COM.:443/path '), 'www.example.com')
+        self.assertEqual(clean_host('bücher.de'), 'xn--bcher-kva.de')
+
+    def test_bundled_list(self):
+        self.assertEqual(split_domain('www.bbc.co.uk'), ('www', 'bbc.co.uk', 'co.uk'))
+        self.assertEqual(registrable_domain('shop.example.com'), 'example.com')
+        self.assertEqual(public_suffix('example.co.uk'), 'co.uk')
+
+
+class DomainIndexTest(unittest.TestCase):
+
+    def test_share_of_voice_groups_by_registrable_domain(self):
+        index = DomainIndex()
+        index.add('laptops', 'www.example.com', 1)
+        index.add('laptops', 'blog.example.com', 3)
+        index.add('tablets', 'example.com', 2)
+        index.add('tablets', 'other.co.uk', 1)
+        self.assertEqual(index.keywords_for('example.com'), {'laptops': 1, 'tablets': 2})
+        self.assertEqual(index.top_domains(1)[0]['domain'], 'example.com')
+        share = index.share_of_voice('example.com')
+        self.assertEqual((share['keywords'], share['top_3'], share['average_position']), (2, 2, 1.5))
+        self.assertAlmostEqual(share['share_of_voice'], 0.43 / 0.71, places=4)
+
+    def test_add_analyzer_tracks_each_analyzer(self):
+        index = DomainIndex()
+        first = SERPAnalyzer('k')
+        first.add_competitor('a.com', 'https://a.com/', 1)
+        index.add_analyzer(first)
+        # another run for the same keyword must not be skipped
+        second = SERPAnalyzer('k')
+        second.add_competitor('a.com', 'https://a.com/', 2)
+        second.add_competitor('b.com', 'https://b.com/', 3)
+        index.add_analyzer(second)
+        self.assertEqual(index.share_of_voice('b.com')['keywords'], 1)
+        # only rows added since are indexed again
+        first.add_competitor('c.com', 'https://c.com/', 4)
+        index.add_analyzer(first)
+        index.add_analyzer(second)
+        self.assertEqual(index.keywords_for('a.com'), {'k': 1})
+        self.assertEqual(index.keywords_for('c.com'), {'k': 4})
+        self.assertEqual(index.keywords, {'k'})
+
+
+if __name__ == '__main__':
+    unittest.main()
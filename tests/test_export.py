@@ -0,0 +1,45 @@
+"""Batch writers and output format detection"""
+
+import os
+import tempfile
+import unittest
+
+from serp_analyzer import SERPAnalyzer
+from serp_export import CSVWriter, JSONLinesWriter, open_writer, writer_format
+from serp_importer import SERPImporter
+
+ROWS = [
+    ('a.com', 'https://a.com/', 1, 'Best laptops', 'Our picks', ''),
+    ('b.com', 'https://b.com/', 2, 'Laptops, "cheap"', '', 'snippet'),
+]
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.analyzer = SERPAnalyzer('laptops')
+        for row in ROWS:
+            self.analyzer.add_competitor(*row)
+
+    def test_writer_format(self):
+        names = ('a.jsonl', 'a.json', 'a.json.gz', 'a.ndjson.zst', 'a.parquet', 'a.arrow.gz', 'a.csv', 'a.txt')
+        self.assertEqual([writer_format(name) for name in names],
+                         ['jsonl', 'jsonl', 'jsonl', 'jsonl', 'columnar', 'columnar', 'csv', 'csv'])
+
+    def test_outputs_read_back_with_the_importer(self):
+        for name, writer_class in (('report.json', JSONLinesWriter), ('report.jsonl.gz', JSONLinesWriter),
+                                   ('report.csv', CSVWriter), ('report.csv.gz', CSVWriter)):
+            with self.subTest(output=name):
+                path = os.path.join(self.directory, name)
+                with open_writer(path) as writer:
+                    self.assertIsInstance(writer, writer_class)
+                    writer.write(self.analyzer)
+                    writer.write({'error': 'No competitors added', 'keyword': 'empty'})
+                self.assertEqual(list(SERPImporter(path)), [('laptops', ROWS)])
+
+
+if __name__ == '__main__':
+    unittest.main()
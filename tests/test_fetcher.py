@@ -0,0 +1,206 @@
+"""SERPFetcher against an in-process asyncio HTTP stub server"""
+
+import asyncio
+import gzip
+import time
+import unittest
+
+from serp_fetcher import SERPFetcher, extract_metadata
+
+PAGE = (b'<html><head><title>Best  Laptops &amp; More</title>'
+        b'<meta name="description" content="Our picks for 2024"></head><body></body></html>')
+
+
+class StubServer:
+    """Keep-alive HTTP/1.1 server whose behaviour is chosen by request path"""
+
+    def __init__(self):
+        self.requests = []
+        self.flaky_failures = 1
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()).strip():
+                    pass
+                path = request_line.split()[1].decode()
+                self.requests.append(path)
+                await self._respond(path, writer)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _response(status: str, body: bytes = b'', headers: str = '') -> bytes:
+        return (f"HTTP/1.1 {status}\r\nContent-Type: text/html; charset=utf-8\r\n{headers}"
+                f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+    async def _respond(self, path: str, writer: asyncio.StreamWriter):
+        if path == '/page':
+            writer.write(self._response('200 OK', PAGE))
+        elif path == '/redirect':
+            writer.write(self._response('302 Found', headers='Location: /page\r\n'))
+        elif path == '/flaky':
+            if self.flaky_failures:
+                self.flaky_failures -= 1
+                writer.write(self._response('503 Service Unavailable', b'busy'))
+            else:
+                writer.write(self._response('200 OK', PAGE))
+        elif path == '/gzip':
+            writer.write(self._response('200 OK', gzip.compress(PAGE), 'Content-Encoding: gzip\r\n'))
+        elif path == '/chunked':
+            chunks = [PAGE[:20], PAGE[20:70], PAGE[70:]]
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for chunk in chunks:
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            writer.write(b'0\r\n\r\n')
+        elif path == '/slow':
+            await asyncio.sleep(5)
+            writer.write(self._response('200 OK', PAGE))
+        else:
+            writer.write(self._response('404 Not Found'))
+
+
+class FetcherTest(unittest.TestCase):
+
+    def run_with_server(self, scenario, **options):
+        async def run():
+            server = StubServer()
+            base = await server.start()
+            try:
+                async with SERPFetcher(**options) as fetcher:
+                    return await scenario(fetcher, base, server)
+            finally:
+                await server.stop()
+        return asyncio.run(run())
+
+    def test_extracts_title_and_description(self):
+        async def scenario(fetcher, base, server):
+            return await fetcher.fetch(base + '/page')
+        result = self.run_with_server(scenario)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.title, 'Best Laptops & More')
+        self.assertEqual(result.meta_description, 'Our picks for 2024')
+
+    def test_follows_redirects(self):
+        async def scenario(fetcher, base, server):
+            return await fetcher.fetch(base + '/redirect'), base
+        result, base = self.run_with_server(scenario)
+        self.assertEqual(result.status, 200)
+        self.assertEqual(result.final_url, base + '/page')
+        self.assertEqual(result.title, 'Best Laptops & More')
+
+    def test_retries_transient_errors(self):
+        async def scenario(fetcher, base, server):
+            return await fetcher.fetch(base + '/flaky'), server.requests
+        result, requests = self.run_with_server(scenario, retries=2, backoff=0.01)
+        self.assertTrue(result.ok)
+        self.assertEqual(requests, ['/flaky', '/flaky'])
+
+    def test_gives_up_after_retries(self):
+        async def scenario(fetcher, base, server):
+            server.flaky_failures = 10
+            return await fetcher.fetch(base + '/flaky')
+        result = self.run_with_server(scenario, retries=1, backoff=0.01)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.status, 503)
+
+    def test_decodes_gzip_and_chunked_bodies(self):
+        async def scenario(fetcher, base, server):
+            return await fetcher.fetch_all([base + '/gzip', base + '/chunked'])
+        for result in self.run_with_server(scenario):
+            self.assertTrue(result.ok, result.error)
+            self.assertEqual(result.title, 'Best Laptops & More')
+
+    def test_times_out(self):
+        async def scenario(fetcher, base, server):
+            return await fetcher.fetch(base + '/slow')
+        result = self.run_with_server(scenario, timeout=0.1, retries=0)
+        self.assertFalse(result.ok)
+        self.assertIn('Timed out', result.error)
+
+    def test_reuses_connections(self):
+        async def scenario(fetcher, base, server):
+            for _ in range(3):
+                await fetcher.fetch(base + '/page')
+            return len(fetcher.pool._idle[('http', '127.0.0.1', int(base.rsplit(':', 1)[1]))])
+        self.assertEqual(self.run_with_server(scenario), 1)
+
+    def test_response_cache(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            async def scenario(fetcher, base, server):
+                first = await fetcher.fetch(base + '/page')
+                second = await fetcher.fetch(base + '/page')
+                return first, second, server.requests
+            first, second, requests = self.run_with_server(scenario, cache_dir=directory)
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.title, first.title)
+        self.assertEqual(requests, ['/page'])
+
+
+class _TimedFetcher(SERPFetcher):
+    """Fetcher whose requests take `delay` seconds and never touch the network"""
+
+    def __init__(self, delay: float, failures=(), **options):
+        super().__init__(**options)
+        self.delay = delay
+        self.failures = set(failures)
+        self.finished = []
+
+    async def _fetch_once(self, url: str):
+        await asyncio.sleep(self.delay)
+        if url in self.failures:
+            self.failures.discard(url)
+            return 503, url, ''
+        self.finished.append(url)
+        return 200, url, '<title>ok</title>'
+
+
+class ConcurrencyLimitTest(unittest.TestCase):
+
+    def test_busy_host_does_not_block_other_hosts(self):
+        # two global slots, one per host: a.test's second request must wait for
+        # its host without taking the slot b.test needs
+        fetcher = _TimedFetcher(0.05, concurrency=2, per_host=1)
+        urls = ['http://a.test/1', 'http://a.test/2', 'http://a.test/3', 'http://b.test/1']
+        asyncio.run(fetcher.fetch_all(urls))
+        self.assertIn('http://b.test/1', fetcher.finished[:2])
+
+    def test_backoff_releases_slots(self):
+        fetcher = _TimedFetcher(0.01, failures={'http://a.test/1'}, concurrency=1, backoff=0.3)
+        start = time.perf_counter()
+        results = asyncio.run(fetcher.fetch_all(['http://a.test/1', 'http://b.test/1']))
+        self.assertTrue(all(result.ok for result in results))
+        # b.test ran while a.test was backing off
+        self.assertEqual(fetcher.finished, ['http://b.test/1', 'http://a.test/1'])
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+class ExtractMetadataTest(unittest.TestCase):
+
+    def test_og_description_fallback(self):
+        page = "<title>T</title><meta property='og:description' content='OG text'>"
+        self.assertEqual(extract_metadata(page), ('T', 'OG text'))
+
+    def test_missing_tags(self):
+        self.assertEqual(extract_metadata('<html></html>'), ('', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
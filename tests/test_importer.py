@@ -0,0 +1,109 @@
+"""Streaming CSV and JSON-lines dumps into keyword groups"""
+
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from serp_importer import SERPImporter, detect_format, group_by_keyword, iter_csv_rows, iter_jsonl_rows
+
+CSV = ("keyword,domain,url,position,title,meta_description,snippet,title_length\n"
+       "laptops,a.com,https://a.com/,2,Best laptops,Our picks,,12\n"
+       "laptops,b.com,,1,,,Snippet,0\n"
+       "phones,c.com,https://c.com/,1,Phones,,,6\n")
+
+GROUPS = [
+    ('laptops', [('a.com', 'https://a.com/', 2, 'Best laptops', 'Our picks', ''),
+                 ('b.com', '', 1, '', '', 'Snippet')]),
+    ('phones', [('c.com', 'https://c.com/', 1, 'Phones', '', '')]),
+]
+
+
+def jsonl(*records) -> str:
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+class ReaderTest(unittest.TestCase):
+
+    def test_csv_rows(self):
+        rows = list(iter_csv_rows(io.StringIO(CSV)))
+        self.assertEqual(list(group_by_keyword(rows)), GROUPS)
+
+    def test_csv_without_keyword_column(self):
+        rows = list(iter_csv_rows(io.StringIO("domain,url,position\na.com,https://a.com/,1\n"), 'laptops'))
+        self.assertEqual(rows, [('laptops', ('a.com', 'https://a.com/', 1, '', '', ''))])
+
+    def test_jsonl_competitors_and_keyword_records(self):
+        text = jsonl({'keyword': 'laptops', 'domain': 'a.com', 'url': 'https://a.com/', 'position': '2',
+                      'title': 'Best laptops', 'meta_description': 'Our picks', 'title_length': 12},
+                     {'keyword': 'laptops', 'domain': 'b.com', 'position': 1, 'snippet': 'Snippet'},
+                     {'keyword': 'phones', 'competitors': [
+                         {'domain': 'c.com', 'url': 'https://c.com/', 'position': 1, 'title': 'Phones'}]})
+        rows = list(iter_jsonl_rows(io.StringIO(text + '\n')))
+        self.assertEqual(list(group_by_keyword(rows)), GROUPS)
+
+    def test_invalid_rows_are_reported(self):
+        text = jsonl({'keyword': 'k', 'domain': 5, 'url': 'u', 'position': 1},
+                     {'keyword': 'k', 'domain': 'a.com', 'url': 'u', 'position': 2, 'title': ['x']},
+                     {'keyword': 'k', 'domain': 'a.com', 'url': 'u', 'position': True},
+                     {'keyword': ['k'], 'domain': 'a.com', 'url': 'u', 'position': 1},
+                     {'keyword': 'k', 'url': 'u', 'position': 1},
+                     ['not', 'an', 'object'],
+                     {'keyword': 'k', 'domain': 'a.com', 'url': 'u', 'position': 3}) + '{broken\n'
+        errors = []
+        rows = list(iter_jsonl_rows(io.StringIO(text), on_invalid=errors.append))
+        self.assertEqual(rows, [('k', ('a.com', 'u', 3, '', '', ''))])
+        self.assertEqual([type(e) for e in errors],
+                         [TypeError, TypeError, TypeError, TypeError, KeyError, AttributeError, json.JSONDecodeError])
+        with self.assertRaisesRegex(ValueError, "line 1: invalid row: 'domain' must be a string"):
+            list(iter_jsonl_rows(io.StringIO(text)))
+
+    def test_group_by_keyword_keeps_stream_order(self):
+        rows = [('a', 1), ('a', 2), ('b', 3), ('a', 4)]
+        self.assertEqual(list(group_by_keyword(rows)), [('a', [1, 2]), ('b', [3]), ('a', [4])])
+
+    def test_detect_format(self):
+        self.assertEqual([detect_format(p) for p in ('x.csv', 'x.jsonl.gz', 'x.json', 'x.ndjson.zst', 'x.csv.gz')],
+                         ['csv', 'jsonl', 'jsonl', 'jsonl', 'csv'])
+
+
+class SERPImporterTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def test_reads_plain_and_gzipped_files(self):
+        with open(self.path('a.csv'), 'w', encoding='utf-8', newline='') as f:
+            f.write(CSV + "phones,d.com,https://d.com/,first,,,\n")
+        with gzip.open(self.path('b.jsonl.gz'), 'wt', encoding='utf-8') as f:
+            f.write(jsonl({'keyword': 'tablets', 'domain': 'e.com', 'url': 'https://e.com/', 'position': 1}))
+        importer = SERPImporter([self.path('a.csv'), self.path('b.jsonl.gz')])
+        groups = list(importer)
+        self.assertEqual(groups, GROUPS + [('tablets', [('e.com', 'https://e.com/', 1, '', '', '')])])
+        stats = importer.stats()
+        self.assertEqual((stats['rows'], stats['keywords'], stats['invalid_rows']), (4, 3, 1))
+
+    def test_strict_names_the_file(self):
+        with open(self.path('a.csv'), 'w', encoding='utf-8') as f:
+            f.write(CSV + "phones,d.com,https://d.com/,first,,,\n")
+        importer = SERPImporter(self.path('a.csv'), skip_invalid=False)
+        with self.assertRaisesRegex(ValueError, r"a\.csv: line 5: invalid row"):
+            list(importer)
+
+    def test_iter_analyzers(self):
+        with open(self.path('a.csv'), 'w', encoding='utf-8') as f:
+            f.write(CSV)
+        analyzers = list(SERPImporter(self.path('a.csv')).iter_analyzers())
+        self.assertEqual([(a.keyword, len(a.competitors)) for a in analyzers], [('laptops', 2), ('phones', 1)])
+        self.assertEqual(analyzers[0].analyze_rankings()['top_3_domains'], ['b.com', 'a.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()
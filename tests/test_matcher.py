@@ -0,0 +1,60 @@
+"""Aho-Corasick keyword matcher"""
+
+import random
+import unittest
+
+from serp_analyzer import SERPAnalyzer
+from serp_matcher import KeywordMatcher, presence_report
+
+
+class KeywordMatcherTest(unittest.TestCase):
+
+    def test_overlapping_and_nested_patterns(self):
+        matcher = KeywordMatcher(['he', 'she', 'his', 'hers'])
+        self.assertEqual(matcher.find('ushers'), {'he', 'she', 'hers'})
+        self.assertEqual(matcher.find('ahishers'), {'he', 'she', 'his', 'hers'})
+        self.assertEqual(matcher.find('nothing here'), {'he'})
+        self.assertEqual(matcher.find(''), set())
+
+    def test_case_insensitive(self):
+        matcher = KeywordMatcher(['Best Laptops'])
+        self.assertEqual(matcher.find('The BEST LAPTOPS of 2024'), {'Best Laptops'})
+
+    def test_variants_map_to_keyword(self):
+        matcher = KeywordMatcher(['laptop'], variants={'laptop': ['notebook'], 'tablet': ['ipad']})
+        self.assertEqual(matcher.find('A notebook and an iPad'), {'laptop', 'tablet'})
+        self.assertEqual(matcher.keywords, ['laptop', 'tablet'])
+
+    def test_count_counts_texts_not_occurrences(self):
+        matcher = KeywordMatcher(['a', 'b'])
+        self.assertEqual(matcher.count(['aa', 'ab', '', 'c']), {'a': 2, 'b': 1})
+
+    def test_matches_substring_search(self):
+        rng = random.Random(7)
+        alphabet = 'abc '
+        keywords = {''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(40)}
+        keywords.discard('')
+        matcher = KeywordMatcher(keywords)
+        for _ in range(200):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(matcher.find(text), {k for k in keywords if k in text}, text)
+
+
+class PresenceReportTest(unittest.TestCase):
+
+    def test_cross_ranking_pages(self):
+        laptops = SERPAnalyzer('laptops')
+        laptops.add_competitor('a.com', 'https://a.com/1', 1, 'Laptops and tablets', 'Best laptops')
+        laptops.add_competitor('b.com', 'https://b.com/1', 2, 'Laptops only', '')
+        tablets = SERPAnalyzer('tablets')
+        tablets.add_competitor('c.com', 'https://c.com/1', 1, 'Tablets', 'tablets vs laptops')
+
+        report = presence_report([laptops.analyze_rankings(), tablets.analyze_rankings()])
+        self.assertEqual(report['laptops']['title_presence'], {'laptops': 2, 'tablets': 1})
+        self.assertEqual(report['laptops']['meta_presence'], {'laptops': 1})
+        self.assertEqual([page['domain'] for page in report['laptops']['cross_ranking_pages']], ['a.com'])
+        self.assertEqual(report['tablets']['cross_ranking_pages'][0]['matched_keywords'], ['laptops'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""HTTP service request validation, caching and batches"""
+
+import json
+import socket
+import threading
+import time
+import unittest
+
+from serp_service import AnalysisService, LRUCache, ServiceError, create_server, parse_request
+
+
+def request(**competitor):
+    return {'keyword': 'laptops', 'competitors': [dict({'domain': 'a.com', 'url': 'https://a.com/', 'position': 1},
+                                                       **competitor)]}
+
+
+class ParseRequestTest(unittest.TestCase):
+
+    def assertRejected(self, payload, message):
+        with self.assertRaises(ServiceError) as caught:
+            parse_request(payload)
+        self.assertEqual(caught.exception.status, 400)
+        self.assertIn(message, str(caught.exception))
+
+    def test_valid_request(self):
+        keyword, rows = parse_request(request(position='2', title='Best laptops', snippet=None))
+        self.assertEqual(keyword, 'laptops')
+        self.assertEqual(rows, [('a.com', 'https://a.com/', 2, 'Best laptops', '', '')])
+
+    def test_rejects_malformed_payloads(self):
+        self.assertRejected([], "Expected a JSON object")
+        self.assertRejected({'keyword': ' ', 'competitors': []}, "'keyword'")
+        self.assertRejected({'keyword': 'k', 'competitors': {}}, "'competitors' must be a list")
+        self.assertRejected({'keyword': 'k', 'competitors': ['a.com']}, "expected an object")
+
+    def test_rejects_wrong_field_types(self):
+        self.assertRejected(request(domain=5), "'domain' must be a string")
+        self.assertRejected(request(url=None), "'url' must be a string")
+        self.assertRejected(request(title=['Best', 'laptops']), "'title' must be a string")
+        self.assertRejected(request(meta_description={'text': 'x'}), "'meta_description' must be a string")
+        self.assertRejected(request(position=True), "'position' must be an integer")
+        self.assertRejected(request(position=1.5), "'position' must be an integer")
+        self.assertRejected(request(position='first'), "invalid literal")
+
+    def test_rejects_missing_fields(self):
+        payload = request()
+        del payload['competitors'][0]['url']
+        self.assertRejected(payload, "missing 'url'")
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', b'1')
+        cache.put('b', b'2')
+        cache.get('a')
+        cache.put('c', b'3')
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (b'1', None, b'3'))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_peek_does_not_count(self):
+        cache = LRUCache(2)
+        cache.put('a', b'1')
+        self.assertEqual((cache.peek('a'), cache.peek('b')), (b'1', None))
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
+class AnalysisServiceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = AnalysisService(max_workers=2, cache_size=16)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.close()
+
+    def wait_idle(self):
+        # results are cached by a done-callback that can run just after the caller wakes
+        deadline = time.monotonic() + 5
+        while self.service.health()['pending'] and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_cache_counts_one_miss_then_hits(self):
+        before = self.service.cache.stats()
+        keyword, rows = parse_request(request(domain='cache.example.com', title='Cache test'))
+        first = self.service.analyze(keyword, rows)
+        self.wait_idle()
+        second = self.service.analyze(keyword, rows)
+        stats = self.service.cache.stats()
+        self.assertEqual(first, second)
+        self.assertEqual((stats['misses'] - before['misses'], stats['hits'] - before['hits']), (1, 1))
+
+    def test_batch_matches_single_requests(self):
+        batch = [parse_request(request(domain=f"batch{i % 5}.example.com", position=i % 10 + 1))
+                 for i in range(12)]
+        results = self.service.analyze_many(batch)
+        self.assertEqual(results, [self.service.analyze(keyword, rows) for keyword, rows in batch])
+
+    def test_batch_larger_than_pending_limit(self):
+        service = AnalysisService(max_workers=1, max_pending=2, cache_size=0)
+        self.addCleanup(service.close)
+        batch = [parse_request(request(domain=f"limit{i}.example.com")) for i in range(6)]
+        self.assertEqual(len(service.analyze_many(batch)), 6)
+        self.assertEqual(service.rejected, 0)
+
+
+class HTTPTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = create_server(port=0, service=AnalysisService(max_workers=1), quiet=True)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server.service.close()
+
+    def exchange(self, *requests: bytes) -> bytes:
+        """Send requests on one connection and read until the server closes it"""
+        with socket.create_connection(self.server.server_address, timeout=5) as sock:
+            sock.sendall(b''.join(requests))
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+
+    @staticmethod
+    def post(path: str, body: bytes) -> bytes:
+        return (f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+    def test_keep_alive_requests(self):
+        body = json.dumps(request()).encode()
+        response = self.exchange(self.post('/analyze', body), b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n")
+        self.assertEqual(response.count(b'HTTP/1.1 200 OK'), 2)
+
+    def test_unread_body_closes_the_connection(self):
+        body = json.dumps(request()).encode()
+        for first in (self.post('/nope', body),
+                      b"GET /nope HTTP/1.1\r\nHost: x\r\nContent-Length: 2\r\n\r\n{}",
+                      b"POST /analyze HTTP/1.1\r\nHost: x\r\nContent-Length: -1\r\n\r\n{}"):
+            with self.subTest(request=first.split(b'\r\n', 1)[0]):
+                response = self.exchange(first, b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n")
+                self.assertEqual(response.count(b'HTTP/1.1 '), 1, response)
+                self.assertIn(b'Connection: close', response)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Sharded runs: partial reports and their reduction"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from serp_benchmark import CorpusGenerator
+from serp_shard import (PartialReport, partial_filename, reduce_directory, run_shard, shard_of)
+
+
+def corpus():
+    return list(CorpusGenerator(seed=3, vocabulary_size=300, num_domains=60).serps(40, 10))
+
+
+class ShardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.groups = corpus()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_shards(self, num_shards: int, skip=()):
+        for shard in range(num_shards):
+            if shard not in skip:
+                path = os.path.join(self.directory.name, partial_filename(shard, num_shards))
+                run_shard(self.groups, shard, num_shards).save(path)
+
+    def test_shard_assignment_is_stable(self):
+        # pinned: partials written by other nodes or earlier runs must keep their keywords
+        self.assertEqual(shard_of('best laptops', 16), 1)
+        counts = [0] * 4
+        for keyword, _ in self.groups:
+            counts[shard_of(keyword, 4)] += 1
+        self.assertEqual(sum(counts), len(self.groups))
+
+    def test_reduce_matches_single_run(self):
+        single = run_shard(self.groups).report()
+        for num_shards in (3, 7):
+            with self.subTest(num_shards=num_shards):
+                self.write_shards(num_shards)
+                reduced = reduce_directory(self.directory.name).report()
+                self.assertEqual(json.dumps(reduced, sort_keys=True), json.dumps(single, sort_keys=True))
+                for name in os.listdir(self.directory.name):
+                    os.remove(os.path.join(self.directory.name, name))
+
+    def test_partial_round_trip(self):
+        partial = run_shard(self.groups, 1, 3)
+        path = partial.save(os.path.join(self.directory.name, 'partial.json'))
+        self.assertEqual(PartialReport.load(path).to_dict(), partial.to_dict())
+
+    def test_merge_is_order_independent(self):
+        parts = [run_shard(self.groups, shard, 3) for shard in range(3)]
+        forward = PartialReport()
+        for part in parts:
+            forward.merge(part)
+        backward = PartialReport()
+        for part in reversed(parts):
+            backward.merge(part)
+        self.assertEqual(forward.report(), backward.report())
+
+    def test_reduce_refuses_missing_shards(self):
+        self.write_shards(4, skip={2})
+        with self.assertRaisesRegex(ValueError, r'Missing shards \[2\]'):
+            reduce_directory(self.directory.name)
+
+    def test_reduce_refuses_mixed_shard_counts(self):
+        self.write_shards(2)
+        self.write_shards(3)
+        with self.assertRaisesRegex(ValueError, 'different shard counts'):
+            reduce_directory(self.directory.name)
+
+    def test_invalid_shard(self):
+        with self.assertRaises(ValueError):
+            run_shard(self.groups, 4, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
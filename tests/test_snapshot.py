@@ -0,0 +1,102 @@
+"""Binary snapshot format"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from serp_analyzer import SERPAnalyzer
+from serp_batch import SERPBatchAnalyzer
+from serp_snapshot import MAGIC, SnapshotStore, open_snapshot, write_snapshot
+from serp_storage import json_default
+
+ROWS = [
+    ('www.example.com', 'https://www.example.com/a', 3, 'Best laptops 2024', 'Our picks', 'snippet a'),
+    ('shop.example.co.uk', 'https://shop.example.co.uk/', 1, 'Laptops – günstig kaufen', '', 'snippet b'),
+    ('other.org', 'https://other.org/x', 2, '', 'Meta only', ''),
+    ('www.example.com', 'https://www.example.com/b', 3, 'Best laptops 2024', 'Our picks', 'snippet a'),
+]
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'laptops.snap')
+        self.analyzer = SERPAnalyzer('best laptops')
+        for row in ROWS:
+            self.analyzer.add_competitor(*row)
+
+    def open(self) -> SnapshotStore:
+        store = open_snapshot(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_round_trip(self):
+        self.analyzer.save_snapshot(self.path)
+        store = self.open()
+        self.assertEqual(store.keyword, 'best laptops')
+        self.assertEqual(store.analysis_date, self.analyzer.analysis_date)
+        self.assertEqual(len(store), len(ROWS))
+        self.assertEqual([store.row_dict(i) for i in range(len(store))], self.analyzer.competitors)
+        self.assertEqual(dict(store[1]), self.analyzer.competitors[1])
+        self.assertEqual(store[-1]['url'], ROWS[-1][1])
+
+    def test_strings_are_deduplicated(self):
+        self.analyzer.save_snapshot(self.path)
+        store = self.open()
+        strings = list(store.strings)
+        self.assertEqual(len(strings), len(set(strings)))
+        self.assertEqual(strings.count('Best laptops 2024'), 1)
+
+    def test_analysis_matches_in_memory_analyzer(self):
+        self.analyzer.save_snapshot(self.path)
+        opened = SERPAnalyzer.open_snapshot(self.path)
+        self.addCleanup(opened.competitors.close)
+        expected = self.analyzer.analyze_rankings()
+        actual = json.loads(json.dumps(opened.analyze_rankings(), default=json_default))
+        self.assertEqual(actual, json.loads(json.dumps(expected)))
+
+    def test_batch_accepts_snapshot_analyzers(self):
+        self.analyzer.save_snapshot(self.path)
+        opened = SERPAnalyzer.open_snapshot(self.path)
+        self.addCleanup(opened.competitors.close)
+        batch = SERPBatchAnalyzer(max_workers=1)
+        batch.add_analyzer(opened)
+        self.assertEqual(batch.keywords['best laptops'], ROWS)
+        self.assertEqual(batch.analyze_all()['best laptops']['total_competitors'], len(ROWS))
+
+    def test_read_only(self):
+        write_snapshot(self.path, 'k', self.analyzer.competitors)
+        store = self.open()
+        with self.assertRaises(TypeError):
+            store.add('a.com', 'u', 1)
+        copy = store.to_columnar()
+        copy.add('a.com', 'https://a.com/', 5)
+        self.assertEqual(len(copy), len(ROWS) + 1)
+
+    def test_empty_snapshot(self):
+        write_snapshot(self.path, 'empty', [])
+        store = self.open()
+        self.assertEqual((store.keyword, len(store)), ('empty', 0))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot at all, but long enough to hold a header' * 2)
+        with self.assertRaisesRegex(ValueError, 'not a SERP snapshot'):
+            open_snapshot(self.path)
+
+    def test_rejects_truncated_files(self):
+        self.analyzer.save_snapshot(self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data.startswith(MAGIC))
+        with open(self.path, 'wb') as f:
+            f.write(data[:-5])
+        with self.assertRaisesRegex(ValueError, 'truncated'):
+            open_snapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Per-keyword statistics: the NumPy path against pure Python"""
+
+import random
+import statistics
+import unittest
+
+from serp_stats import (TextStats, describe, describe_groups, histogram_percentiles, numpy_available,
+                        percentiles)
+
+
+def integer_groups(rng: random.Random):
+    groups = [[rng.randint(1, 160) for _ in range(rng.choice([0, 0, 1, 2, 10, 57]))] for _ in range(300)]
+    return [[]] + groups + [[]]
+
+
+def float_groups(rng: random.Random):
+    groups = [[rng.uniform(-50, 250) for _ in range(rng.choice([0, 1, 3, 10, 40]))] for _ in range(300)]
+    return [[]] + groups + [[], [7.25], [-3.5, -3.5]]
+
+
+class DescribeTest(unittest.TestCase):
+
+    def test_describe(self):
+        values = [5, 1, 4, 2, 3, 10]
+        stats = describe(values)
+        self.assertEqual((stats['count'], stats['min'], stats['max']), (6, 1, 10))
+        self.assertAlmostEqual(stats['mean'], statistics.fmean(values))
+        self.assertAlmostEqual(stats['std_dev'], statistics.pstdev(values))
+        self.assertEqual(stats['percentiles'], {'p25': 2.25, 'p50': 3.5, 'p75': 4.75, 'p90': 7.5})
+        self.assertIsNone(describe([]))
+
+    def test_histogram_percentiles_match_sorted_values(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            values = [rng.randint(0, rng.choice([3, 60])) for _ in range(rng.randint(1, 40))]
+            histogram = {}
+            for value in values:
+                histogram[value] = histogram.get(value, 0) + 1
+            self.assertEqual(histogram_percentiles(histogram, len(values)), percentiles(sorted(values)))
+
+    def test_text_stats_merge(self):
+        texts = ['Best laptops', 'laptops', 'Cheap tablets 2024', 'x']
+        whole = TextStats()
+        for text in texts:
+            whole.add(text, 'laptops')
+        left, right = TextStats(), TextStats()
+        for text in texts[:1]:
+            left.add(text, 'laptops')
+        for text in texts[1:]:
+            right.add(text, 'laptops')
+        merged = left.merge(right)
+        self.assertEqual(merged.to_dict(), whole.to_dict())
+        self.assertEqual(merged.summary(), whole.summary())
+        self.assertEqual(merged.keyword_presence(), '2/4 (50.0%)')
+
+    def test_use_numpy_requires_numpy(self):
+        if numpy_available():
+            self.skipTest("NumPy is installed")
+        with self.assertRaises(ImportError):
+            describe_groups([[1]], use_numpy=True)
+
+
+@unittest.skipUnless(numpy_available(), "NumPy is not installed")
+class NumpyPathTest(unittest.TestCase):
+
+    def assertMatches(self, groups):
+        expected = describe_groups(groups, use_numpy=False)
+        actual = describe_groups(groups, use_numpy=True)
+        self.assertEqual(len(actual), len(groups))
+        for i, (want, got) in enumerate(zip(expected, actual)):
+            if want is None:
+                self.assertIsNone(got, i)
+                continue
+            self.assertEqual(got['count'], want['count'], i)
+            for key in ('mean', 'min', 'max', 'std_dev'):
+                self.assertAlmostEqual(got[key], want[key], places=7, msg=(i, key))
+            self.assertEqual(got['percentiles'].keys(), want['percentiles'].keys())
+            for key, value in want['percentiles'].items():
+                self.assertAlmostEqual(got['percentiles'][key], value, places=7, msg=(i, key))
+
+    def test_integer_groups(self):
+        self.assertMatches(integer_groups(random.Random(2)))
+
+    def test_float_groups(self):
+        self.assertMatches(float_groups(random.Random(3)))
+
+    def test_degenerate_inputs(self):
+        for groups in ([], [[]], [[], []], [[4]], [[0, 0, 0]], [[], [-2, 5]]):
+            with self.subTest(groups=groups):
+                self.assertMatches(groups)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Columnar competitor storage and its record views"""
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from serp_analyzer import SERPAnalyzer
+from serp_batch import SERPBatchAnalyzer
+from serp_diff import diff_snapshots
+from serp_export import open_writer
+from serp_storage import CompetitorRecord, RecordSequence, json_default
+
+ROWS = [
+    ('b.com', 'https://b.com/', 2, 'Laptops on sale', '', 'snippet b'),
+    ('a.com', 'https://a.com/', 1, 'Best laptops', 'Our picks', ''),
+    ('c.com', 'https://c.com/', 3, '', 'Meta only', ''),
+]
+
+
+def analyzers():
+    """(list-backed, columnar) analyzers holding the same rows"""
+    result = []
+    for columnar in (False, True):
+        analyzer = SERPAnalyzer('laptops', columnar=columnar)
+        for row in ROWS:
+            analyzer.add_competitor(*row)
+        result.append(analyzer)
+    return result
+
+
+class ColumnarAnalyzerTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_records_behave_like_dicts(self):
+        plain, columnar = analyzers()
+        self.assertIsInstance(columnar.competitors[0], CompetitorRecord)
+        self.assertEqual(columnar.competitors.to_dicts(), plain.competitors)
+        ranked = columnar.analyze_rankings()['competitors']
+        self.assertIsInstance(ranked, RecordSequence)
+        self.assertEqual(ranked.to_dicts(), plain.analyze_rankings()['competitors'])
+        self.assertEqual([dict(record) for record in ranked[1:]], plain.analyze_rankings()['competitors'][1:])
+
+    def test_batch_accepts_columnar_analyzers(self):
+        results = []
+        for analyzer in analyzers():
+            batch = SERPBatchAnalyzer(max_workers=1)
+            batch.add_analyzer(analyzer)
+            self.assertEqual(batch.keywords['laptops'], ROWS)
+            analysis = batch.analyze_all()['laptops']
+            results.append({k: v for k, v in analysis.items() if k != 'analysis_date'})
+        plain, columnar = results
+        self.assertEqual(json.dumps(columnar, default=json_default), json.dumps(plain))
+
+    def test_export_writes_columnar_analyses(self):
+        for name in ('report.jsonl', 'report.csv'):
+            outputs = []
+            for analyzer in analyzers():
+                path = os.path.join(self.directory, name)
+                with open_writer(path) as writer:
+                    writer.write(analyzer)
+                with open(path, encoding='utf-8', newline='') as f:
+                    outputs.append(f.read())
+            with self.subTest(output=name):
+                self.assertEqual(outputs[0], outputs[1])
+        with open(os.path.join(self.directory, 'report.csv'), encoding='utf-8', newline='') as f:
+            self.assertEqual([row[1] for row in csv.reader(f)][1:], ['a.com', 'b.com', 'c.com'])
+
+    def test_diff_accepts_columnar_analyzers(self):
+        plain, columnar = analyzers()
+        self.assertEqual(diff_snapshots(plain, columnar)['unchanged'], len(ROWS))
+        columnar.add_competitor('d.com', 'https://d.com/', 1)
+        changes = diff_snapshots(plain, columnar)
+        self.assertEqual([entry['domain'] for entry in changes['entered']], ['d.com'])
+        self.assertEqual(diff_snapshots(plain.competitors, list(columnar.competitors))['entered'],
+                         changes['entered'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Tokenizer and the cross-keyword word index"""
+
+import unittest
+
+from serp_analyzer import SERPAnalyzer
+from serp_text import STOPWORDS, Tokenizer, WordIndex
+
+
+def analyzer(keyword: str, *titles: str) -> SERPAnalyzer:
+    result = SERPAnalyzer(keyword)
+    for position, title in enumerate(titles, 1):
+        result.add_competitor(f"site{position}.com", f"https://site{position}.com/", position, title)
+    return result
+
+
+class TokenizerTest(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(Tokenizer()('The BEST laptops, 2024 ok'), ['the', 'best', 'laptops'])
+        self.assertEqual(Tokenizer(stopwords=STOPWORDS)('The best laptops'), ['best', 'laptops'])
+
+
+class WordIndexTest(unittest.TestCase):
+
+    def test_lookup_and_top_words(self):
+        index = WordIndex()
+        index.add_analyzer(analyzer('laptops', 'Best laptops', 'Laptops laptops deals', 'Cheap deals'))
+        self.assertEqual(index.lookup('Laptops'), [('laptops', 1, 'site1.com', 'title'),
+                                                   ('laptops', 2, 'site2.com', 'title')])
+        self.assertEqual(index.top_words(2, max_position=2), [('laptops', 2), ('best', 1)])
+        self.assertEqual(index.keywords_for('deals'), {'laptops'})
+
+    def test_add_analyzer_tracks_each_analyzer(self):
+        index = WordIndex()
+        first = analyzer('k', 'Alpha')
+        index.add_analyzer(first)
+        # another run for the same keyword must not be skipped
+        second = analyzer('k', 'Alpha', 'Beta')
+        index.add_analyzer(second)
+        self.assertEqual(index.lookup('beta'), [('k', 2, 'site2.com', 'title')])
+        # only rows added since are indexed again
+        first.add_competitor('site9.com', 'https://site9.com/', 9, 'Gamma')
+        index.add_analyzer(first)
+        index.add_analyzer(second)
+        self.assertEqual(len(index.lookup('alpha')), 2)
+        self.assertEqual(index.lookup('gamma'), [('k', 9, 'site9.com', 'title')])
+        self.assertEqual(index.keywords, {'k'})
+
+
+if __name__ == '__main__':
+    unittest.main()